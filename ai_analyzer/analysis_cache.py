@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+class AnalysisCache:
+    """
+    分析结果缓存
+    以 (数据集内容哈希, 分析类型, 模板, 模型参数, 关键词背景语料签名, 缓存版本) 为键，将分析结果保存在磁盘上，
+    支持TTL过期、LRU淘汰以及条目数/总大小限制
+    """
+
+    # 分析逻辑或结果格式变化时递增，使旧版本代码生成的缓存条目失效
+    CACHE_VERSION = 3
+
+    def __init__(self, cache_dir: str = None, ttl: int = None,
+                 max_entries: int = None, max_bytes: int = None):
+        self.config = Config()
+        self.cache_dir = cache_dir or self.config.ANALYSIS_CACHE_DIR
+        self.ttl = self.config.ANALYSIS_CACHE_TTL if ttl is None else ttl
+        self.max_entries = self.config.ANALYSIS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = self.config.ANALYSIS_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        # 绝对路径 -> ((大小, 修改时间), 内容哈希)；每个路径只保留最新版本，按最近使用淘汰
+        self._hash_memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def file_hash(self, path: str) -> str:
+        """计算文件内容哈希（按路径、大小和修改时间记忆）"""
+        stat = os.stat(path)
+        memo_key = os.path.abspath(path)
+        version = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            entry = self._hash_memo.get(memo_key)
+            if entry and entry[0] == version:
+                self._hash_memo.move_to_end(memo_key)
+                return entry[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+
+        with self._lock:
+            self._hash_memo[memo_key] = (version, file_hash)
+            self._hash_memo.move_to_end(memo_key)
+            while len(self._hash_memo) > self.config.ANALYSIS_CACHE_HASH_MEMO_SIZE:
+                self._hash_memo.popitem(last=False)
+        return file_hash
+
+    def make_key(self, data_file: Union[str, List[str]], analysis_type: str,
+                 template: str = None, model_params: Dict[str, Any] = None,
+                 background: str = None) -> str:
+        """
+        生成缓存键（data_file 为列表时表示多个文件合并分析）
+        :param background: 关键词背景语料签名（KeywordExtractor.background_signature），历史数据变化后关键词得分随之变化
+        """
+        template_hash = ''
+        if template and os.path.exists(template):
+            template_hash = self.file_hash(template)
+        elif template:
+            template_hash = template
+
+        key_data = {
+            'dataset': (self.file_hash(data_file) if isinstance(data_file, str)
+                        else [self.file_hash(path) for path in data_file]),
+            'type': analysis_type,
+            'template': template_hash,
+            'model': model_params or {},
+            'background': background or '',
+            'version': self.CACHE_VERSION
+        }
+        raw = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_cacheable(result: Dict[str, Any]) -> bool:
+        """分析失败或AI调用失败的结果不缓存"""
+        if not isinstance(result, dict) or result.get('error'):
+            return False
+        ai_result = result.get('ai_analysis', {})
+        if isinstance(ai_result, dict):
+            if ai_result.get('error'):
+                return False
+            ai_result = ai_result.get('ai_analysis')
+        if isinstance(ai_result, str) and ai_result.startswith(('API调用失败', 'API调用出错')):
+            return False
+        return True
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目，不存在或已过期返回None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding=self.config.JSON_ENCODING) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+
+        if self.ttl and time.time() - entry.get('created_at', 0) > self.ttl:
+            self._remove(path)
+            self._count('misses')
+            return None
+
+        # 用修改时间记录最近访问，供LRU淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self._count('hits')
+        return entry
+
+    def _count(self, name: str) -> None:
+        """命中计数（Web服务多个请求线程共用同一实例）"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def put(self, key: str, result: Dict[str, Any], analysis_file: str = None) -> None:
+        """写入缓存条目并执行淘汰"""
+        entry = {
+            'key': key,
+            'created_at': time.time(),
+            'analysis_file': analysis_file,
+            'result': result
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._entry_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding=self.config.JSON_ENCODING) as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            print(f"写入分析缓存失败: {e}")
+
+    def evict(self) -> int:
+        """清理过期条目，并按最近访问时间淘汰超出限制的条目"""
+        if not os.path.exists(self.cache_dir):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # 修改时间即最近访问时间；长期未访问的条目必然已超过TTL
+            if self.ttl and now - stat.st_mtime > self.ttl:
+                removed += self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            removed += self._remove(path)
+
+        return removed
+
+    def _remove(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def clear(self) -> None:
+        """清空缓存"""
+        if os.path.exists(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
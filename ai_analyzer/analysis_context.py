@@ -0,0 +1,201 @@
+import os
+import sys
+import pandas as pd
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_analyzer.publish_time import parse_publish_time
+from ai_analyzer.sketches import DatasetSketches, SketchStore
+from crawler.storage import parse_likes
+
+
+class AnalysisContext:
+    """
+    分析上下文
+    对同一份数据只计算一次派生列和聚合结果（惰性计算并缓存），
+    供综合报告的各个部分共享读取。
+    报告各部分只通过聚合接口（*_summary / *_quantiles / *_histogram / *_counts 等）读取统计结果，
+    分块分析的 ChunkedAnalysisContext 以合并后的部分聚合实现同一套接口。
+    approximate 为True时点赞分位数和作者数由草图估计，并通过 error_bounds 给出误差范围
+    """
+
+    LIKES_QUANTILES = [0.2, 0.5, 0.8]
+
+    def __init__(self, data: pd.DataFrame, approximate: bool = False):
+        self.data = data
+        self.approximate = approximate
+        # load_data 会在 attrs 中记录来源文件，草图按来源文件持久化
+        self.source = getattr(data, 'attrs', {}).get('source')
+
+    @classmethod
+    def of(cls, data, approximate: bool = False) -> 'AnalysisContext':
+        """将DataFrame包装为分析上下文（已是上下文则直接返回）"""
+        if isinstance(data, AnalysisContext):
+            return data
+        return cls(data, approximate)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def empty(self) -> bool:
+        return self.data.empty
+
+    def has(self, column: str) -> bool:
+        """数据中是否包含指定字段"""
+        return column in self.data.columns
+
+    @property
+    def columns(self) -> List[str]:
+        """数据字段列表"""
+        return list(self.data.columns)
+
+    def column(self, name: str) -> pd.Series:
+        """读取单个字段（派生数据只通过这里取原始列，子类可以按需加载）"""
+        return self.data[name]
+
+    def frame(self, columns: List[str]) -> pd.DataFrame:
+        """读取若干字段组成的DataFrame"""
+        return self.data[columns]
+
+    @cached_property
+    def likes(self) -> pd.Series:
+        """解析后的点赞数（浮点数，"1.2万" 等写法换算单位，无法解析的为NaN；与数据仓库共用同一解析）"""
+        return parse_likes(self.column('likes'))
+
+    @cached_property
+    def likes_summary(self) -> Dict[str, float]:
+        """点赞数的基础聚合"""
+        likes = self.likes
+        return {
+            "avg_likes": likes.mean(),
+            "max_likes": likes.max(),
+            "min_likes": likes.min(),
+            "total_likes": likes.sum()
+        }
+
+    @cached_property
+    def likes_quantiles(self) -> Dict[float, float]:
+        """点赞数分位数（一次计算 20%/50%/80%，近似模式下由草图估计）"""
+        if self.approximate:
+            return self.sketches.likes.quantiles(self.LIKES_QUANTILES)
+        return self._exact_likes_quantiles()
+
+    def _exact_likes_quantiles(self) -> Dict[float, float]:
+        return self.likes.quantile(self.LIKES_QUANTILES).to_dict()
+
+    @cached_property
+    def likes_tiers(self) -> Dict[str, int]:
+        """按20%/80%分位数划分的高/中/低点赞笔记数"""
+        likes = self.likes
+        q20, q80 = self.likes_quantiles[0.2], self.likes_quantiles[0.8]
+        return {
+            "high": int((likes > q80).sum()),
+            "medium": int(((likes > q20) & (likes <= q80)).sum()),
+            "low": int((likes <= q20).sum())
+        }
+
+    def likes_histogram(self, bins: list, labels: list) -> pd.Series:
+        """点赞数区间分布（按区间顺序）"""
+        binned = pd.cut(self.likes, bins=bins, labels=labels, include_lowest=True)
+        return binned.value_counts(sort=False)
+
+    @cached_property
+    def author_counts(self) -> pd.Series:
+        """作者发帖数（按数量降序）"""
+        return self.column('author').value_counts()
+
+    @cached_property
+    def unique_authors(self) -> int:
+        """作者数量（近似模式下由HyperLogLog估计）"""
+        if self.approximate:
+            return int(round(self.sketches.authors.estimate()))
+        return len(self.author_counts)
+
+    @cached_property
+    def author_distribution(self) -> Dict[str, int]:
+        """只发过一篇和发过多篇笔记的作者数"""
+        counts = self.author_counts
+        return {"single_post": int((counts == 1).sum()), "multiple_posts": int((counts > 1).sum())}
+
+    @cached_property
+    def sketches(self) -> DatasetSketches:
+        """点赞分位数和作者去重计数草图（有来源文件时按文件持久化，可跨文件合并）"""
+        store = SketchStore()
+        if self.source and os.path.exists(self.source):
+            cached = store.load(self.source)
+            # 行数不一致说明数据是来源文件的子集（attrs 会随切片传递），不能使用整个文件的草图
+            if cached is not None and cached.rows == len(self):
+                return cached
+        sketches = DatasetSketches().update(
+            len(self),
+            likes=self.likes if self.has('likes') else None,
+            authors=self.column('author') if self.has('author') else None
+        )
+        if self.source and os.path.exists(self.source):
+            store.save(self.source, sketches)
+        return sketches
+
+    @cached_property
+    def error_bounds(self) -> Dict[str, Any]:
+        """近似统计的误差范围（精确模式下为空）"""
+        if not self.approximate:
+            return {}
+        bounds = {}
+        if self.has('likes'):
+            bounds['likes_quantiles'] = self.sketches.likes.error_bounds(self.LIKES_QUANTILES)
+        if self.has('author'):
+            bounds['unique_authors'] = self.sketches.authors.error_bounds()
+        return bounds
+
+    @cached_property
+    def title_lengths(self) -> pd.Series:
+        """标题长度"""
+        return self.column('title').str.len()
+
+    @cached_property
+    def title_length_mean(self) -> float:
+        """平均标题长度"""
+        return self.title_lengths.mean()
+
+    def title_length_histogram(self, bins: list, labels: list) -> pd.Series:
+        """标题长度区间分布（按区间顺序）"""
+        binned = pd.cut(self.title_lengths, bins=bins, labels=labels, include_lowest=True)
+        return binned.value_counts(sort=False)
+
+    def extract_keywords(self, extractor, top_n: int = 20) -> list:
+        """用关键词提取器提取标题关键词"""
+        return extractor.extract(self.column('title'), top_n)
+
+    @cached_property
+    def publish_dates(self) -> pd.Series:
+        """解析后的发布时间（相对时间以爬取时间为基准，无法解析的为NaT）"""
+        if self.has('publish_at'):
+            return self.column('publish_at')
+        return parse_publish_time(
+            self.column('publish_time'), self.column('crawl_time') if self.has('crawl_time') else None
+        )
+
+    @cached_property
+    def date_range(self) -> Optional[tuple]:
+        """发布时间范围 (最早, 最晚)，没有可解析的发布时间时为None"""
+        dates = self.publish_dates.dropna()
+        if dates.empty:
+            return None
+        return dates.min(), dates.max()
+
+    @cached_property
+    def dated_notes(self) -> int:
+        """发布时间可解析的笔记数"""
+        return int(self.publish_dates.notna().sum())
+
+    @cached_property
+    def weekday_counts(self) -> pd.Series:
+        """按星期（0为周一）统计的发布数"""
+        return self.publish_dates.dropna().dt.dayofweek.value_counts().reindex(range(7), fill_value=0)
+
+    @cached_property
+    def titles(self) -> list:
+        """标题列表"""
+        return self.column('title').tolist()
@@ -0,0 +1,150 @@
+import io
+import os
+import json
+import sys
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from ai_analyzer.analysis_cache import AnalysisCache
+from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+from crawler.catalog import record_file
+
+# 工作进程内复用的分析器（进程启动时创建一次）
+_worker_analyzer = None
+_worker_cache = None
+
+
+def _init_worker(limiter, approximate: bool) -> None:
+    """工作进程初始化：创建分析器，AI请求经各进程共享的信号量限流"""
+    global _worker_analyzer, _worker_cache
+    with redirect_stdout(io.StringIO()):
+        _worker_analyzer = DeepSeekAnalyzer()
+    _worker_analyzer.approximate = approximate
+    _worker_analyzer.llm_client.limiter = limiter
+    _worker_cache = AnalysisCache() if Config.ANALYSIS_CACHE_ENABLED else None
+
+
+def analyze_file(path: str, analysis_type: str = 'comprehensive', force: bool = False) -> Dict[str, Any]:
+    """
+    在工作进程中分析一个数据文件并保存结果（与 analyze 命令相同：先查分析缓存，大文件分块读取）
+    :return: 该文件的处理结果和耗时
+    """
+    analyzer = _worker_analyzer
+    start = time.perf_counter()
+    item = {'file': path, 'status': 'ok', 'rows': 0, 'analysis_file': None, 'error': None}
+    try:
+        with redirect_stdout(io.StringIO()):
+            cache_key = None
+            entry = None
+            if _worker_cache is not None:
+                cache_key = _worker_cache.make_key(
+                    path, analysis_type, model_params=analyzer.model_params(),
+                    background=analyzer.keyword_extractor.background_signature()
+                )
+                entry = None if force else _worker_cache.get(cache_key)
+
+            if entry and entry.get('analysis_file') and \
+                    os.path.exists(os.path.join(Config.DATA_DIR, entry['analysis_file'])):
+                cached = entry['result']
+                rows = cached.get('summary', {}).get('total_notes') or cached.get('trends', {}).get('total_notes', 0)
+                item.update(status='cached', analysis_file=entry['analysis_file'], rows=rows)
+            else:
+                load_start = time.perf_counter()
+                df = analyzer.load_data_chunked(path) if analyzer.should_chunk(path) else analyzer.load_data(path)
+                item['load_seconds'] = round(time.perf_counter() - load_start, 3)
+                if df.empty:
+                    raise ValueError("数据加载失败或数据为空")
+                item['rows'] = len(df)
+
+                if analysis_type == 'comprehensive':
+                    result = analyzer.generate_comprehensive_report(df)
+                elif analysis_type == 'trends':
+                    result = {
+                        'trends': analyzer.analyze_trends(df),
+                        'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                        'data_file': path
+                    }
+                else:
+                    result = analyzer.analyze_with_ai(df)
+
+                # 批量分析时多个文件在同一秒内完成，结果文件名带上数据文件名
+                relative = os.path.relpath(path, Config.DATA_DIR)
+                relative = os.path.basename(path) if relative.startswith('..') else relative
+                stem = os.path.splitext(relative)[0].replace(os.sep, '_')
+                filename = f"analysis_{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                analyzer.save_analysis(result, filename)
+                item['analysis_file'] = filename
+                if cache_key and _worker_cache.is_cacheable(result):
+                    _worker_cache.put(cache_key, result, filename)
+    except Exception as e:
+        item.update(status='failed', error=str(e))
+    item['seconds'] = round(time.perf_counter() - start, 3)
+    return item
+
+
+def run_batch(paths: List[str], analysis_type: str = 'comprehensive', workers: int = None,
+              ai_concurrency: int = None, force: bool = False, approximate: bool = None,
+              progress: Callable[[Dict[str, Any], int, int], None] = None) -> Dict[str, Any]:
+    """
+    批量分析多个数据文件
+    文件分发到进程池（大文件优先，均衡各进程负载），每个进程复用同一个分析器，本地统计在各CPU核上并行；
+    所有进程的AI请求经同一个有界信号量限流，同时进行的请求数不超过 ai_concurrency
+    :param progress: 每完成一个文件时回调 (结果, 已完成数, 总数)
+    :return: 各文件结果及吞吐量汇总
+    """
+    workers = max(1, min(workers or Config.BATCH_WORKERS, len(paths)))
+    ai_concurrency = ai_concurrency or Config.AI_MAX_CONCURRENCY
+    approximate = Config.ANALYSIS_APPROXIMATE if approximate is None else approximate
+    ordered = sorted(paths, key=lambda path: os.path.getsize(path), reverse=True)
+
+    context = multiprocessing.get_context()
+    limiter = context.BoundedSemaphore(ai_concurrency)
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(limiter, approximate)) as pool:
+        futures = [pool.submit(analyze_file, path, analysis_type, force) for path in ordered]
+        for future in as_completed(futures):
+            results.append(future.result())
+            if progress:
+                progress(results[-1], len(results), len(ordered))
+    elapsed = time.perf_counter() - start
+
+    order = {path: i for i, path in enumerate(paths)}
+    results.sort(key=lambda item: order[item['file']])
+    busy = sum(item['seconds'] for item in results)
+    rows = sum(item['rows'] for item in results)
+    return {
+        'batch_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'analysis_type': analysis_type,
+        'workers': workers,
+        'ai_concurrency': ai_concurrency,
+        'files': len(results),
+        'succeeded': sum(item['status'] == 'ok' for item in results),
+        'cached': sum(item['status'] == 'cached' for item in results),
+        'failed': sum(item['status'] == 'failed' for item in results),
+        'rows': rows,
+        'elapsed_seconds': round(elapsed, 3),
+        'files_per_second': round(len(results) / elapsed, 3) if elapsed else None,
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else None,
+        # 各文件耗时之和 / 总耗时：平均同时处理的文件数
+        'parallelism': round(busy / elapsed, 2) if elapsed else None,
+        'results': results
+    }
+
+
+def save_summary(summary: Dict[str, Any], filename: str = None) -> str:
+    """保存批量分析汇总"""
+    filename = filename or f"analysis_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(Config.DATA_DIR, exist_ok=True)
+    path = os.path.join(Config.DATA_DIR, filename)
+    with open(path, 'w', encoding=Config.JSON_ENCODING) as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    record_file(path, columns=list(summary))
+    return path
@@ -0,0 +1,303 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from ai_analyzer.analysis_context import AnalysisContext
+from ai_analyzer.keywords import KeywordExtractor
+from ai_analyzer.sketches import DatasetSketches, HeavyHitters, SketchStore
+from crawler.storage import iter_dataset
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """取值计数（按首次出现的顺序，索引统一为普通类型，便于跨分块相加）"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return pd.Series(counts, index=pd.Index(np.asarray(uniques, dtype=object)), dtype='int64')
+
+
+def add_counts(left: pd.Series, right: pd.Series) -> pd.Series:
+    """合并两份取值计数（保持首次出现的顺序，与一次性 value_counts 的并列排序一致）"""
+    if left.empty:
+        return right
+    if right.empty:
+        return left
+    return pd.concat([left, right]).groupby(level=0, sort=False).sum()
+
+
+def weighted_quantiles(counts: pd.Series, quantiles: List[float]) -> Dict[float, float]:
+    """由取值计数计算分位数（与 Series.quantile 的线性插值结果一致）"""
+    counts = counts[counts > 0].sort_index()
+    if counts.empty:
+        return {q: np.nan for q in quantiles}
+    values = counts.index.to_numpy(dtype=float)
+    ends = counts.to_numpy().cumsum()  # 每个取值之后的累计笔记数
+    result = {}
+    for q in quantiles:
+        position = (ends[-1] - 1) * q
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        low = values[np.searchsorted(ends, lower, side='right')]
+        high = values[np.searchsorted(ends, upper, side='right')]
+        result[q] = float(low + (high - low) * (position - lower))
+    return result
+
+
+def weighted_histogram(counts: pd.Series, bins: list, labels: list) -> pd.Series:
+    """由取值计数统计区间分布（按区间顺序）"""
+    binned = pd.cut(counts.index.to_numpy(dtype=float), bins=bins, labels=labels, include_lowest=True)
+    return counts.groupby(binned, observed=False).sum().reindex(labels, fill_value=0).astype('int64')
+
+
+class PartialAggregates:
+    """
+    可合并的部分聚合结果
+    每个数据分块单独计算，合并时计数相加、极值取极值、样本池重新筛选。
+    点赞数和标题长度保存取值计数（取值种类远少于行数），由此得到的均值、分位数和区间分布与一次性计算完全一致；
+    作者只跟踪发帖最多的 ANALYSIS_AUTHOR_CAPACITY 位（Space-Saving），作者数超出时由HyperLogLog估计；
+    关键词词表和AI提示的样本池同样有条数上限，内存占用不随数据量增长
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = []
+        self.authors = HeavyHitters()  # 作者 -> 发帖数（高频作者）
+        self.likes_counts = pd.Series(dtype='int64')         # 点赞数 -> 笔记数
+        self.title_length_counts = pd.Series(dtype='int64')  # 标题长度 -> 笔记数
+        self.dated_notes = 0
+        self.date_min = None
+        self.date_max = None
+        self.weekday_counts = pd.Series(0, index=range(7), dtype='int64')
+        self.term_stats = (0, pd.Series(dtype='int64'), pd.Series(dtype='int64'))
+        self.sketches = DatasetSketches()
+        self.samples = pd.DataFrame()
+
+    @classmethod
+    def from_chunk(cls, chunk: pd.DataFrame, keyword_extractor: KeywordExtractor = None,
+                   pool_size: int = None, seed: int = None) -> 'PartialAggregates':
+        """计算一个数据分块的部分聚合"""
+        part = cls()
+        ctx = AnalysisContext(chunk)
+        part.rows = len(chunk)
+        part.columns = list(chunk.columns)
+
+        if ctx.has('author'):
+            part.authors.update(value_counts(chunk['author']))
+        if ctx.has('likes'):
+            part.likes_counts = value_counts(ctx.likes)
+        part.sketches.update(
+            len(chunk),
+            likes=ctx.likes if ctx.has('likes') else None,
+            authors=chunk['author'] if ctx.has('author') else None
+        )
+        if ctx.has('title'):
+            part.title_length_counts = value_counts(ctx.title_lengths)
+            if keyword_extractor is not None:
+                part.term_stats = keyword_extractor.term_stats(chunk['title'])
+        if ctx.has('publish_time'):
+            part.dated_notes = ctx.dated_notes
+            if ctx.date_range:
+                part.date_min, part.date_max = ctx.date_range
+            part.weekday_counts = ctx.weekday_counts.astype('int64')
+
+        # 样本池：点赞最高的一半 + 随机抽取的一半（随机键最小的若干行，合并后仍是均匀抽样）
+        pool = chunk.copy()
+        pool['_likes'] = ctx.likes.fillna(0).to_numpy() if ctx.has('likes') else 0
+        pool['_random'] = np.random.default_rng(seed).random(len(pool))
+        part.samples = cls._select_pool(pool, pool_size or Config.ANALYSIS_SAMPLE_POOL)
+        return part
+
+    @staticmethod
+    def _select_pool(pool: pd.DataFrame, pool_size: int) -> pd.DataFrame:
+        if len(pool) <= pool_size:
+            return pool
+        half = pool_size // 2
+        top = pool.nlargest(half, '_likes')
+        rest = pool.drop(top.index).nsmallest(pool_size - half, '_random')
+        return pd.concat([top, rest])
+
+    def merge(self, other: 'PartialAggregates', vocab: int = None, pool_size: int = None) -> 'PartialAggregates':
+        """合并另一份部分聚合（原地更新并返回自身）"""
+        self.rows += other.rows
+        self.columns += [c for c in other.columns if c not in self.columns]
+        self.authors.merge(other.authors)
+        self.likes_counts = add_counts(self.likes_counts, other.likes_counts)
+        self.title_length_counts = add_counts(self.title_length_counts, other.title_length_counts)
+        self.term_stats = KeywordExtractor.merge_term_stats(
+            self.term_stats, other.term_stats, vocab or Config.KEYWORD_CHUNK_VOCAB
+        )
+        self.sketches.merge(other.sketches)
+
+        self.dated_notes += other.dated_notes
+        self.weekday_counts = self.weekday_counts.add(other.weekday_counts, fill_value=0).astype('int64')
+        if other.date_min is not None:
+            self.date_min = other.date_min if self.date_min is None else min(self.date_min, other.date_min)
+            self.date_max = other.date_max if self.date_max is None else max(self.date_max, other.date_max)
+
+        samples = [s for s in (self.samples, other.samples) if not s.empty]
+        if samples:
+            self.samples = self._select_pool(pd.concat(samples), pool_size or Config.ANALYSIS_SAMPLE_POOL)
+        return self
+
+
+class ChunkedAnalysisContext(AnalysisContext):
+    """
+    分块分析上下文
+    按 chunksize 逐块读取数据文件（CSV / Parquet / Arrow），只保留可合并的部分聚合，内存占用与文件大小无关。
+    聚合接口（点赞、作者、标题长度、发布时间、关键词）基于全部数据；
+    data / likes / titles 对应为AI提示保留的代表性笔记样本池
+    """
+
+    # 分析用到的列及其类型：CSV统一按文本读入，避免逐块推断类型（列式格式自带类型）；
+    # 点赞可能是 "1.2万" 等文本，作者、点赞和发布时间在分块内去重编码后再统计
+    COLUMNS = ['title', 'author', 'likes', 'publish_time', 'crawl_time']
+    DTYPES = {column: 'str' for column in COLUMNS}
+
+    def __init__(self, aggregates: PartialAggregates, source: str = None, approximate: bool = False):
+        samples = aggregates.samples.drop(columns=['_likes', '_random'], errors='ignore')
+        super().__init__(samples.reset_index(drop=True), approximate)
+        self.aggregates = aggregates
+        self.source = source
+
+    @classmethod
+    def from_file(cls, path: str, chunksize: int = None, keyword_extractor: KeywordExtractor = None,
+                  approximate: bool = False) -> 'ChunkedAnalysisContext':
+        """分块读取数据文件（只读取分析用到的列）并合并各分块的部分聚合"""
+        keyword_extractor = keyword_extractor or KeywordExtractor()
+        aggregates = PartialAggregates()
+        reader = iter_dataset(path, cls.COLUMNS, chunksize, dtype=cls.DTYPES)
+        for index, chunk in enumerate(reader):
+            aggregates.merge(PartialAggregates.from_chunk(chunk, keyword_extractor, seed=index))
+        return cls(aggregates, source=path, approximate=approximate)
+
+    def __len__(self):
+        return self.aggregates.rows
+
+    @property
+    def empty(self) -> bool:
+        return self.aggregates.rows == 0
+
+    def has(self, column: str) -> bool:
+        return column in self.aggregates.columns
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.aggregates.columns)
+
+    @cached_property
+    def likes_summary(self) -> Dict[str, float]:
+        counts = self.aggregates.likes_counts
+        if counts.empty:
+            return {"avg_likes": np.nan, "max_likes": np.nan, "min_likes": np.nan, "total_likes": 0.0}
+        values = counts.index.to_numpy(dtype=float)
+        total = float((values * counts.to_numpy()).sum())
+        return {
+            "avg_likes": total / counts.sum(),
+            "max_likes": values.max(),
+            "min_likes": values.min(),
+            "total_likes": total
+        }
+
+    def _exact_likes_quantiles(self) -> Dict[float, float]:
+        return weighted_quantiles(self.aggregates.likes_counts, self.LIKES_QUANTILES)
+
+    @cached_property
+    def likes_tiers(self) -> Dict[str, int]:
+        counts = self.aggregates.likes_counts
+        values = counts.index.to_numpy(dtype=float)
+        q20, q80 = self.likes_quantiles[0.2], self.likes_quantiles[0.8]
+        return {
+            "high": int(counts[values > q80].sum()),
+            "medium": int(counts[(values > q20) & (values <= q80)].sum()),
+            "low": int(counts[values <= q20].sum())
+        }
+
+    def likes_histogram(self, bins: list, labels: list) -> pd.Series:
+        return weighted_histogram(self.aggregates.likes_counts, bins, labels)
+
+    @cached_property
+    def author_counts(self) -> pd.Series:
+        # 作者数超出跟踪上限时只包含高频作者，计数为上界
+        return self.aggregates.authors.top()
+
+    @cached_property
+    def unique_authors(self) -> int:
+        if self.approximate or not self.aggregates.authors.exact:
+            return int(round(self.aggregates.sketches.authors.estimate()))
+        return len(self.author_counts)
+
+    @cached_property
+    def author_distribution(self) -> Dict[str, int]:
+        authors = self.aggregates.authors
+        if authors.exact:
+            return super().author_distribution
+        # 未跟踪的作者发帖数不超过 floor，按只发过一篇计；跟踪的作者按计数下界判断
+        multiple = int(((authors.counts - authors.errors) > 1).sum())
+        return {"single_post": max(self.unique_authors - multiple, 0), "multiple_posts": multiple}
+
+    @cached_property
+    def sketches(self) -> DatasetSketches:
+        # 草图随各分块一起构建，顺便按来源文件保存供跨文件合并
+        if self.source and os.path.exists(self.source):
+            SketchStore().save(self.source, self.aggregates.sketches)
+        return self.aggregates.sketches
+
+    @cached_property
+    def title_length_mean(self) -> float:
+        counts = self.aggregates.title_length_counts
+        if counts.empty:
+            return np.nan
+        return float((counts.index.to_numpy(dtype=float) * counts.to_numpy()).sum() / counts.sum())
+
+    def title_length_histogram(self, bins: list, labels: list) -> pd.Series:
+        return weighted_histogram(self.aggregates.title_length_counts, bins, labels)
+
+    def extract_keywords(self, extractor: KeywordExtractor, top_n: int = 20) -> list:
+        exclude = KeywordExtractor.file_key(self.source) if self.source and os.path.exists(self.source) else None
+        return extractor.rank(self.aggregates.term_stats, top_n, exclude=exclude)
+
+    @cached_property
+    def date_range(self) -> Optional[tuple]:
+        if self.aggregates.date_min is None:
+            return None
+        return self.aggregates.date_min, self.aggregates.date_max
+
+    @cached_property
+    def dated_notes(self) -> int:
+        return self.aggregates.dated_notes
+
+    @cached_property
+    def weekday_counts(self) -> pd.Series:
+        return self.aggregates.weekday_counts
+
+
+def load_file_sketches(path: str, store: SketchStore = None, chunksize: int = None) -> DatasetSketches:
+    """
+    读取数据文件的草图：有缓存直接使用，否则只分块读取作者和点赞列构建后保存。
+    内存占用只与草图精度有关，适合对大量历史文件做近似汇总
+    """
+    store = store or SketchStore()
+    cached = store.load(path)
+    if cached is not None:
+        return cached
+    sketches = DatasetSketches()
+    for chunk in iter_dataset(path, ['author', 'likes'], chunksize, dtype={'author': 'str', 'likes': 'str'}):
+        ctx = AnalysisContext(chunk)
+        sketches.update(
+            len(chunk),
+            likes=ctx.likes if ctx.has('likes') else None,
+            authors=chunk['author'] if ctx.has('author') else None
+        )
+    store.save(path, sketches)
+    return sketches
+
+
+def merge_file_sketches(paths: List[str], store: SketchStore = None) -> DatasetSketches:
+    """合并多个数据文件的草图（点赞分位数和作者去重计数跨文件汇总）"""
+    merged = DatasetSketches()
+    for path in paths:
+        merged.merge(load_file_sketches(path, store))
+    return merged
@@ -1,18 +1,65 @@
 import json
+import math
 import pandas as pd
 import os
 import sys
+import time
+import uuid
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from ai_analyzer.analysis_context import AnalysisContext
+from ai_analyzer.chunked_context import ChunkedAnalysisContext, PartialAggregates
+from ai_analyzer.llm_cache import LLMResponseCache
+from ai_analyzer.llm_client import DeepSeekClient, LLMAPIError, CircuitOpenError
+from ai_analyzer.tokens import estimate_tokens_series
+from ai_analyzer.prompt_packer import PromptPacker
+from ai_analyzer.usage_log import UsageLog, UsageTracker
+from ai_analyzer.keywords import KeywordExtractor
+from ai_analyzer.publish_time import parse_publish_time
+from ai_analyzer.mapped_context import MappedAnalysisContext
+from ai_analyzer.merged_loader import load_merged
+from crawler.catalog import record_file
+from crawler.storage import data_format_of, read_dataset
 
 class DeepSeekAnalyzer:
+    # 分析维度：(键, 标题, 分析要点)
+    ANALYSIS_DIMENSIONS = [
+        ('content_trends', '内容趋势分析', ['热门话题和关键词识别', '内容类型分布', '标题特征分析', '内容风格总结']),
+        ('user_behavior', '用户行为分析', ['点赞数分布和规律', '热门作者特征', '用户偏好分析', '互动模式总结']),
+        ('market_insights', '市场洞察', ['行业趋势判断', '用户需求分析', '内容机会识别', '竞争态势评估']),
+        ('strategic_recommendations', '策略建议', ['内容创作建议', '运营策略推荐', '用户增长建议', '变现机会分析']),
+        ('risk_warnings', '风险提示', ['潜在风险识别', '合规建议', '竞争风险分析'])
+    ]
+    
+    WEEKDAY_LABELS = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+    # 逐行格式化笔记时使用的字段
+    NOTE_COLUMNS = ('title', 'author', 'likes', 'publish_time')
+    
+    # 分片摘要请求的系统提示（静态，分片内容放在用户消息中）
+    MAP_SYSTEM_PROMPT = (
+        "你是一个专业的小红书内容分析师，擅长数据分析和市场洞察。"
+        "你会收到小红书笔记数据的一个分片，每行一条笔记，字段以 | 分隔。"
+        "请用不超过300字概括这部分数据的热门话题、标题特征、作者分布和点赞规律，只输出要点。"
+    )
+    
     def __init__(self):
         self.config = Config()
         self.api_key = self.config.DEEPSEEK_API_KEY
         self.api_base = self.config.DEEPSEEK_API_BASE
+        self.llm_cache = LLMResponseCache() if self.config.LLM_CACHE_ENABLED else None
+        self.llm_client = DeepSeekClient(self.api_base, self.api_key)
+        self.ai_mode = self.config.AI_ANALYSIS_MODE
+        self.usage_log = UsageLog() if self.config.LLM_USAGE_LOG_ENABLED else None
+        self.system_prompt = self._build_system_prompt()
+        self.keyword_extractor = KeywordExtractor()
+        self.approximate = self.config.ANALYSIS_APPROXIMATE
+        self.dataset_cache = None  # 进程内的数据集缓存（Web服务中设置，见 crawler.dataset_cache）
         
         if not self.api_key:
             print("警告: 未设置DEEPSEEK_API_KEY，将使用模拟分析")
@@ -23,31 +70,110 @@ class DeepSeekAnalyzer:
     def update_api_key(self, api_key: str):
         """更新API密钥"""
         self.api_key = api_key
+        self.llm_client.api_key = api_key
         if api_key:
             self.use_mock = False
             print("API密钥已更新，将使用真实API")
         else:
             self.use_mock = True
             print("API密钥已清空，将使用模拟分析")
+    
+    def model_params(self) -> Dict[str, Any]:
+        """影响分析结果的模型参数（用于缓存键）"""
+        return {
+            'model': self.config.DEEPSEEK_MODEL,
+            'max_tokens': self.config.MAX_TOKENS,
+            'temperature': self.config.TEMPERATURE,
+            'mock': self.use_mock,
+            'ai_mode': self.ai_mode,
+            'approximate': self.approximate
+        }
             
-    def load_data(self, csv_file_path: str) -> pd.DataFrame:
-        """加载CSV数据文件"""
+    def load_data(self, csv_file_path: str, columns: List[str] = None) -> pd.DataFrame:
+        """
+        加载数据文件（CSV / Parquet / Arrow，按扩展名判断；发布时间统一解析到 publish_at 列）
+        Arrow文件不读入内存，返回内存映射的分析上下文，各字段在分析用到时才加载；
+        设置了 dataset_cache 时，解析后的数据缓存在内存中，同一文件再次分析时不再读取和解析
+        :param columns: 只读取这些列，列式格式只解码所需的列
+        """
+        if data_format_of(csv_file_path) == 'arrow':
+            return self.load_data_mapped(csv_file_path, columns)
         try:
-            df = pd.read_csv(csv_file_path, encoding='utf-8-sig')
-            print(f"成功加载数据文件: {csv_file_path}")
+            df = self.dataset_cache.get(csv_file_path, columns) if self.dataset_cache else None
+            cached = df is not None
+            if not cached:
+                df = read_dataset(csv_file_path, columns)
+            # 爬虫保存时缓存的是原始数据，第一次分析时补上发布时间后重新缓存
+            if 'publish_time' in df.columns and 'publish_at' not in df.columns:
+                df['publish_at'] = parse_publish_time(df['publish_time'], df.get('crawl_time'))
+                cached = False
+            if self.dataset_cache and not cached:
+                self.dataset_cache.put(csv_file_path, df, columns)
+            df.attrs['source'] = csv_file_path  # 近似统计的草图按来源文件持久化
+            print(f"成功加载数据文件: {csv_file_path}{'（内存缓存）' if cached else ''}")
             print(f"数据行数: {len(df)}")
             return df
         except Exception as e:
             print(f"加载数据文件失败: {e}")
             return pd.DataFrame()
     
+    def load_files(self, paths: List[str]) -> pd.DataFrame:
+        """
+        加载多个数据文件（线程池并行读取，经过 dataset_cache），按笔记ID去重，同一笔记保留最晚爬取的点赞快照，
+        合并后作为一个数据集分析
+        """
+        if len(paths) == 1:
+            return self.load_data(paths[0])
+        try:
+            df = load_merged(paths, dataset_cache=self.dataset_cache)
+            print(f"成功加载 {len(paths)} 个数据文件")
+            print(f"数据行数: {len(df)}（去除重复笔记 {df.attrs['duplicates']} 条）")
+            return df
+        except Exception as e:
+            print(f"加载数据文件失败: {e}")
+            return pd.DataFrame()
+    
+    def load_data_chunked(self, csv_file_path: str, chunksize: int = None) -> AnalysisContext:
+        """分块加载数据文件（只保留可合并的聚合结果，适用于超出内存的大文件）"""
+        try:
+            ctx = ChunkedAnalysisContext.from_file(
+                csv_file_path, chunksize, self.keyword_extractor, approximate=self.approximate
+            )
+            print(f"成功分块加载数据文件: {csv_file_path}")
+            print(f"数据行数: {len(ctx)}")
+            return ctx
+        except Exception as e:
+            print(f"加载数据文件失败: {e}")
+            return ChunkedAnalysisContext(PartialAggregates(), approximate=self.approximate)
+    
+    def load_data_mapped(self, arrow_file_path: str, columns: List[str] = None) -> AnalysisContext:
+        """内存映射加载Arrow数据文件（同一文件的各次分析共享映射，字段按需加载）"""
+        try:
+            ctx = MappedAnalysisContext.open(arrow_file_path, columns, approximate=self.approximate)
+            print(f"成功映射数据文件: {arrow_file_path}")
+            print(f"数据行数: {len(ctx)}")
+            return ctx
+        except Exception as e:
+            print(f"加载数据文件失败: {e}")
+            return AnalysisContext(pd.DataFrame(), approximate=self.approximate)
+    
+    def should_chunk(self, csv_file_path: str) -> bool:
+        """文件超过 ANALYSIS_CHUNKED_MIN_BYTES 时使用分块分析（内存映射的Arrow文件不需要分块）"""
+        if data_format_of(csv_file_path) == 'arrow':
+            return False
+        try:
+            return os.path.getsize(csv_file_path) >= self.config.ANALYSIS_CHUNKED_MIN_BYTES
+        except OSError:
+            return False
+    
     def analyze_trends(self, data: pd.DataFrame) -> Dict[str, Any]:
         """分析热门趋势"""
-        if data.empty:
+        ctx = AnalysisContext.of(data, self.approximate)
+        if ctx.empty:
             return {"error": "数据为空"}
             
         analysis = {
-            "total_notes": len(data),
+            "total_notes": len(ctx),
             "top_authors": [],
             "popular_topics": [],
             "engagement_analysis": {},
@@ -56,73 +182,55 @@ class DeepSeekAnalyzer:
         }
         
         # 分析热门作者
-        if 'author' in data.columns:
-            author_counts = data['author'].value_counts().head(5)
+        if ctx.has('author'):
+            author_counts = ctx.author_counts.head(5)
             analysis["top_authors"] = [
                 {"author": author, "count": count} 
                 for author, count in author_counts.items()
             ]
         
         # 分析点赞数
-        if 'likes' in data.columns:
+        if ctx.has('likes'):
             try:
-                # 清理点赞数据
-                likes_data = data['likes'].astype(str).str.extract('(\d+)')[0].astype(float)
-                analysis["engagement_analysis"] = {
-                    "avg_likes": likes_data.mean(),
-                    "max_likes": likes_data.max(),
-                    "min_likes": likes_data.min(),
-                    "total_likes": likes_data.sum()
-                }
+                analysis["engagement_analysis"] = dict(ctx.likes_summary)
             except:
                 analysis["engagement_analysis"] = {"error": "无法解析点赞数据"}
         
+        # 分析发布时间
+        if ctx.has('publish_time') and ctx.date_range:
+            analysis["time_analysis"] = {
+                "date_range": self._get_date_range(ctx),
+                "dated_notes": ctx.dated_notes,
+                "weekday_distribution": {
+                    self.WEEKDAY_LABELS[day]: int(count) for day, count in ctx.weekday_counts.items()
+                }
+            }
+        
         # 分析标题关键词
-        if 'title' in data.columns:
-            keywords = self._extract_keywords(data['title'].tolist())
+        if ctx.has('title'):
+            keywords = self._extract_keywords(ctx)
             analysis["popular_topics"] = keywords[:10]
         
         # 生成建议
-        analysis["recommendations"] = self._generate_recommendations(data)
+        analysis["recommendations"] = self._generate_recommendations(ctx)
         
         return analysis
     
-    def _extract_keywords(self, titles: List[str]) -> List[Dict[str, Any]]:
-        """提取标题中的关键词"""
-        import re
-        from collections import Counter
-        
-        # 合并所有标题
-        all_text = ' '.join(titles)
-        
-        # 移除特殊字符，保留中文和英文
-        cleaned_text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z\s]', '', all_text)
-        
-        # 分词（简单按空格分割）
-        words = cleaned_text.split()
-        
-        # 过滤短词
-        words = [word for word in words if len(word) > 1]
-        
-        # 统计词频
-        word_counts = Counter(words)
-        
-        return [
-            {"keyword": word, "frequency": count} 
-            for word, count in word_counts.most_common(20)
-        ]
+    def _extract_keywords(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
+        """提取标题中的关键词（中文n-gram + 历史数据TF-IDF）"""
+        return AnalysisContext.of(data, self.approximate).extract_keywords(self.keyword_extractor)
     
     def _generate_recommendations(self, data: pd.DataFrame) -> List[str]:
         """生成分析建议"""
+        ctx = AnalysisContext.of(data, self.approximate)
         recommendations = []
         
-        if len(data) > 0:
-            recommendations.append(f"共分析了 {len(data)} 条笔记")
+        if len(ctx) > 0:
+            recommendations.append(f"共分析了 {len(ctx)} 条笔记")
             
-            if 'likes' in data.columns:
+            if ctx.has('likes'):
                 try:
-                    likes_data = data['likes'].astype(str).str.extract('(\d+)')[0].astype(float)
-                    avg_likes = likes_data.mean()
+                    avg_likes = ctx.likes_summary["avg_likes"]
                     recommendations.append(f"平均点赞数: {avg_likes:.1f}")
                     
                     if avg_likes > 1000:
@@ -134,104 +242,301 @@ class DeepSeekAnalyzer:
                 except:
                     recommendations.append("无法分析点赞数据")
             
-            if 'author' in data.columns:
-                unique_authors = data['author'].nunique()
+            if ctx.has('author'):
+                unique_authors = ctx.unique_authors
                 recommendations.append(f"涉及 {unique_authors} 位作者")
                 
-                if unique_authors < len(data) * 0.3:
+                if unique_authors < len(ctx) * 0.3:
                     recommendations.append("建议关注头部作者的内容策略")
                 else:
                     recommendations.append("内容创作者分布较为分散")
         
         return recommendations
     
-    def analyze_with_ai(self, data: pd.DataFrame, template: str = None) -> Dict[str, Any]:
-        """使用DeepSeek AI进行深度分析"""
+    def analyze_with_ai(self, data: pd.DataFrame, template: str = None, mode: str = None,
+                        data_summary: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        使用DeepSeek AI进行深度分析
+        :param mode: single 单次调用；map_reduce 分片并发摘要后汇总；
+                     dimensions 各分析维度并发请求后合并（默认取 ai_mode）
+        :param data_summary: 已准备好的数据摘要（默认根据data生成）
+        """
         if self.use_mock:
             return self._mock_ai_analysis(data)
         
+        mode = self._resolve_mode(mode, template)
+        ctx = AnalysisContext.of(data, self.approximate)
+        usage = UsageTracker()
+        
         try:
             # 准备数据摘要
-            data_summary = self._prepare_data_summary(data)
+            data_summary = data_summary or self._prepare_data_summary(ctx)
             
-            # 构建分析提示
-            prompt = self._build_analysis_prompt(data_summary, template)
+            if mode == 'map_reduce':
+                prompt, chunk_count = self._map_reduce_prompt(ctx, data_summary, template, usage)
+                response = self._call_deepseek_api(prompt, usage=usage, kind='reduce')
+                result = {
+                    "ai_analysis": response,
+                    "data_summary": data_summary,
+                    "analysis_mode": mode,
+                    "chunk_count": chunk_count,
+                    "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+            elif mode == 'dimensions':
+                sections = {}
+                parts = []
+                for key, text in self._iter_dimension_analysis(data_summary, usage):
+                    sections[key] = text
+                    parts.append(text)
+                result = {
+                    "ai_analysis": '\n\n'.join(parts),
+                    "ai_sections": sections,
+                    "data_summary": data_summary,
+                    "analysis_mode": mode,
+                    "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+            else:
+                # 构建分析提示
+                prompt = self._build_analysis_prompt(data_summary, template)
+                
+                # 调用DeepSeek API
+                response = self._call_deepseek_api(prompt, usage=usage)
+                
+                result = {
+                    "ai_analysis": response,
+                    "data_summary": data_summary,
+                    "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
             
-            # 调用DeepSeek API
-            response = self._call_deepseek_api(prompt)
+        except CircuitOpenError as e:
+            print(f"{e}，改用本地分析")
+            return self._mock_ai_analysis(data)
+        except Exception as e:
+            print(f"AI分析失败: {e}")
+            result = {"error": f"AI分析失败: {str(e)}"}
+        
+        self._record_usage(result, usage)
+        return result
+    
+    def stream_analysis_with_ai(self, data: pd.DataFrame, template: str = None, mode: str = None,
+                                data_summary: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式AI分析
+        逐段产出 {'event': 'token', 'text': ...}，
+        最后产出 {'event': 'done', 'result': ...}（结构与analyze_with_ai一致）
+        """
+        if self.use_mock:
+            yield {'event': 'done', 'result': self._mock_ai_analysis(data)}
+            return
+        
+        mode = self._resolve_mode(mode, template)
+        ctx = AnalysisContext.of(data, self.approximate)
+        usage = UsageTracker()
+        
+        try:
+            data_summary = data_summary or self._prepare_data_summary(ctx)
+            extra = {}
+            if mode == 'dimensions':
+                # 各维度并发生成，按维度顺序逐段输出
+                sections = {}
+                parts = []
+                for key, text in self._iter_dimension_analysis(data_summary, usage):
+                    sections[key] = text
+                    parts.append(text)
+                    yield {'event': 'token', 'text': text if len(parts) == 1 else '\n\n' + text}
+                result = {
+                    "ai_analysis": '\n\n'.join(parts),
+                    "ai_sections": sections,
+                    "data_summary": data_summary,
+                    "analysis_mode": mode,
+                    "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+                self._record_usage(result, usage)
+                yield {'event': 'done', 'result': result}
+                return
+            elif mode == 'map_reduce':
+                # 分片摘要阶段不流式，汇总阶段流式输出
+                prompt, chunk_count = self._map_reduce_prompt(ctx, data_summary, template, usage)
+                extra = {"analysis_mode": mode, "chunk_count": chunk_count}
+            else:
+                prompt = self._build_analysis_prompt(data_summary, template)
             
-            return {
-                "ai_analysis": response,
+            parts = []
+            for text in self._stream_deepseek_api(prompt, usage=usage, kind='reduce' if extra else 'analysis'):
+                parts.append(text)
+                yield {'event': 'token', 'text': text}
+            
+            result = {
+                "ai_analysis": ''.join(parts),
                 "data_summary": data_summary,
+                **extra,
                 "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-            
+            self._record_usage(result, usage)
+        except CircuitOpenError as e:
+            print(f"{e}，改用本地分析")
+            result = self._mock_ai_analysis(data)
         except Exception as e:
             print(f"AI分析失败: {e}")
-            return {"error": f"AI分析失败: {str(e)}"}
+            result = {"error": f"AI分析失败: {str(e)}"}
+            self._record_usage(result, usage)
+        
+        yield {'event': 'done', 'result': result}
+    
+    def _resolve_mode(self, mode: str = None, template: str = None) -> str:
+        """确定AI分析模式（自定义模板描述的是完整报告的要求，无法拆分到各维度，dimensions 模式下改为单次调用）"""
+        mode = mode or self.ai_mode
+        if mode == 'dimensions' and template:
+            print("⚠️ 自定义模板不支持分维度分析，改为单次调用")
+            return 'single'
+        return mode
+    
+    def _record_usage(self, result: Dict[str, Any], usage: UsageTracker) -> None:
+        """将本次分析的token用量附加到结果中，并写入用量日志"""
+        summary = usage.summary()
+        if not summary['calls']:
+            return
+        summary['analysis_id'] = uuid.uuid4().hex
+        result['token_usage'] = summary
+        if self.usage_log:
+            self.usage_log.record(summary['analysis_id'], summary['details'], self.config.DEEPSEEK_MODEL)
+    
+    def _iter_dimension_analysis(self, data_summary: Dict[str, Any], usage: UsageTracker = None) -> Iterator[tuple]:
+        """各分析维度同时发起请求，按维度顺序逐个产出 (维度键, 带标题的分析内容)"""
+        dimensions = self.ANALYSIS_DIMENSIONS
+        print(f"🧩 分维度分析: {len(dimensions)} 个维度并发请求")
+        with ThreadPoolExecutor(max_workers=len(dimensions)) as executor:
+            futures = [
+                executor.submit(
+                    self._call_deepseek_api,
+                    self._build_dimension_prompt(data_summary, index),
+                    self.config.AI_DIMENSION_MAX_TOKENS,
+                    usage=usage,
+                    kind='dimension'
+                )
+                for index in range(len(dimensions))
+            ]
+            for index, ((key, title, _), future) in enumerate(zip(dimensions, futures), 1):
+                yield key, f"### {index}. {title}\n\n{future.result().strip()}"
+    
+    def _format_note_lines(self, data: pd.DataFrame) -> pd.Series:
+        """将每条笔记格式化为一行文本（字段以 | 分隔）"""
+        ctx = AnalysisContext.of(data, self.approximate)
+        columns = [c for c in self.NOTE_COLUMNS if ctx.has(c)]
+        if not columns:
+            return pd.Series([], dtype=object)
+        
+        lines = ctx.column(columns[0]).fillna('').astype(str)
+        for column in columns[1:]:
+            lines = lines + ' | ' + ctx.column(column).fillna('').astype(str)
+        return lines
+    
+    def _split_into_chunks(self, lines: pd.Series, token_budget: int, max_chunks: int) -> List[str]:
+        """按token预算将笔记行切分为若干分片，超过分片上限时均匀抽样"""
+        if lines.empty:
+            return []
+        
+        tokens = estimate_tokens_series(lines) + 1  # 换行符
+        total = int(tokens.sum())
+        if total > token_budget * max_chunks:
+            step = math.ceil(total / (token_budget * max_chunks))
+            print(f"数据量超出分片上限，每 {step} 行抽样 1 行")
+            lines = lines.iloc[::step]
+            tokens = tokens.iloc[::step]
+        
+        chunk_ids = ((tokens.cumsum() - 1) // token_budget).to_numpy()
+        return ['\n'.join(group) for _, group in lines.groupby(chunk_ids, sort=True)]
+    
+    def _map_reduce_prompt(self, data: pd.DataFrame, data_summary: Dict[str, Any], template: str = None,
+                           usage: UsageTracker = None) -> tuple:
+        """
+        分片并发摘要（map），并构建汇总分析（reduce）的提示
+        :return: (汇总提示, 分片数)
+        """
+        ctx = AnalysisContext.of(data, self.approximate)
+        prompt = self._build_analysis_prompt(data_summary, template)
+        lines = self._format_note_lines(ctx)
+        chunks = self._split_into_chunks(lines, self.config.AI_CHUNK_TOKENS, self.config.AI_MAX_CHUNKS)
+        if not chunks:
+            return prompt, 0
+        
+        fields = ' | '.join(c for c in self.NOTE_COLUMNS if ctx.has(c))
+        total = len(chunks)
+        
+        def summarize(item):
+            index, chunk = item
+            prompt = f"字段：{fields}\n分片：{index}/{total}\n\n{chunk}"
+            return self._call_deepseek_api(
+                prompt, max_tokens=self.config.AI_MAP_MAX_TOKENS,
+                system_prompt=self.MAP_SYSTEM_PROMPT, usage=usage, kind='map'
+            )
+        
+        print(f"🧩 分片分析: {total} 个分片，并发数 {self.config.AI_MAX_CONCURRENCY}")
+        with ThreadPoolExecutor(max_workers=min(self.config.AI_MAX_CONCURRENCY, total)) as executor:
+            summaries = list(executor.map(summarize, enumerate(chunks, 1)))
+        
+        summaries = [s for s in summaries if not s.startswith(('API调用失败', 'API调用出错'))]
+        if not summaries:
+            raise Exception("所有分片摘要均调用失败")
+        
+        prompt += f"\n\n## 全量数据分片摘要\n以下是对全部 {total} 个数据分片的摘要，请综合这些摘要完成上述分析：\n"
+        for index, summary in enumerate(summaries, 1):
+            prompt += f"\n### 分片 {index}\n{summary}\n"
+        
+        return prompt, total
     
     def _prepare_data_summary(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """准备数据摘要"""
+        """准备数据摘要（聚合指标 + token预算内的代表性笔记）"""
+        ctx = AnalysisContext.of(data, self.approximate)
+        packed = PromptPacker().pack(ctx)
+        samples = packed['samples']
+        
         summary = {
-            "total_notes": len(data),
-            "columns": list(data.columns),
-            "sample_titles": [],
-            "sample_authors": []
+            "total_notes": len(ctx),
+            "columns": ctx.columns,
+            "sample_titles": [s['title'] for s in samples if 'title' in s],
+            "sample_authors": [s['author'] for s in samples if 'author' in s],
+            "aggregates": packed['aggregates'],
+            "data_overview": packed['text'],
+            "estimated_tokens": packed['estimated_tokens']
         }
         
-        if 'title' in data.columns:
-            summary["sample_titles"] = data['title'].head(5).tolist()
-        
-        if 'author' in data.columns:
-            summary["sample_authors"] = data['author'].head(5).tolist()
-        
         return summary
     
-    def _build_analysis_prompt(self, data_summary: Dict[str, Any], template: str = None) -> str:
-        """构建分析提示"""
-        base_prompt = f"""
-你是一个专业的小红书内容分析师，请对以下小红书笔记数据进行深度分析，并提供有价值的洞察和建议。
-
-## 数据概览
-- 总笔记数：{data_summary['total_notes']}
-- 数据字段：{', '.join(data_summary['columns'])}
-- 样本标题：{data_summary['sample_titles']}
-- 样本作者：{data_summary['sample_authors']}
-
-## 分析要求
-请从以下维度进行专业分析：
-
-### 1. 内容趋势分析
-- 热门话题和关键词识别
-- 内容类型分布
-- 标题特征分析
-- 内容风格总结
-
-### 2. 用户行为分析
-- 点赞数分布和规律
-- 热门作者特征
-- 用户偏好分析
-- 互动模式总结
-
-### 3. 市场洞察
-- 行业趋势判断
-- 用户需求分析
-- 内容机会识别
-- 竞争态势评估
-
-### 4. 策略建议
-- 内容创作建议
-- 运营策略推荐
-- 用户增长建议
-- 变现机会分析
+    def _format_dimensions(self, indexes: List[int]) -> str:
+        """格式化分析维度要求"""
+        blocks = []
+        for index in indexes:
+            _, title, points = self.ANALYSIS_DIMENSIONS[index]
+            lines = [f"### {index + 1}. {title}"] + [f"- {point}" for point in points]
+            blocks.append('\n'.join(lines))
+        return '\n\n'.join(blocks)
+    
+    def _build_system_prompt(self) -> str:
+        """
+        构建分析类请求共用的系统提示
+        只包含静态的角色、分析维度和回答要求，逐字节稳定，便于命中服务端的前缀缓存
+        """
+        return f"""你是一个专业的小红书内容分析师，擅长数据分析和市场洞察。你会收到小红书笔记数据，请进行深度分析，并提供有价值的洞察和建议。
 
-### 5. 风险提示
-- 潜在风险识别
-- 合规建议
-- 竞争风险分析
+## 分析维度
+{self._format_dimensions(range(len(self.ANALYSIS_DIMENSIONS)))}
 
+## 回答要求
 请用中文回答，分析要具体、实用、有数据支撑。如果数据不足，请说明并给出基于经验的建议。
 """
+    
+    def _format_data_section(self, data_summary: Dict[str, Any]) -> str:
+        """格式化数据概览（提示词中唯一随数据变化的部分，始终放在最后）"""
+        return f"""## 数据概览
+- 数据字段：{', '.join(data_summary['columns'])}
+{data_summary['data_overview']}"""
+    
+    def _build_analysis_prompt(self, data_summary: Dict[str, Any], template: str = None) -> str:
+        """构建分析提示（静态要求在前，数据在后）"""
+        base_prompt = f"""请从全部分析维度对以下数据进行专业分析。
+
+{self._format_data_section(data_summary)}"""
         
         if template:
             # 如果有自定义模板，使用模板
@@ -244,51 +549,132 @@ class DeepSeekAnalyzer:
         
         return base_prompt
     
-    def _call_deepseek_api(self, prompt: str) -> str:
-        """调用DeepSeek API"""
-        try:
-            import requests
-            
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
+    def _build_dimension_prompt(self, data_summary: Dict[str, Any], index: int) -> str:
+        """构建单个分析维度的提示"""
+        return f"""请只针对以下维度进行专业分析，直接输出分析内容，不要重复维度标题：
+
+{self._format_dimensions([index])}
+
+{self._format_data_section(data_summary)}"""
+    
+    def _build_messages(self, prompt: str, system_prompt: str = None) -> List[Dict[str, str]]:
+        """构建对话消息"""
+        return [
+            {
+                'role': 'system',
+                'content': system_prompt or self.system_prompt
+            },
+            {
+                'role': 'user',
+                'content': prompt
             }
+        ]
+    
+    def _llm_cache_key(self, messages: List[Dict[str, str]], max_tokens: int = None) -> str:
+        """LLM响应缓存键（未启用缓存时返回None）"""
+        if not self.llm_cache:
+            return None
+        return self.llm_cache.make_key(
+            self.config.DEEPSEEK_MODEL, self.config.TEMPERATURE,
+            max_tokens or self.config.MAX_TOKENS, messages
+        )
+    
+    def _call_deepseek_api(self, prompt: str, max_tokens: int = None, system_prompt: str = None,
+                           usage: UsageTracker = None, kind: str = 'analysis') -> str:
+        """
+        调用DeepSeek API
+        :param usage: 记录本次调用token用量和延迟的分析级记录器
+        :param kind: 调用类型（analysis / map / dimension / reduce）
+        """
+        try:
+            messages = self._build_messages(prompt, system_prompt)
+            max_tokens = max_tokens or self.config.MAX_TOKENS
             
-            data = {
-                'model': 'deepseek-chat',
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': '你是一个专业的小红书内容分析师，擅长数据分析和市场洞察。'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                'max_tokens': self.config.MAX_TOKENS,
-                'temperature': self.config.TEMPERATURE,
-                'stream': False
-            }
+            # 相同提示词直接返回缓存结果
+            cache_key = self._llm_cache_key(messages, max_tokens)
+            if cache_key:
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    print("⚡ 命中LLM响应缓存")
+                    if usage:
+                        usage.record(kind, local_cache_hit=True)
+                    return cached
             
-            response = requests.post(
-                f"{self.api_base}/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=60
+            start = time.perf_counter()
+            result = self.llm_client.chat(
+                messages,
+                model=self.config.DEEPSEEK_MODEL,
+                max_tokens=max_tokens,
+                temperature=self.config.TEMPERATURE
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
-            else:
-                print(f"API调用失败: {response.status_code} - {response.text}")
-                return f"API调用失败: {response.status_code}"
+            if usage:
+                usage.record(kind, result.get('usage'), time.perf_counter() - start)
+            content = result['choices'][0]['message']['content']
+            if cache_key:
+                self.llm_cache.put(cache_key, content, self.config.DEEPSEEK_MODEL, self.config.TEMPERATURE)
+            return content
                 
+        except LLMAPIError as e:
+            print(f"API调用失败: {e.status_code} - {e.text}")
+            return f"API调用失败: {e.status_code}"
+        except CircuitOpenError:
+            raise
         except Exception as e:
             print(f"调用DeepSeek API时出错: {e}")
             return f"API调用出错: {str(e)}"
     
+    def _stream_deepseek_api(self, prompt: str, usage: UsageTracker = None, kind: str = 'analysis') -> Iterator[str]:
+        """流式调用DeepSeek API，逐段返回生成的内容"""
+        messages = self._build_messages(prompt)
+        
+        cache_key = self._llm_cache_key(messages)
+        if cache_key:
+            cached = self.llm_cache.get(cache_key)
+            if cached is not None:
+                print("⚡ 命中LLM响应缓存")
+                if usage:
+                    usage.record(kind, local_cache_hit=True)
+                yield cached
+                return
+        
+        start = time.perf_counter()
+        lines = self.llm_client.stream_chat(
+            messages,
+            model=self.config.DEEPSEEK_MODEL,
+            max_tokens=self.config.MAX_TOKENS,
+            temperature=self.config.TEMPERATURE,
+            stream_options={'include_usage': True}
+        )
+        
+        try:
+            parts = []
+            stream_usage = None
+            for line in lines:
+                # SSE格式: "data: {...}"，以 "data: [DONE]" 结束
+                line = line.decode('utf-8').strip() if line else ''
+                if not line.startswith('data:'):
+                    continue
+                payload = line[len('data:'):].strip()
+                if payload == '[DONE]':
+                    break
+                
+                chunk = json.loads(payload)
+                # 最后一个数据块携带整次请求的usage
+                if chunk.get('usage'):
+                    stream_usage = chunk['usage']
+                choices = chunk.get('choices') or [{}]
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    parts.append(text)
+                    yield text
+            
+            if usage:
+                usage.record(kind, stream_usage, time.perf_counter() - start)
+            if cache_key and parts:
+                self.llm_cache.put(cache_key, ''.join(parts), self.config.DEEPSEEK_MODEL, self.config.TEMPERATURE)
+        finally:
+            lines.close()
+    
     def _mock_ai_analysis(self, data: pd.DataFrame) -> Dict[str, Any]:
         """模拟AI分析（当API不可用时使用）"""
         print("🎭 使用模拟AI分析...")
@@ -352,45 +738,108 @@ class DeepSeekAnalyzer:
         
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(analysis, f, ensure_ascii=False, indent=2)
+        record_file(filepath, columns=list(analysis))
         
         print(f"分析结果已保存到: {filepath}")
         return filepath
 
-    def generate_comprehensive_report(self, data: pd.DataFrame) -> Dict[str, Any]:
-        """生成综合分析报告"""
+    def generate_comprehensive_report(self, data: pd.DataFrame, ai_result: Dict[str, Any] = None) -> Dict[str, Any]:
+        """生成综合分析报告（ai_result 为已完成的AI分析结果时不再重复调用）"""
+        report = None
+        for event in self.iter_comprehensive_report(data, ai_result):
+            if event['event'] == 'done':
+                report = event['report']
+        return report
+    
+    def iter_comprehensive_report(self, data: pd.DataFrame, ai_result: Dict[str, Any] = None,
+                                  stream_ai: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        按任务图生成综合分析报告：
+            趋势 / 统计 / 图表（本地计算）  ─┐
+                                            ├─> 可执行建议 ─> 完整报告
+            AI深度分析（网络请求）          ─┘
+        AI分析与本地计算在不同线程中同时进行，总耗时约为二者中较长的一个。
+        依次产出：
+            {'event': 'partial', 'report': ...}  本地部分完成（ai_analysis 为 None）
+            {'event': 'token', 'text': ...}      stream_ai 为True时的AI生成内容
+            {'event': 'done', 'report': ...}     完整报告
+        """
         print("📊 生成综合分析报告...")
         
-        # 基础趋势分析
-        trends = self.analyze_trends(data)
+        # 共享分析上下文，各部分复用同一份派生数据
+        ctx = AnalysisContext.of(data, self.approximate)
+        events = queue.Queue()
         
-        # AI深度分析
-        ai_result = self.analyze_with_ai(data)
+        # AI请求在关键路径上：先在当前线程准备好提示数据再发起请求，
+        # 避免与本地计算争抢CPU，网络等待期间再完成本地部分
+        data_summary = None
+        if ai_result is None and not self.use_mock:
+            data_summary = self._prepare_data_summary(ctx)
         
-        # 数据统计
-        stats = self._calculate_statistics(data)
+        def run_local():
+            try:
+                events.put(('local', {
+                    "trends": self.analyze_trends(ctx),
+                    "statistics": self._calculate_statistics(ctx),
+                    "charts": self._prepare_chart_data(ctx)
+                }))
+            except Exception as e:
+                events.put(('error', e))
         
-        # 可视化数据
-        chart_data = self._prepare_chart_data(data)
+        def run_ai():
+            try:
+                if not stream_ai:
+                    events.put(('ai', self.analyze_with_ai(ctx, data_summary=data_summary)))
+                    return
+                for event in self.stream_analysis_with_ai(ctx, data_summary=data_summary):
+                    if event['event'] == 'token':
+                        events.put(('token', event['text']))
+                    else:
+                        events.put(('ai', event['result']))
+            except Exception as e:
+                events.put(('ai', {"error": f"AI分析失败: {str(e)}"}))
+        
+        workers = [threading.Thread(target=run_local, daemon=True)]
+        if ai_result is None:
+            workers.insert(0, threading.Thread(target=run_ai, daemon=True))
+        for worker in workers:
+            worker.start()
+        
+        local = None
+        while local is None or ai_result is None:
+            kind, payload = events.get()
+            if kind == 'error':
+                raise payload
+            if kind == 'token':
+                yield {'event': 'token', 'text': payload}
+            elif kind == 'ai':
+                ai_result = payload
+            else:
+                local = payload
+                if ai_result is None:
+                    yield {'event': 'partial', 'report': self._assemble_report(ctx, local, None)}
         
-        # 生成报告
-        report = {
+        yield {'event': 'done', 'report': self._assemble_report(ctx, local, ai_result)}
+    
+    def _assemble_report(self, ctx: AnalysisContext, local: Dict[str, Any], ai_result: Dict[str, Any] = None) -> Dict[str, Any]:
+        """由本地计算结果和AI分析结果组装报告（ai_result 为None表示AI分析尚未完成）"""
+        return {
             "summary": {
-                "total_notes": len(data),
+                "total_notes": len(ctx),
                 "analysis_time": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 "data_source": "小红书爬虫",
                 "analysis_version": "1.0.0"
             },
-            "trends": trends,
+            "trends": local["trends"],
             "ai_analysis": ai_result,
-            "statistics": stats,
-            "charts": chart_data,
-            "recommendations": self._generate_actionable_recommendations(data, trends, ai_result)
+            "statistics": local["statistics"],
+            "charts": local["charts"],
+            "recommendations": self._generate_actionable_recommendations(ctx, local["trends"], ai_result or {})
         }
-        
-        return report
 
     def _calculate_statistics(self, data: pd.DataFrame) -> Dict[str, Any]:
         """计算详细统计数据"""
+        ctx = AnalysisContext.of(data, self.approximate)
         stats = {
             "basic_stats": {},
             "engagement_stats": {},
@@ -400,90 +849,81 @@ class DeepSeekAnalyzer:
         
         # 基础统计
         stats["basic_stats"] = {
-            "total_notes": len(data),
-            "unique_authors": data['author'].nunique() if 'author' in data.columns else 0,
-            "date_range": self._get_date_range(data) if 'publish_time' in data.columns else "未知"
+            "total_notes": len(ctx),
+            "unique_authors": ctx.unique_authors if ctx.has('author') else 0,
+            "date_range": self._get_date_range(ctx) if ctx.has('publish_time') else "未知"
         }
         
         # 互动统计
-        if 'likes' in data.columns:
+        if ctx.has('likes'):
             try:
-                likes_data = data['likes'].astype(str).str.extract('(\d+)')[0].astype(float)
+                summary = ctx.likes_summary
+                quantiles = ctx.likes_quantiles
                 stats["engagement_stats"] = {
-                    "avg_likes": likes_data.mean(),
-                    "median_likes": likes_data.median(),
-                    "max_likes": likes_data.max(),
-                    "min_likes": likes_data.min(),
-                    "total_likes": likes_data.sum(),
-                    "likes_distribution": {
-                        "high": len(likes_data[likes_data > likes_data.quantile(0.8)]),
-                        "medium": len(likes_data[(likes_data > likes_data.quantile(0.2)) & (likes_data <= likes_data.quantile(0.8))]),
-                        "low": len(likes_data[likes_data <= likes_data.quantile(0.2)])
-                    }
+                    "avg_likes": summary["avg_likes"],
+                    "median_likes": quantiles[0.5],
+                    "max_likes": summary["max_likes"],
+                    "min_likes": summary["min_likes"],
+                    "total_likes": summary["total_likes"],
+                    "likes_distribution": dict(ctx.likes_tiers)
                 }
             except:
                 stats["engagement_stats"] = {"error": "无法解析点赞数据"}
         
         # 作者统计
-        if 'author' in data.columns:
-            author_counts = data['author'].value_counts()
+        if ctx.has('author'):
             stats["author_stats"] = {
-                "top_authors": author_counts.head(10).to_dict(),
-                "author_distribution": {
-                    "single_post": len(author_counts[author_counts == 1]),
-                    "multiple_posts": len(author_counts[author_counts > 1])
-                }
+                "top_authors": ctx.author_counts.head(10).to_dict(),
+                "author_distribution": ctx.author_distribution
             }
         
         # 内容统计
-        if 'title' in data.columns:
-            title_lengths = data['title'].str.len()
+        if ctx.has('title'):
+            lengths = ctx.title_length_histogram([0, 10, 30, float('inf')], ['short', 'medium', 'long'])
             stats["content_stats"] = {
-                "avg_title_length": title_lengths.mean(),
-                "title_length_distribution": {
-                    "short": len(title_lengths[title_lengths <= 10]),
-                    "medium": len(title_lengths[(title_lengths > 10) & (title_lengths <= 30)]),
-                    "long": len(title_lengths[title_lengths > 30])
-                }
+                "avg_title_length": ctx.title_length_mean,
+                "title_length_distribution": {label: int(count) for label, count in lengths.items()}
             }
         
+        # 近似模式下附上分位数和作者数的误差范围
+        if ctx.approximate:
+            stats["approximation"] = ctx.error_bounds
+        
         return stats
 
     def _get_date_range(self, data: pd.DataFrame) -> str:
         """获取数据的时间范围"""
+        ctx = AnalysisContext.of(data, self.approximate)
         try:
-            # 尝试解析发布时间
-            dates = pd.to_datetime(data['publish_time'], errors='coerce')
-            valid_dates = dates.dropna()
-            if len(valid_dates) > 0:
-                start_date = valid_dates.min().strftime('%Y-%m-%d')
-                end_date = valid_dates.max().strftime('%Y-%m-%d')
-                return f"{start_date} 至 {end_date}"
+            # 发布时间支持 "3天前"、"昨天 12:30"、"08-15" 等形式
+            date_range = ctx.date_range
+            if date_range:
+                start_date, end_date = date_range
+                return f"{start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}"
         except:
             pass
         return "时间范围未知"
 
     def _prepare_chart_data(self, data: pd.DataFrame) -> Dict[str, Any]:
         """准备图表数据"""
+        ctx = AnalysisContext.of(data, self.approximate)
         chart_data = {}
         
         # 作者分布图
-        if 'author' in data.columns:
-            author_counts = data['author'].value_counts().head(10)
+        if ctx.has('author'):
+            author_counts = ctx.author_counts.head(10)
             chart_data["author_distribution"] = {
                 "labels": author_counts.index.tolist(),
                 "data": author_counts.values.tolist()
             }
         
         # 点赞数分布图
-        if 'likes' in data.columns:
+        if ctx.has('likes'):
             try:
-                likes_data = data['likes'].astype(str).str.extract('(\d+)')[0].astype(float)
                 # 创建点赞数区间
                 bins = [0, 100, 500, 1000, 5000, float('inf')]
                 labels = ['0-100', '101-500', '501-1000', '1001-5000', '5000+']
-                likes_binned = pd.cut(likes_data, bins=bins, labels=labels, include_lowest=True)
-                likes_dist = likes_binned.value_counts()
+                likes_dist = ctx.likes_histogram(bins, labels).sort_values(ascending=False, kind='stable')
                 chart_data["likes_distribution"] = {
                     "labels": likes_dist.index.tolist(),
                     "data": likes_dist.values.tolist()
@@ -492,12 +932,10 @@ class DeepSeekAnalyzer:
                 pass
         
         # 标题长度分布
-        if 'title' in data.columns:
-            title_lengths = data['title'].str.len()
+        if ctx.has('title'):
             bins = [0, 10, 20, 30, 50, float('inf')]
             labels = ['0-10', '11-20', '21-30', '31-50', '50+']
-            length_binned = pd.cut(title_lengths, bins=bins, labels=labels, include_lowest=True)
-            length_dist = length_binned.value_counts()
+            length_dist = ctx.title_length_histogram(bins, labels).sort_values(ascending=False, kind='stable')
             chart_data["title_length_distribution"] = {
                 "labels": length_dist.index.tolist(),
                 "data": length_dist.values.tolist()
@@ -0,0 +1,370 @@
+import os
+import sys
+import json
+import glob
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.storage import EXTENSION_FORMATS, iter_dataset
+
+
+class KeywordExtractor:
+    """
+    中文关键词提取
+    标题没有空格分词，按连续的中文/英文数字片段切分后统计字符n-gram（中文）和单词（英文），
+    过滤停用词后以历史爬取数据为背景语料计算TF-IDF，并对被更长词覆盖的片段去重。
+    全部统计基于pandas向量化运算（按位置切片 + 分组计数），先对重复标题去重加权，耗时随行数线性增长。
+    结果按标题内容指纹缓存在磁盘上，支持TTL过期和LRU淘汰，源文件已删除或改写的背景语料统计随之清理
+    """
+
+    # 中文片段和英文/数字单词（先统一转小写）
+    TOKEN_PATTERN = '[\u4e00-\u9fff]+|[a-z][a-z0-9]+'
+    CJK_START = '[\u4e00-\u9fff]'
+    # 虚词：包含它们的n-gram大多是跨词切分的片段（如"好吃的"、"的小店"）
+    STOP_CHARS = set('的了是在和与及或也都就还很太更最吗呢吧啊呀哦哈嘛么着过被把让给对从向跟这那我你他她它们')
+    STOPWORDS = {
+        '一个', '一些', '一下', '一样', '什么', '怎么', '为什么', '这个', '那个', '这些', '那些', '这样', '那样',
+        '自己', '我们', '你们', '他们', '大家', '真的', '就是', '还是', '可以', '没有', '不是', '已经', '因为',
+        '所以', '但是', '如果', '而且', '然后', '以及', '一定', '非常', '特别', '其实', '还有', '只是', '今天',
+        'the', 'and', 'for', 'with', 'you', 'are', 'this', 'that'
+    }
+    # 较短片段被较长片段覆盖的比例阈值（如"探店"几乎只出现在"美食探店"中时只保留后者）
+    SUBSUME_RATIO = 0.8
+
+    def __init__(self, cache_dir: str = None, background_dir: str = None):
+        self.config = Config()
+        self.cache_dir = cache_dir or self.config.KEYWORD_CACHE_DIR
+        self.background_dir = background_dir or self.config.DATA_DIR
+        self.ngram_range = (self.config.KEYWORD_NGRAM_MIN, self.config.KEYWORD_NGRAM_MAX)
+        self._background_memo = OrderedDict()  # 签名 -> 合并后的背景语料（LRU，条数有上限）
+        self._file_memo = {}
+        self._swept_keys = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self, titles: pd.Series, hasher=None) -> str:
+        """
+        标题内容指纹（向量化哈希）
+        逐元素哈希与位置无关，分块读取时传入同一个 hasher 依次更新，结果与整体计算一致
+        """
+        hasher = hasher or hashlib.sha256()
+        hashed = pd.util.hash_pandas_object(titles.astype(str).reset_index(drop=True), index=False)
+        hasher.update(hashed.to_numpy().tobytes())
+        return hasher.hexdigest()
+
+    def term_stats(self, titles) -> Tuple[int, pd.Series, pd.Series]:
+        """
+        统计词频和文档频率
+        :return: (标题数, 词频, 包含该词的标题数)，词频和文档频率均以词为索引
+        """
+        titles = pd.Series(titles).dropna().astype(str)
+        empty = pd.Series(dtype='int64')
+        if titles.empty:
+            return 0, empty, empty
+
+        # 重复标题只处理一次，以出现次数作为权重
+        unique = titles.str.lower().value_counts()
+        runs = pd.Series(unique.index, dtype=object).str.findall(self.TOKEN_PATTERN).explode().dropna()
+        if runs.empty:
+            return len(titles), empty, empty
+        docs = runs.index.to_numpy()
+        weights = unique.to_numpy()[docs]
+        runs = runs.astype(str).reset_index(drop=True)
+        lengths = runs.str.len().to_numpy()
+        is_cjk = runs.str.match(self.CJK_START).to_numpy()
+
+        frames = [pd.DataFrame({
+            'doc': docs[~is_cjk], 'gram': runs[~is_cjk].to_numpy(), 'weight': weights[~is_cjk]
+        })]
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            # 第i个位置起长度为n的片段，对所有片段同时切片
+            for i in range(int(lengths.max()) - n + 1):
+                mask = is_cjk & (lengths >= i + n)
+                if not mask.any():
+                    break
+                frames.append(pd.DataFrame({
+                    'doc': docs[mask],
+                    'gram': runs[mask].str.slice(i, i + n).to_numpy(),
+                    'weight': weights[mask]
+                }))
+
+        grams = pd.concat(frames, ignore_index=True)
+        grams = grams[self._valid(grams['gram'])]
+        tf = grams.groupby('gram', sort=False)['weight'].sum()
+        df = grams.drop_duplicates(['doc', 'gram']).groupby('gram', sort=False)['weight'].sum()
+        return len(titles), tf, df
+
+    @staticmethod
+    def merge_term_stats(left: tuple, right: tuple, vocab: int = None) -> Tuple[int, pd.Series, pd.Series]:
+        """
+        合并两份 term_stats 结果（各分块的标题互不重叠，词频和文档频率可直接相加）
+        :param vocab: 合并后只保留词频最高的若干词条，避免词表随数据量无限增长
+        """
+        total = left[0] + right[0]
+        tf = left[1].add(right[1], fill_value=0).astype('int64')
+        df = left[2].add(right[2], fill_value=0).astype('int64')
+        if vocab and len(tf) > vocab:
+            tf = tf.nlargest(vocab)
+            df = df.reindex(tf.index, fill_value=0)
+        return total, tf, df
+
+    def _valid(self, grams: pd.Series) -> np.ndarray:
+        """过滤停用词以及包含虚词的片段"""
+        stop_chars = '[' + ''.join(sorted(self.STOP_CHARS)) + ']'
+        has_stop = grams.str.contains(stop_chars, regex=True)
+        return (~has_stop & ~grams.isin(self.STOPWORDS) & (grams.str.len() >= 2)).to_numpy()
+
+    def extract(self, titles, top_n: int = 20) -> List[Dict[str, Any]]:
+        """
+        提取关键词
+        :return: [{'keyword': 词, 'frequency': 出现次数, 'score': TF-IDF得分}, ...]
+        """
+        titles = pd.Series(titles).dropna().astype(str)
+        if titles.empty:
+            return []
+
+        fingerprint = self.fingerprint(titles)
+        background = self._background(exclude=fingerprint)
+        cache_path = os.path.join(
+            self.cache_dir, f"{fingerprint[:32]}_{background['signature'][:16]}_{top_n}.json"
+        )
+        cached = self._read_json(cache_path)
+        if cached is not None:
+            return cached
+
+        result = self.rank(self.term_stats(titles), top_n, background)
+        self._write_json(cache_path, result)
+        self.evict()
+        return result
+
+    def rank(self, stats: tuple, top_n: int = 20, background: Dict[str, Any] = None,
+             exclude: str = None) -> List[Dict[str, Any]]:
+        """
+        由 term_stats 结果计算关键词（分块分析时传入合并后的统计）
+        :param exclude: 当前数据集的指纹或文件键，背景语料中不计入该数据集
+        """
+        total, tf, df = stats
+        # 只出现一次的片段大多是切分噪声，有重复出现的词时忽略它们
+        if (tf >= 2).any():
+            tf = tf[tf >= 2]
+        if tf.empty:
+            return []
+
+        # IDF以历史数据为背景语料（加上当前数据），平滑避免除零
+        background = background or self._background(exclude=exclude)
+        bg_df = background['df'].reindex(df.index, fill_value=0)
+        idf = np.log((background['docs'] + total + 1) / (bg_df + df + 1)) + 1
+        scores = (tf * idf.reindex(tf.index)).sort_values(ascending=False)
+
+        keywords = self._dedupe(scores.head(top_n * 10), tf)[:top_n]
+        return [
+            {'keyword': gram, 'frequency': int(tf[gram]), 'score': round(float(scores[gram]), 4)}
+            for gram in keywords
+        ]
+
+    def _dedupe(self, scores: pd.Series, tf: pd.Series) -> List[str]:
+        """去掉几乎只作为更长关键词一部分出现的片段"""
+        candidates = list(scores.index)
+        kept = []
+        for gram in candidates:
+            count = tf[gram]
+            subsumed = any(
+                len(other) > len(gram) and gram in other and tf[other] >= count * self.SUBSUME_RATIO
+                for other in candidates
+            )
+            if not subsumed:
+                kept.append(gram)
+        return kept
+
+    def _background(self, exclude: str = None) -> Dict[str, Any]:
+        """合并历史数据文件的文档频率作为背景语料（exclude 为当前数据集的指纹或文件键）"""
+        files = self._background_files()
+        live_keys = set()
+        entries = []
+        for path in files:
+            try:
+                live_keys.add(self.file_key(path))
+            except OSError:
+                continue
+            entry = self._file_stats(path)
+            if entry and exclude not in (entry['fingerprint'], entry['key']):
+                entries.append(entry)
+
+        # 历史数据文件有增删或改写时清理不再使用的背景统计
+        if live_keys != self._swept_keys:
+            self._swept_keys = live_keys
+            self.evict(live_keys)
+
+        signature = hashlib.sha256(
+            '|'.join(sorted(e['key'] for e in entries)).encode('utf-8')
+        ).hexdigest()
+        with self._lock:
+            if signature in self._background_memo:
+                self._background_memo.move_to_end(signature)
+                return self._background_memo[signature]
+
+        if entries:
+            merged = pd.concat([pd.Series(e['df'], dtype='int64') for e in entries])
+            df = merged.groupby(level=0).sum()
+        else:
+            df = pd.Series(dtype='int64')
+        background = {
+            'signature': signature,
+            'docs': sum(e['docs'] for e in entries),
+            'df': df,
+            'keys': frozenset(e['key'] for e in entries)
+        }
+        with self._lock:
+            self._background_memo[signature] = background
+            # 每个新的历史数据文件都会产生新签名，只保留最近使用的几份合并结果
+            while len(self._background_memo) > self.config.KEYWORD_BACKGROUND_MEMO_SIZE:
+                self._background_memo.popitem(last=False)
+        return background
+
+    def _background_files(self) -> List[str]:
+        """参与背景语料的历史数据文件（最近修改的若干个）"""
+        files = sorted(
+            (path for extension in EXTENSION_FORMATS for path in glob.glob(os.path.join(self.background_dir, f'*{extension}'))),
+            key=os.path.getmtime, reverse=True
+        )
+        return files[:self.config.KEYWORD_BACKGROUND_MAX_FILES]
+
+    def background_signature(self) -> str:
+        """背景语料的签名（历史数据文件增删或改写后变化，用于分析结果的缓存键）"""
+        keys = []
+        for path in self._background_files():
+            try:
+                keys.append(self.file_key(path))
+            except OSError:
+                continue
+        return hashlib.sha256('|'.join(sorted(keys)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        """数据文件的键（路径、大小和修改时间）"""
+        stat = os.stat(path)
+        return hashlib.sha256(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')).hexdigest()
+
+    def _file_stats(self, path: str) -> Optional[Dict[str, Any]]:
+        """单个历史数据文件的文档频率（按路径、大小和修改时间缓存）"""
+        key = self.file_key(path)
+        with self._lock:
+            if key in self._file_memo:
+                return self._file_memo[key]
+        cache_path = os.path.join(self.cache_dir, f"background_{key[:32]}.json")
+        entry = self._read_json(cache_path)
+        if entry is None:
+            entry = self._compute_file_stats(path, key)
+            if entry:
+                self._write_json(cache_path, entry)
+        with self._lock:
+            self._file_memo[key] = entry
+        return entry
+
+    def _compute_file_stats(self, path: str, key: str) -> Optional[Dict[str, Any]]:
+        """分块读取数据文件的标题列并统计文档频率"""
+        vocab = self.config.KEYWORD_BACKGROUND_VOCAB
+        hasher = hashlib.sha256()
+        stats = (0, pd.Series(dtype='int64'), pd.Series(dtype='int64'))
+        try:
+            for chunk in iter_dataset(path, ['title'], dtype={'title': 'str'}):
+                titles = chunk['title'].dropna().astype(str)
+                self.fingerprint(titles, hasher)
+                stats = self.merge_term_stats(stats, self.term_stats(titles), vocab * 5)
+        except (KeyError, ValueError, OSError, pd.errors.ParserError):
+            # 没有标题列的文件不参与背景语料
+            return None
+        total, _, df = stats
+        df = df.sort_values(ascending=False).head(vocab)
+        return {
+            'key': key,
+            'fingerprint': hasher.hexdigest(),
+            'docs': total,
+            'df': {gram: int(count) for gram, count in df.items()}
+        }
+
+    def evict(self, live_keys: set = None) -> int:
+        """
+        清理关键词缓存：删除过期条目，并按最近访问时间淘汰超出条目数/总大小限制的条目
+        :param live_keys: 当前历史数据文件的键，给出时同时删除其余文件（已删除或已改写）的背景统计
+        """
+        if not os.path.exists(self.cache_dir):
+            return 0
+
+        live_prefixes = {key[:32] for key in live_keys} if live_keys is not None else None
+        if live_keys is not None:
+            with self._lock:
+                for key in [key for key in self._file_memo if key not in live_keys]:
+                    del self._file_memo[key]
+                # 包含已删除或已改写文件的背景语料不会再被使用
+                for signature in [s for s, b in self._background_memo.items() if not b['keys'] <= live_keys]:
+                    del self._background_memo[signature]
+
+        ttl = self.config.KEYWORD_CACHE_TTL
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            if (live_prefixes is not None and name.startswith('background_')
+                    and name[len('background_'):-len('.json')] not in live_prefixes):
+                removed += self._remove(path)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # 修改时间即最近访问时间
+            if ttl and now - stat.st_mtime > ttl:
+                removed += self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.config.KEYWORD_CACHE_MAX_ENTRIES
+                           or total_bytes > self.config.KEYWORD_CACHE_MAX_BYTES):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            removed += self._remove(path)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def _read_json(self, path: str):
+        try:
+            with open(path, 'r', encoding=self.config.JSON_ENCODING) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 用修改时间记录最近访问，供LRU淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return payload
+
+    def _write_json(self, path: str, payload) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding=self.config.JSON_ENCODING) as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入关键词缓存失败: {e}")
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+class LLMResponseCache:
+    """
+    大模型响应缓存
+    以 (模型, 温度, 最大token数, 完整消息) 的哈希为键，将补全结果保存在SQLite中。
+    使用WAL模式，可在多个Flask worker和命令行进程间安全共享
+    """
+
+    def __init__(self, db_path: str = None, ttl: int = None,
+                 max_entries: int = None, max_bytes: int = None):
+        self.config = Config()
+        self.db_path = db_path or self.config.LLM_CACHE_PATH
+        self.ttl = self.config.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = self.config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = self.config.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """每次操作使用独立连接，避免跨线程共享"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    temperature REAL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+            conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.commit()
+            self._initialized = True
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int,
+                 messages: List[Dict[str, str]]) -> str:
+        """生成缓存键"""
+        raw = json.dumps({
+            'model': model,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'messages': messages
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            'INSERT INTO stats(name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,)
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的补全结果，不存在或已过期返回None"""
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                row = conn.execute(
+                    'SELECT response, created_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row and self.ttl and now - row[1] > self.ttl:
+                    conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    row = None
+                if row:
+                    conn.execute(
+                        'UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?',
+                        (now, key)
+                    )
+                    self._count(conn, 'hits')
+                else:
+                    self._count(conn, 'misses')
+                conn.commit()
+                return row[0] if row else None
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"读取LLM缓存失败: {e}")
+            return None
+
+    def put(self, key: str, response: str, model: str = None, temperature: float = None) -> None:
+        """写入补全结果并执行淘汰"""
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses'
+                    '(key, model, temperature, response, size, created_at, last_access, hits) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                    (key, model, temperature, response, len(response.encode('utf-8')), now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"写入LLM缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """清理过期条目，按最近访问时间淘汰超出条目数或总大小限制的条目"""
+        if self.ttl:
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,))
+        conn.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+        conn.execute(
+            'DELETE FROM responses WHERE key IN ('
+            'SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running '
+            'FROM responses) WHERE running > ?)',
+            (self.max_bytes,)
+        )
+
+    def clear(self) -> None:
+        """清空缓存和统计"""
+        try:
+            conn = self._connect()
+            try:
+                conn.execute('DELETE FROM responses')
+                conn.execute('DELETE FROM stats')
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"清空LLM缓存失败: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计（跨进程累计）"""
+        try:
+            conn = self._connect()
+            try:
+                counters = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+                entries, total_bytes = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return {'error': f'读取LLM缓存统计失败: {e}'}
+
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+            'entries': entries,
+            'size_bytes': total_bytes
+        }
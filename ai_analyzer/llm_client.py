@@ -0,0 +1,279 @@
+import os
+import sys
+import time
+import random
+import threading
+from collections import deque
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+class LLMAPIError(Exception):
+    """API返回非200状态码"""
+
+    def __init__(self, status_code: int, text: str = ''):
+        super().__init__(f"API调用失败: {status_code}")
+        self.status_code = status_code
+        self.text = text
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开，API暂不可用"""
+
+
+class CircuitBreaker:
+    """
+    简单熔断器
+    连续失败达到阈值后打开，冷却时间过后放行一次探测请求（半开），
+    探测成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self) -> bool:
+        """是否允许发起请求"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class DeepSeekClient:
+    """
+    DeepSeek API客户端
+    复用连接池（keep-alive），区分连接/读取超时，
+    对429/5xx进行带抖动的指数退避重试（遵循Retry-After），并带熔断保护。
+    线程安全，可在多个请求间共享；limiter 为跨进程共享的信号量时，同时进行的请求总数受其限制
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_base: str = None, api_key: str = None):
+        self.config = Config()
+        self.api_base = (api_base or self.config.DEEPSEEK_API_BASE).rstrip('/')
+        self.api_key = api_key if api_key is not None else self.config.DEEPSEEK_API_KEY
+        self.connect_timeout = self.config.LLM_CONNECT_TIMEOUT
+        self.read_timeout = self.config.LLM_READ_TIMEOUT
+        self.max_retries = self.config.LLM_MAX_RETRIES
+        self.backoff_base = self.config.LLM_BACKOFF_BASE
+        self.backoff_max = self.config.LLM_BACKOFF_MAX
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config.LLM_POOL_SIZE,
+            pool_block=True
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.breaker = CircuitBreaker(
+            self.config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            self.config.LLM_CIRCUIT_RESET_TIMEOUT
+        )
+
+        self.limiter = None  # 可选的并发限制（如批量分析各进程共享的信号量），含重试等待
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._calls = deque(maxlen=100)
+        self._counters = {'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0}
+
+    @property
+    def url(self) -> str:
+        return f"{self.api_base}/v1/chat/completions"
+
+    def _headers(self, stream: bool = False) -> Dict[str, str]:
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        if stream:
+            headers['Accept'] = 'text/event-stream'
+        return headers
+
+    def _retry_delay(self, attempt: int, response: requests.Response = None) -> float:
+        """计算重试等待时间：优先使用Retry-After，否则为带完全抖动的指数退避"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                        return min(max(delay, 0), self.backoff_max)
+                    except (TypeError, ValueError):
+                        pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, latency: float, status: Any, attempts: int, error: bool) -> None:
+        with self._lock:
+            self._counters['calls'] += 1
+            self._counters['retries'] += attempts - 1
+            if error:
+                self._counters['errors'] += 1
+            self._latencies.append(latency)
+            self._calls.append({
+                'time': time.time(),
+                'latency': round(latency, 4),
+                'status': status,
+                'attempts': attempts
+            })
+
+    def _check_circuit(self) -> None:
+        if not self.breaker.allow():
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise CircuitOpenError("DeepSeek API熔断中，暂停调用")
+
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """发送请求，失败时重试；返回状态码为200的响应"""
+        self._check_circuit()
+        with self.limiter or nullcontext():
+            start = time.perf_counter()
+            response, attempts = self._post_with_retries(payload, False, start)
+            self.breaker.record_success()
+            self._record(time.perf_counter() - start, 200, attempts, False)
+            return response
+
+    def _post_with_retries(self, payload: Dict[str, Any], stream: bool,
+                           start: float) -> Tuple[requests.Response, int]:
+        """
+        发送请求并按需重试，返回状态码为200的响应和尝试次数
+        失败在这里计入熔断和错误统计；成功由调用方在响应读取完毕后记录（流式响应可能中途断开）
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            response = None
+            try:
+                response = self.session.post(
+                    self.url,
+                    headers=self._headers(stream),
+                    json=payload,
+                    stream=stream,
+                    timeout=(self.connect_timeout, self.read_timeout)
+                )
+                if response.status_code == 200:
+                    return response, attempt
+                if response.status_code not in self.RETRY_STATUS or attempt > self.max_retries:
+                    # 4xx（429除外）属于请求本身的问题，说明服务可达，不计入熔断
+                    if response.status_code in self.RETRY_STATUS:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    self._record(time.perf_counter() - start, response.status_code, attempt, True)
+                    error = LLMAPIError(response.status_code, response.text)
+                    response.close()
+                    raise error
+                print(f"API返回 {response.status_code}，准备重试（第 {attempt} 次）")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > self.max_retries:
+                    self.breaker.record_failure()
+                    self._record(time.perf_counter() - start, type(e).__name__, attempt, True)
+                    raise
+                print(f"API请求异常: {e}，准备重试（第 {attempt} 次）")
+            except requests.RequestException as e:
+                self.breaker.record_failure()
+                self._record(time.perf_counter() - start, type(e).__name__, attempt, True)
+                raise
+
+            delay = self._retry_delay(attempt - 1, response)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def chat(self, messages: List[Dict[str, str]], **params) -> Dict[str, Any]:
+        """非流式对话补全，返回完整的响应JSON"""
+        payload = dict(params, messages=messages, stream=False)
+        response = self._post(payload)
+        try:
+            return response.json()
+        finally:
+            response.close()
+
+    def stream_chat(self, messages: List[Dict[str, str]], **params) -> Iterator[bytes]:
+        """
+        流式对话补全，逐行返回SSE响应（生成器，首次迭代时发出请求）
+        并发限制一直占用到响应读取完毕或生成器被关闭，调用方提前结束时应调用 close()
+        """
+        payload = dict(params, messages=messages, stream=True)
+        self._check_circuit()
+        with self.limiter or nullcontext():
+            start = time.perf_counter()
+            response, attempts = self._post_with_retries(payload, True, start)
+            failed = False
+            try:
+                yield from response.iter_lines()
+            except requests.RequestException as e:
+                # 响应头返回200后流中途断开（读取超时、分块传输中断）同样计入熔断和错误统计
+                failed = True
+                self.breaker.record_failure()
+                self._record(time.perf_counter() - start, type(e).__name__, attempts, True)
+                raise
+            finally:
+                response.close()
+                if not failed:
+                    self.breaker.record_success()
+                    self._record(time.perf_counter() - start, 200, attempts, False)
+
+    def metrics(self) -> Dict[str, Any]:
+        """调用延迟和错误统计"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+            recent = list(self._calls)[-10:]
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+            return round(latencies[index], 4)
+
+        return dict(
+            counters,
+            circuit_state=self.breaker.state,
+            latency_avg=round(sum(latencies) / len(latencies), 4) if latencies else None,
+            latency_p50=percentile(0.5),
+            latency_p95=percentile(0.95),
+            latency_p99=percentile(0.99),
+            recent_calls=recent
+        )
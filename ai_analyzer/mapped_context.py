@@ -0,0 +1,58 @@
+import os
+import sys
+import pandas as pd
+from functools import cached_property
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ai_analyzer.analysis_context import AnalysisContext
+from crawler.storage import open_mapped
+
+
+class MappedAnalysisContext(AnalysisContext):
+    """
+    内存映射的Arrow数据集分析上下文
+    数据留在映射的文件中（同一文件的各次分析共享同一个映射），
+    报告部分第一次读取某个字段时才把该字段转换为pandas列并缓存，用不到的字段（链接、图片等）不会被加载。
+    只有需要完整DataFrame的地方（data 属性）才转换全部字段
+    """
+
+    def __init__(self, table, source: str = None, approximate: bool = False):
+        self.table = table
+        self.source = source
+        self.approximate = approximate
+        self._columns = {}
+
+    @classmethod
+    def open(cls, path: str, columns: List[str] = None, approximate: bool = False) -> 'MappedAnalysisContext':
+        """内存映射打开Arrow数据文件（columns 指定时只保留这些字段）"""
+        table = open_mapped(path)
+        if columns is not None:
+            table = table.select([c for c in columns if c in table.column_names])
+        return cls(table, source=path, approximate=approximate)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def empty(self) -> bool:
+        return self.table.num_rows == 0 or self.table.num_columns == 0
+
+    def has(self, column: str) -> bool:
+        return column in self.table.column_names
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.table.column_names)
+
+    def column(self, name: str) -> pd.Series:
+        if name not in self._columns:
+            self._columns[name] = self.table.column(name).to_pandas().rename(name)
+        return self._columns[name]
+
+    def frame(self, columns: List[str]) -> pd.DataFrame:
+        return pd.DataFrame({name: self.column(name) for name in columns})
+
+    @cached_property
+    def data(self) -> pd.DataFrame:
+        return self.frame(self.columns)
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from ai_analyzer.publish_time import parse_publish_time
+from crawler.dataset_cache import DatasetCache
+from crawler.storage import parse_crawl_file_name, read_dataset
+from crawler.warehouse import note_keys
+
+# 合并时使用的辅助字段（去重后删除）
+NOTE_KEY_COLUMN = '_note_key'
+SNAPSHOT_COLUMN = '_snapshot_at'
+
+# 读取线程池（进程内共享，首次使用时创建）
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """
+    共享的读取线程池
+    Web服务在请求线程中调用，同时还有任务、归档等后台线程，fork子进程可能死锁，因此使用线程：
+    pandas的C解析器和pyarrow读取时释放GIL，多个文件仍可并行解析；线程池长期保留，避免每次请求的启动开销
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=Config.ANALYSIS_LOAD_WORKERS, thread_name_prefix='load-merged')
+        return _pool
+
+
+def load_snapshot(path: str, dataset_cache: DatasetCache = None) -> pd.DataFrame:
+    """
+    读取一个数据文件并整理为可合并的快照
+    解析发布时间、笔记ID和每行的爬取时间；行内没有爬取时间时取文件名中的爬取时间，再没有则取文件修改时间
+    :param dataset_cache: 给出时通过进程内数据集缓存读取文件
+    """
+    df = dataset_cache.load(path) if dataset_cache else read_dataset(path)
+    info = parse_crawl_file_name(path)
+    fallback = pd.Timestamp(info['crawled_at']) if info else pd.Timestamp(os.path.getmtime(path), unit='s')
+
+    if 'crawl_time' in df.columns:
+        crawl_time = df['crawl_time']
+        if not pd.api.types.is_datetime64_any_dtype(crawl_time):
+            crawl_time = pd.to_datetime(crawl_time, format=Config.CRAWL_TIME_FORMAT, errors='coerce')
+        snapshot = crawl_time.astype('datetime64[ns]').fillna(fallback)
+    else:
+        snapshot = pd.Series(fallback, index=df.index, dtype='datetime64[ns]')
+
+    if 'publish_time' in df.columns:
+        df['publish_at'] = parse_publish_time(df['publish_time'], snapshot)
+    df[NOTE_KEY_COLUMN] = note_keys(df)
+    df[SNAPSHOT_COLUMN] = snapshot
+    return df
+
+
+def load_merged(paths: List[str], workers: int = None, dataset_cache: DatasetCache = None) -> pd.DataFrame:
+    """
+    并行读取多个数据文件并按笔记ID去重
+    各文件由共享线程池并行解析（设置了 dataset_cache 时已缓存的文件直接从内存返回），
+    同一笔记出现在多次爬取中时保留爬取时间最晚的一行（即最新的点赞快照），其余按原顺序保留
+    :return: 合并后的数据，attrs 中记录来源文件和去除的重复行数
+    """
+    workers = min(workers or Config.ANALYSIS_LOAD_WORKERS, len(paths))
+    if workers > 1:
+        pool = _get_pool()
+        frames = list(pool.map(lambda path: load_snapshot(path, dataset_cache), paths))
+    else:
+        frames = [load_snapshot(path, dataset_cache) for path in paths]
+
+    data = pd.concat(frames, ignore_index=True)
+    total = len(data)
+    latest = data.sort_values(SNAPSHOT_COLUMN, kind='stable').drop_duplicates(NOTE_KEY_COLUMN, keep='last')
+    data = data.loc[latest.index.sort_values()].drop(columns=[NOTE_KEY_COLUMN, SNAPSHOT_COLUMN])
+    data = data.reset_index(drop=True)
+    data.attrs['sources'] = list(paths)
+    data.attrs['duplicates'] = total - len(data)
+    return data
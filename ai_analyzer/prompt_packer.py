@@ -0,0 +1,150 @@
+import os
+import sys
+import pandas as pd
+from typing import Any, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from ai_analyzer.analysis_context import AnalysisContext
+from ai_analyzer.tokens import estimate_tokens, estimate_tokens_series
+
+
+class PromptPacker:
+    """
+    提示词数据打包器
+    用预先计算的聚合指标代替原始行，并在token预算内挑选最有代表性的笔记：
+    高互动优先，按点赞区间分层、同一作者优先只取一条，去除近似重复标题
+    """
+
+    LIKES_BINS = [0, 100, 500, 1000, 5000, float('inf')]
+    LIKES_LABELS = ['0-100', '101-500', '501-1000', '1001-5000', '5000+']
+    SAMPLE_COLUMNS = ['title', 'author', 'likes']
+
+    def __init__(self, token_budget: int = None):
+        self.config = Config()
+        self.token_budget = token_budget or self.config.PROMPT_DATA_TOKENS
+
+    def pack(self, data) -> Dict[str, Any]:
+        """
+        打包数据
+        :return: {'aggregates': 聚合指标, 'samples': 代表性笔记, 'text': 提示词文本, 'estimated_tokens': 估算token数}
+        """
+        ctx = AnalysisContext.of(data)
+        aggregates = self._aggregates(ctx)
+        aggregates_text = self._format_aggregates(aggregates)
+
+        remaining = self.token_budget - estimate_tokens(aggregates_text)
+        samples = self._select_samples(ctx, remaining)
+        samples_text = self._format_samples(samples)
+
+        text = aggregates_text
+        if samples_text:
+            text += f"\n\n### 代表性笔记（{len(samples)} 条，{self._columns_label(samples)}）\n{samples_text}"
+
+        return {
+            'aggregates': aggregates,
+            'samples': samples.to_dict('records'),
+            'text': text,
+            'estimated_tokens': estimate_tokens(text)
+        }
+
+    def _aggregates(self, ctx: AnalysisContext) -> Dict[str, Any]:
+        """预先计算的聚合指标"""
+        aggregates = {'total_notes': len(ctx)}
+
+        if ctx.has('author'):
+            aggregates['unique_authors'] = ctx.unique_authors
+            aggregates['top_authors'] = ctx.author_counts.head(5).to_dict()
+
+        if ctx.has('likes'):
+            try:
+                summary = ctx.likes_summary
+                quantiles = ctx.likes_quantiles
+                aggregates['likes'] = {
+                    'avg': round(float(summary['avg_likes']), 1),
+                    'median': quantiles[0.5],
+                    'p80': quantiles[0.8],
+                    'max': summary['max_likes']
+                }
+                buckets = ctx.likes_histogram(self.LIKES_BINS, self.LIKES_LABELS)
+                aggregates['likes_distribution'] = {str(label): int(count) for label, count in buckets.items()}
+            except Exception:
+                pass
+
+        if ctx.has('title'):
+            aggregates['avg_title_length'] = round(float(ctx.title_length_mean), 1)
+
+        if ctx.has('publish_time') and ctx.date_range:
+            start, end = ctx.date_range
+            aggregates['date_range'] = f"{start.strftime('%Y-%m-%d')} 至 {end.strftime('%Y-%m-%d')}"
+
+        return aggregates
+
+    def _format_aggregates(self, aggregates: Dict[str, Any]) -> str:
+        lines = [f"- 总笔记数：{aggregates['total_notes']}"]
+        if 'unique_authors' in aggregates:
+            lines.append(f"- 作者数量：{aggregates['unique_authors']}")
+            top = '、'.join(f"{author}({count}篇)" for author, count in aggregates['top_authors'].items())
+            lines.append(f"- 发帖最多的作者：{top}")
+        if 'likes' in aggregates:
+            likes = aggregates['likes']
+            lines.append(
+                f"- 点赞数：平均 {likes['avg']}，中位数 {likes['median']}，"
+                f"80分位 {likes['p80']}，最高 {likes['max']}"
+            )
+            distribution = '，'.join(f"{k}: {v}" for k, v in aggregates['likes_distribution'].items())
+            lines.append(f"- 点赞区间分布：{distribution}")
+        if 'avg_title_length' in aggregates:
+            lines.append(f"- 平均标题长度：{aggregates['avg_title_length']} 字")
+        if 'date_range' in aggregates:
+            lines.append(f"- 发布时间范围：{aggregates['date_range']}")
+        return '\n'.join(lines)
+
+    def _select_samples(self, ctx: AnalysisContext, token_budget: int) -> pd.DataFrame:
+        """在token预算内挑选代表性笔记"""
+        columns = [c for c in self.SAMPLE_COLUMNS if ctx.has(c)]
+        if not columns or 'title' not in columns or token_budget <= 0:
+            return pd.DataFrame(columns=columns)
+
+        candidates = ctx.frame(columns).copy()
+        candidates['_likes'] = ctx.likes.fillna(0) if ctx.has('likes') else 0
+
+        # 近似重复标题去重：忽略标点、空格和大小写，保留点赞最高的一条
+        candidates['_key'] = candidates['title'].fillna('').astype(str).str.lower() \
+            .str.replace('[^0-9a-z\u4e00-\u9fff]', '', regex=True)
+        candidates = candidates.sort_values('_likes', ascending=False, kind='stable')
+        candidates = candidates[candidates['_key'] != ''].drop_duplicates('_key')
+
+        # 分层：同一点赞区间内按点赞降序，同一作者优先只出现一次
+        candidates['_bucket'] = pd.cut(
+            candidates['_likes'], bins=self.LIKES_BINS, labels=False, include_lowest=True
+        )
+        if 'author' in columns:
+            candidates['_author_rank'] = candidates.groupby('author', sort=False).cumcount()
+        else:
+            candidates['_author_rank'] = 0
+        candidates = candidates.sort_values(['_bucket', '_author_rank', '_likes'],
+                                            ascending=[False, True, False], kind='stable')
+        candidates['_rank'] = candidates.groupby('_bucket', sort=False).cumcount()
+
+        # 各区间轮流取样，高区间优先
+        candidates = candidates.sort_values(['_rank', '_bucket'], ascending=[True, False], kind='stable')
+
+        lines = self._sample_lines(candidates[columns])
+        fits = (estimate_tokens_series(lines) + 1).cumsum() <= token_budget
+        return candidates.loc[fits[fits].index, columns].reset_index(drop=True)
+
+    def _sample_lines(self, samples: pd.DataFrame) -> pd.Series:
+        lines = samples.iloc[:, 0].fillna('').astype(str)
+        for column in samples.columns[1:]:
+            lines = lines + ' | ' + samples[column].fillna('').astype(str)
+        return lines
+
+    def _columns_label(self, samples: pd.DataFrame) -> str:
+        names = {'title': '标题', 'author': '作者', 'likes': '点赞'}
+        return ' | '.join(names.get(c, c) for c in samples.columns)
+
+    def _format_samples(self, samples: pd.DataFrame) -> str:
+        if samples.empty:
+            return ''
+        return '\n'.join(self._sample_lines(samples).tolist())
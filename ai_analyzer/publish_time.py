@@ -0,0 +1,160 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow为可选依赖，没有时退回pandas解析
+    pa = pc = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+# 小红书页面上的发布时间形如 "刚刚"、"3天前"、"昨天 12:30"、"08-15"、"2023-12-01"，
+# 也可能带 "编辑于" 前缀或地区后缀（"3天前 上海"），因此用搜索而不是整串匹配
+PUBLISH_TIME_PATTERN = (
+    '(?P<just>刚刚)'
+    '|(?P<amount>\\d+)\\s*(?P<unit>秒|分钟|小时|天|周|个月|月|年)前'
+    '|(?P<dayword>今天|昨天|前天)\\s*(?:(?P<dhour>\\d{1,2}):(?P<dminute>\\d{2}))?'
+    '|(?:(?P<year>\\d{4})\\s*[-/.年]\\s*)?(?P<month>\\d{1,2})\\s*[-/.月]\\s*(?P<day>\\d{1,2})日?'
+    '(?:\\s+(?P<hour>\\d{1,2}):(?P<minute>\\d{2}))?'
+)
+
+UNIT_SECONDS = {
+    '秒': 1, '分钟': 60, '小时': 3600, '天': 86400, '周': 7 * 86400,
+    '个月': 30 * 86400, '月': 30 * 86400, '年': 365 * 86400
+}
+DAYWORD_OFFSETS = {'今天': 0, '昨天': 1, '前天': 2}
+
+
+def parse_publish_time(publish, crawl_time=None, now=None) -> pd.Series:
+    """
+    将发布时间统一解析为时间戳
+    相对时间（"3天前"、"昨天 12:30"、不带年份的 "08-15"）以同一行的爬取时间为基准，
+    没有爬取时间时以 now（默认当前时间）为基准。
+    正则只作用于去重后的取值（同一数据集中的发布时间大量重复），逐行部分全部是numpy运算
+    :return: 与输入等长的 datetime64 序列，无法解析的为 NaT
+    """
+    publish = pd.Series(publish)
+    if pd.api.types.is_datetime64_any_dtype(publish):
+        return publish
+
+    codes, uniques = pd.factorize(publish, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(np.full(len(publish), np.datetime64('NaT'), dtype='datetime64[ns]'), index=publish.index)
+
+    # 末尾追加一个空串（解析结果全为空），缺失值的编码 -1 正好取到这一行
+    parts = _parse_unique(pd.Series(list(uniques.astype(str)) + [''], dtype=str))
+    base = _base_times(crawl_time, publish.index, now)
+
+    # 带年份的日期与爬取时间无关，直接在去重后的取值上计算
+    result = parts['absolute'].to_numpy(dtype='datetime64[ns]')[codes]
+
+    # "N天前" 等：基准时间减去偏移
+    offset = parts['offset_seconds'].to_numpy()[codes]
+    mask = ~np.isnan(offset)
+    result[mask] = base[mask] - offset[mask].astype('int64').astype('timedelta64[s]')
+
+    # "昨天 12:30"：基准日期减去天数再加上时分
+    clock = np.nan_to_num(parts['clock_minutes'].to_numpy()).astype('int64').astype('timedelta64[m]')
+    days_back = parts['days_back'].to_numpy()[codes]
+    mask = ~np.isnan(days_back)
+    result[mask] = (
+        base[mask].astype('datetime64[D]') - days_back[mask].astype('int64').astype('timedelta64[D]')
+    ).astype('datetime64[ns]') + clock[codes[mask]]
+
+    # "08-15"：取基准时间的年份，晚于基准时间一天以上的说明是上一年。
+    # 基准年份通常只有一两个，按年份在去重后的取值上组合日期，再按编码展开
+    month, day = parts['month'].to_numpy(), parts['day'].to_numpy()
+    mask = ~np.isnan(month)[codes]
+    if mask.any():
+        row_codes = codes[mask]
+        row_base = base[mask]
+        row_years = row_base.astype('datetime64[Y]')
+        dates = np.full(len(row_codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+        for year in np.unique(row_years):
+            in_year = row_years == year
+            number = year.astype('int64') + 1970
+            current = _compose(np.full(len(month), number), month, day) + clock
+            previous = _compose(np.full(len(month), number - 1), month, day) + clock
+            candidates = current[row_codes[in_year]]
+            future = candidates > row_base[in_year] + np.timedelta64(1, 'D')
+            dates[in_year] = np.where(future, previous[row_codes[in_year]], candidates)
+        result[mask] = dates
+
+    return pd.Series(result, index=publish.index)
+
+
+def _parse_unique(values: pd.Series) -> pd.DataFrame:
+    """解析去重后的发布时间取值，返回每个取值的偏移量、日期和时分"""
+    m = values.str.extract(PUBLISH_TIME_PATTERN)
+
+    def num(column: str) -> np.ndarray:
+        return pd.to_numeric(m[column], errors='coerce').to_numpy(dtype=float)
+
+    offset = num('amount') * m['unit'].map(UNIT_SECONDS).to_numpy(dtype=float)
+    offset[m['just'].notna().to_numpy()] = 0
+
+    days_back = m['dayword'].map(DAYWORD_OFFSETS).to_numpy(dtype=float)
+    clock = np.where(np.isnan(days_back), num('hour') * 60 + num('minute'), num('dhour') * 60 + num('dminute'))
+
+    year, month, day = num('year'), num('month'), num('day')
+    has_year = ~np.isnan(year) & ~np.isnan(month)
+    absolute = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    absolute[has_year] = _compose(year[has_year], month[has_year], day[has_year]) \
+        + np.nan_to_num(clock[has_year]).astype('int64').astype('timedelta64[m]')
+
+    return pd.DataFrame({
+        'offset_seconds': offset,
+        'days_back': days_back,
+        'clock_minutes': clock,
+        'month': np.where(has_year, np.nan, month),
+        'day': np.where(has_year, np.nan, day),
+        'absolute': absolute
+    })
+
+
+def _compose(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """由年月日数组组合日期，非法日期（如 02-30）为 NaT"""
+    missing = np.isnan(np.asarray(month, dtype=float)) | np.isnan(np.asarray(day, dtype=float))
+    year = np.nan_to_num(np.asarray(year, dtype=float)).astype('int64')
+    month = np.nan_to_num(np.asarray(month, dtype=float)).astype('int64')
+    day = np.nan_to_num(np.asarray(day, dtype=float)).astype('int64')
+    months = (year - 1970) * 12 + month - 1
+    first = months.astype('datetime64[M]')
+    dates = first.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    valid = ~missing & (month >= 1) & (month <= 12) & (day >= 1) & (dates.astype('datetime64[M]') == first)
+    return np.where(valid, dates.astype('datetime64[ns]'), np.datetime64('NaT'))
+
+
+def _base_times(crawl_time, index, now=None) -> np.ndarray:
+    """每行的基准时间：爬取时间，缺失时为 now"""
+    now = np.datetime64(pd.Timestamp(now) if now is not None else pd.Timestamp.now(), 'ns')
+    if crawl_time is None:
+        return np.full(len(index), now, dtype='datetime64[ns]')
+    crawl_time = pd.Series(crawl_time, index=index)
+    if pd.api.types.is_datetime64_any_dtype(crawl_time):
+        base = crawl_time.to_numpy(dtype='datetime64[ns]')
+    else:
+        base = _parse_crawl_time(crawl_time)
+    return np.where(np.isnat(base), now, base)
+
+
+def _parse_crawl_time(crawl_time: pd.Series) -> np.ndarray:
+    """按 CRAWL_TIME_FORMAT 解析爬取时间，格式不符的再逐个推断"""
+    if pa is not None:
+        # 爬取时间精确到秒，几乎没有重复，直接用Arrow批量解析
+        parsed = pc.strptime(
+            pa.array(crawl_time.astype(str).where(crawl_time.notna()), type=pa.string()),
+            format=Config.CRAWL_TIME_FORMAT, unit='ns', error_is_null=True
+        ).to_numpy(zero_copy_only=False).astype('datetime64[ns]')
+    else:
+        parsed = pd.to_datetime(crawl_time, format=Config.CRAWL_TIME_FORMAT, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    retry = np.isnat(parsed) & crawl_time.notna().to_numpy()
+    if retry.any():
+        # 兼容手工整理的数据中其他格式的爬取时间
+        parsed[retry] = pd.to_datetime(crawl_time[retry].astype(str), format='mixed', errors='coerce') \
+            .to_numpy(dtype='datetime64[ns]')
+    return parsed
@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import math
+import time
+import base64
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+class QuantileSketch:
+    """
+    相对误差分位数草图（DDSketch）
+    正数按对数分桶：第k个桶覆盖 (γ^(k-1), γ^k]，γ=(1+α)/(1-α)，桶内取值以 2γ^k/(γ+1) 代表，
+    因此任一分位数的估计值与该排名上的真实值相对误差不超过 α。
+    非正数单独计数（点赞数为0的笔记很多）。桶计数直接相加即可合并，桶数只随取值范围的对数增长
+    """
+
+    def __init__(self, relative_accuracy: float = None):
+        self.alpha = relative_accuracy or Config.SKETCH_RELATIVE_ACCURACY
+        self.gamma = (1 + self.alpha) / (1 - self.alpha)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values) -> 'QuantileSketch':
+        values = pd.Series(values).dropna().to_numpy(dtype=float)
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        keys, counts = np.unique(np.ceil(np.log(positive) / math.log(self.gamma)).astype('int64'), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        if other.alpha != self.alpha:
+            raise ValueError(f"分位数草图精度不一致: {self.alpha} / {other.alpha}")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, quantiles: List[float]) -> Dict[float, float]:
+        """估计分位数（取排名 q*(n-1) 处的值）"""
+        if self.count == 0:
+            return {q: np.nan for q in quantiles}
+        keys = sorted(self.buckets)
+        ends = self.zero_count + np.cumsum([self.buckets[k] for k in keys], dtype='int64')
+        result = {}
+        for q in quantiles:
+            rank = q * (self.count - 1)
+            if rank < self.zero_count or not keys:
+                value = min(0.0, self.max)
+            else:
+                key = keys[min(int(np.searchsorted(ends, rank, side='right')), len(keys) - 1)]
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+            result[q] = float(min(max(value, self.min), self.max))
+        return result
+
+    def error_bounds(self, quantiles: List[float]) -> Dict[str, Any]:
+        """各分位数估计值对应的真实值区间"""
+        estimates = self.quantiles(quantiles)
+        return {
+            'relative_error': self.alpha,
+            'intervals': {
+                str(q): [round(v / (1 + self.alpha), 4), round(v / (1 - self.alpha), 4)] if v > 0 else [v, v]
+                for q, v in estimates.items()
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'alpha': self.alpha,
+            'buckets': {str(k): v for k, v in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(payload['alpha'])
+        sketch.buckets = {int(k): v for k, v in payload['buckets'].items()}
+        sketch.zero_count = payload['zero_count']
+        sketch.count = payload['count']
+        sketch.min = payload['min'] if payload['min'] is not None else math.inf
+        sketch.max = payload['max'] if payload['max'] is not None else -math.inf
+        return sketch
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 去重计数
+    对取值做64位哈希，前p位选择寄存器，寄存器记录其余位中首个1出现的位置的最大值；
+    标准误差约 1.04/√(2^p)，寄存器逐个取最大值即可合并
+    """
+
+    def __init__(self, precision: int = None):
+        self.precision = precision or Config.SKETCH_HLL_PRECISION
+        self.m = 1 << self.precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values) -> 'HyperLogLog':
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return self
+        hashes = pd.util.hash_pandas_object(values.astype(str).reset_index(drop=True), index=False).to_numpy()
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # 剩余位不超过53位，转为浮点数后 frexp 的指数即为二进制位数
+        rank = width - np.frexp(rest.astype(float))[1] + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError(f"HyperLogLog精度不一致: {self.precision} / {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * self.m and zeros:
+            # 小基数时用线性计数修正
+            return self.m * math.log(self.m / zeros)
+        return raw
+
+    @property
+    def relative_std_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def error_bounds(self) -> Dict[str, Any]:
+        """估计值及约95%置信区间（±2倍标准误差）"""
+        estimate = self.estimate()
+        sigma = self.relative_std_error
+        return {
+            'relative_std_error': round(sigma, 4),
+            'interval_95': [int(estimate * (1 - 2 * sigma)), int(math.ceil(estimate * (1 + 2 * sigma)))]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'HyperLogLog':
+        sketch = cls(payload['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(payload['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+class HeavyHitters:
+    """
+    高频取值计数（可合并的 Space-Saving）
+    最多跟踪 capacity 个取值，超出时丢弃计数最小的取值并记录丢弃的最大计数 floor：
+    未跟踪的取值真实计数不超过 floor，跟踪的取值计数为真实值的上界，减去 error 为下界。
+    取值种类不超过 capacity 时从不丢弃（floor 为0），结果与精确计数一致；内存占用只与 capacity 有关
+    """
+
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity or Config.ANALYSIS_AUTHOR_CAPACITY
+        self.counts = pd.Series(dtype='int64')  # 取值 -> 计数上界（按首次出现的顺序）
+        self.errors = pd.Series(dtype='int64')  # 取值 -> 可能多计的数量
+        self.floor = 0
+
+    @property
+    def exact(self) -> bool:
+        """是否从未丢弃过取值（计数精确）"""
+        return self.floor == 0
+
+    def update(self, counts: pd.Series) -> 'HeavyHitters':
+        """加入一批取值的精确计数（取值 -> 出现次数）"""
+        other = HeavyHitters(self.capacity)
+        other.counts = counts.astype('int64')
+        other.errors = pd.Series(0, index=counts.index, dtype='int64')
+        return self.merge(other)
+
+    def merge(self, other: 'HeavyHitters') -> 'HeavyHitters':
+        # 一方没有跟踪的取值按该方的 floor 计入（上界），同时计入误差
+        index = self.counts.index.append(other.counts.index[~other.counts.index.isin(self.counts.index)])
+        counts = (self.counts.reindex(index, fill_value=self.floor)
+                  + other.counts.reindex(index, fill_value=other.floor)).astype('int64')
+        errors = (self.errors.reindex(index, fill_value=self.floor)
+                  + other.errors.reindex(index, fill_value=other.floor)).astype('int64')
+        floor = self.floor + other.floor
+        if len(counts) > self.capacity:
+            ranked = counts.sort_values(ascending=False, kind='stable')
+            floor = max(floor, int(ranked.iloc[self.capacity]))
+            keep = counts.index.isin(ranked.index[:self.capacity])
+            counts, errors = counts[keep], errors[keep]
+        self.counts, self.errors, self.floor = counts, errors, floor
+        return self
+
+    def top(self, n: int = None) -> pd.Series:
+        """按计数降序的取值（计数相同时按首次出现的顺序）"""
+        ranked = self.counts.sort_values(ascending=False, kind='stable')
+        return ranked.head(n) if n is not None else ranked
+
+
+class DatasetSketches:
+    """一个数据集的草图：行数、点赞数分位数草图、作者去重计数"""
+
+    def __init__(self, likes: QuantileSketch = None, authors: HyperLogLog = None, rows: int = 0):
+        self.rows = rows
+        self.likes = likes or QuantileSketch()
+        self.authors = authors or HyperLogLog()
+
+    def update(self, rows: int, likes=None, authors=None) -> 'DatasetSketches':
+        self.rows += rows
+        if likes is not None:
+            self.likes.update(likes)
+        if authors is not None:
+            self.authors.update(authors)
+        return self
+
+    def merge(self, other: 'DatasetSketches') -> 'DatasetSketches':
+        self.rows += other.rows
+        self.likes.merge(other.likes)
+        self.authors.merge(other.authors)
+        return self
+
+    def summary(self, quantiles: List[float] = None) -> Dict[str, Any]:
+        """近似统计结果及误差范围"""
+        quantiles = quantiles or [0.2, 0.5, 0.8]
+        return {
+            'total_notes': self.rows,
+            'likes_quantiles': {str(q): v for q, v in self.likes.quantiles(quantiles).items()},
+            'unique_authors': int(round(self.authors.estimate())),
+            'error_bounds': {
+                'likes_quantiles': self.likes.error_bounds(quantiles),
+                'unique_authors': self.authors.error_bounds()
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'likes': self.likes.to_dict(), 'authors': self.authors.to_dict()}
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'DatasetSketches':
+        return cls(
+            QuantileSketch.from_dict(payload['likes']),
+            HyperLogLog.from_dict(payload['authors']),
+            payload['rows']
+        )
+
+
+class SketchStore:
+    """
+    按数据文件持久化草图
+    文件名由来源路径和 (大小, 修改时间) 组成：来源文件被改写后旧草图不再匹配并被删除；
+    来源文件已删除或归档的草图按TTL过期，超出条目数时按最近访问时间淘汰
+    """
+
+    # 草图构建方式（如点赞数解析）变化时递增，旧版本的草图不再匹配并被删除
+    FORMAT_VERSION = 2
+
+    def __init__(self, cache_dir: str = None, ttl: int = None, max_entries: int = None):
+        self.config = Config()
+        self.cache_dir = cache_dir or self.config.SKETCH_CACHE_DIR
+        self.ttl = self.config.SKETCH_CACHE_TTL if ttl is None else ttl
+        self.max_entries = self.config.SKETCH_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    @staticmethod
+    def _source_prefix(data_file: str) -> str:
+        return hashlib.sha256(os.path.abspath(data_file).encode('utf-8')).hexdigest()[:32]
+
+    def _path(self, data_file: str) -> str:
+        stat = os.stat(data_file)
+        version = hashlib.sha256(f"{stat.st_size}|{stat.st_mtime_ns}|{self.FORMAT_VERSION}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self._source_prefix(data_file)}_{version}.json")
+
+    def _remove_stale(self, data_file: str, keep: str = None) -> int:
+        """删除同一来源文件其他版本（改写之前）的草图"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        prefix = f"{self._source_prefix(data_file)}_"
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and name.endswith('.json') and path != keep:
+                removed += self._remove(path)
+        return removed
+
+    def load(self, data_file: str) -> Optional[DatasetSketches]:
+        try:
+            path = self._path(data_file)
+            with open(path, 'r', encoding=self.config.JSON_ENCODING) as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            self._remove_stale(data_file)
+            return None
+        # 用修改时间记录最近访问，供LRU淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        try:
+            if (payload['likes']['alpha'] != self.config.SKETCH_RELATIVE_ACCURACY
+                    or payload['authors']['precision'] != self.config.SKETCH_HLL_PRECISION):
+                return None
+            return DatasetSketches.from_dict(payload)
+        except (ValueError, KeyError):
+            return None
+
+    def save(self, data_file: str, sketches: DatasetSketches) -> None:
+        try:
+            path = self._path(data_file)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding=self.config.JSON_ENCODING) as f:
+                json.dump(sketches.to_dict(), f)
+            os.replace(tmp_path, path)
+            self._remove_stale(data_file, keep=path)
+            self.evict()
+        except OSError as e:
+            print(f"写入草图缓存失败: {e}")
+
+    def evict(self) -> int:
+        """清理过期草图，并按最近访问时间淘汰超出条目数限制的草图"""
+        if not os.path.exists(self.cache_dir):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl and now - stat.st_mtime > self.ttl:
+                removed += self._remove(path)
+                continue
+            entries.append((stat.st_mtime, path))
+
+        entries.sort()
+        while len(entries) > self.max_entries:
+            _, path = entries.pop(0)
+            removed += self._remove(path)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
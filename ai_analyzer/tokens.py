@@ -0,0 +1,22 @@
+import re
+import pandas as pd
+
+# 中日韩字符约1个token/字，其余字符约4个字符/token
+CJK_PATTERN = '[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]'
+CJK_RE = re.compile(CJK_PATTERN)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数"""
+    if not text:
+        return 0
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_tokens_series(texts: pd.Series) -> pd.Series:
+    """向量化估算每行文本的token数"""
+    texts = texts.fillna('').astype(str)
+    lengths = texts.str.len()
+    cjk = texts.str.count(CJK_PATTERN)
+    return cjk + (lengths - cjk + 3) // 4
@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+
+def normalize_usage(usage: Dict[str, Any]) -> Dict[str, int]:
+    """
+    统一响应中的usage字段
+    DeepSeek返回 prompt_cache_hit_tokens，OpenAI兼容接口返回 prompt_tokens_details.cached_tokens
+    """
+    usage = usage or {}
+    cached = usage.get('prompt_cache_hit_tokens')
+    if cached is None:
+        cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+    return {
+        'prompt_tokens': int(usage.get('prompt_tokens') or 0),
+        'completion_tokens': int(usage.get('completion_tokens') or 0),
+        'cached_tokens': int(cached or 0)
+    }
+
+
+def estimate_cost(prompt_tokens: int, completion_tokens: int, cached_tokens: int,
+                  config: Config = None) -> Dict[str, float]:
+    """按配置单价估算费用（元），以及提示词缓存节省的费用"""
+    config = config or Config()
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    cost = (cached_tokens * config.LLM_PRICE_INPUT_CACHE_HIT
+            + uncached * config.LLM_PRICE_INPUT_CACHE_MISS
+            + completion_tokens * config.LLM_PRICE_OUTPUT) / 1_000_000
+    saved = cached_tokens * (config.LLM_PRICE_INPUT_CACHE_MISS - config.LLM_PRICE_INPUT_CACHE_HIT) / 1_000_000
+    return {'cost': round(cost, 6), 'saved_by_cache': round(saved, 6)}
+
+
+class UsageTracker:
+    """
+    单次分析的token用量记录
+    同一次分析中的多次API调用（分片、维度、汇总）可在不同线程中并发记录
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, usage: Dict[str, Any] = None, latency: float = 0.0,
+               local_cache_hit: bool = False) -> None:
+        """
+        记录一次调用
+        :param kind: 调用类型（analysis / map / dimension / reduce）
+        :param local_cache_hit: 是否命中本地LLM响应缓存（未实际请求API）
+        """
+        call = dict(normalize_usage(usage), kind=kind, latency=round(latency, 4),
+                    local_cache_hit=local_cache_hit)
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> Dict[str, Any]:
+        """汇总本次分析的token用量、延迟和估算费用"""
+        with self._lock:
+            calls = list(self.calls)
+
+        prompt_tokens = sum(c['prompt_tokens'] for c in calls)
+        completion_tokens = sum(c['completion_tokens'] for c in calls)
+        cached_tokens = sum(c['cached_tokens'] for c in calls)
+        return dict(
+            {
+                'calls': len(calls),
+                'local_cache_hits': sum(1 for c in calls if c['local_cache_hit']),
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cached_tokens': cached_tokens,
+                'prompt_cache_hit_ratio': cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+                'total_latency': round(sum(c['latency'] for c in calls), 4),
+            },
+            **estimate_cost(prompt_tokens, completion_tokens, cached_tokens),
+            details=calls
+        )
+
+
+class UsageLog:
+    """
+    token用量日志
+    每次分析的每次API调用保存为一行（SQLite，WAL模式），用于跨进程汇总费用和缓存收益
+    """
+
+    def __init__(self, db_path: str = None):
+        self.config = Config()
+        self.db_path = db_path or self.config.LLM_USAGE_LOG_PATH
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS usage (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    analysis_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    model TEXT,
+                    kind TEXT,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    latency REAL NOT NULL DEFAULT 0,
+                    local_cache_hit INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_usage_created_at ON usage(created_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_usage_analysis_id ON usage(analysis_id)')
+            conn.commit()
+            self._initialized = True
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def record(self, analysis_id: str, calls: List[Dict[str, Any]], model: str = None) -> None:
+        """保存一次分析的全部调用记录"""
+        if not calls:
+            return
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.executemany(
+                    'INSERT INTO usage(analysis_id, created_at, model, kind, prompt_tokens, '
+                    'completion_tokens, cached_tokens, latency, local_cache_hit) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (analysis_id, now, model, c['kind'], c['prompt_tokens'], c['completion_tokens'],
+                         c['cached_tokens'], c['latency'], int(c['local_cache_hit']))
+                        for c in calls
+                    ]
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"写入token用量记录失败: {e}")
+
+    def report(self, days: float = None) -> Dict[str, Any]:
+        """
+        汇总token用量报告
+        :param days: 只统计最近若干天（默认全部）
+        """
+        since = time.time() - days * 86400 if days else 0
+        try:
+            conn = self._connect()
+            try:
+                total = conn.execute(
+                    'SELECT COUNT(DISTINCT analysis_id), COUNT(*), COALESCE(SUM(local_cache_hit), 0), '
+                    'COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0), '
+                    'COALESCE(SUM(cached_tokens), 0) FROM usage WHERE created_at >= ?',
+                    (since,)
+                ).fetchone()
+                # 只统计实际请求API的调用，按是否命中提示词缓存比较延迟
+                latency_rows = conn.execute(
+                    'SELECT cached_tokens > 0, COUNT(*), AVG(latency), AVG(prompt_tokens) '
+                    'FROM usage WHERE created_at >= ? AND local_cache_hit = 0 GROUP BY cached_tokens > 0',
+                    (since,)
+                ).fetchall()
+                by_kind = conn.execute(
+                    'SELECT kind, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(cached_tokens) '
+                    'FROM usage WHERE created_at >= ? GROUP BY kind ORDER BY kind',
+                    (since,)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            return {'error': f'读取token用量记录失败: {e}'}
+
+        analyses, calls, local_hits, prompt_tokens, completion_tokens, cached_tokens = total
+        latency = {
+            ('prompt_cache_hit' if hit else 'prompt_cache_miss'): {
+                'calls': count,
+                'avg_latency': round(avg_latency, 4),
+                'avg_prompt_tokens': round(avg_prompt, 1)
+            }
+            for hit, count, avg_latency, avg_prompt in latency_rows
+        }
+        return dict(
+            {
+                'analyses': analyses,
+                'calls': calls,
+                'local_cache_hits': local_hits,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cached_tokens': cached_tokens,
+                'prompt_cache_hit_ratio': cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            },
+            **estimate_cost(prompt_tokens, completion_tokens, cached_tokens, self.config),
+            latency=latency,
+            by_kind={
+                kind: {'calls': count, 'prompt_tokens': prompt, 'completion_tokens': completion,
+                       'cached_tokens': cached}
+                for kind, count, prompt, completion, cached in by_kind
+            }
+        )
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI分析链路压测
+启动本地大模型替身服务（或使用 --api-base 指定已运行的服务），
+分别以不同并发数驱动 analyze_with_ai 和 /api/analyze，统计吞吐量和尾延迟
+
+用法:
+  python benchmarks/bench_llm.py --concurrency 1,4,16 --requests 32
+  python benchmarks/bench_llm.py --target api --rate-limit-rate 0.1 --error-rate 0.05
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+from benchmarks.bench_report import make_dataset
+from benchmarks.llm_stub_server import add_server_arguments, server_from_args
+import web_app.app as web
+
+def configure_analyzer(analyzer, api_base, mode):
+    """指向替身服务，并关闭各级缓存和用量记录，保证每次都真实请求"""
+    analyzer.llm_client.api_base = api_base.rstrip('/')
+    analyzer.update_api_key('stub')
+    analyzer.llm_cache = None
+    analyzer.usage_log = None
+    analyzer.ai_mode = mode
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+def run_level(func, concurrency, total):
+    """以指定并发数执行total次，返回每次的 (耗时, 是否成功) 与总耗时"""
+    results = []
+    lock = threading.Lock()
+
+    def task(_):
+        start = time.perf_counter()
+        try:
+            ok = func()
+        except Exception as e:
+            print(f"请求失败: {e}", file=sys.stderr)
+            ok = False
+        with lock:
+            results.append((time.perf_counter() - start, ok))
+
+    # 压测期间屏蔽分析器的过程输出
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(task, range(total)))
+    return results, time.perf_counter() - start
+
+def report(name, concurrency, results, elapsed):
+    latencies = [latency for latency, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    print(f"   {name:<16}{concurrency:>6}{len(results):>8}{errors:>6}"
+          f"{len(results) / elapsed:>10.2f}{percentile(latencies, 0.5):>9.2f}"
+          f"{percentile(latencies, 0.95):>9.2f}{percentile(latencies, 0.99):>9.2f}{max(latencies):>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='AI分析链路压测（使用本地大模型替身服务）')
+    parser.add_argument('--api-base', help='已运行的OpenAI兼容服务地址（默认启动内置替身服务）')
+    parser.add_argument('--target', choices=['analyzer', 'api', 'both'], default='both',
+                        help='压测对象 (默认: both)')
+    parser.add_argument('--concurrency', default='1,4,8,16', help='并发数列表 (默认: 1,4,8,16)')
+    parser.add_argument('--requests', type=int, default=32, help='每个并发级别的请求数 (默认: 32)')
+    parser.add_argument('--rows', type=int, default=2000, help='测试数据行数 (默认: 2000)')
+    parser.add_argument('--ai-mode', choices=['single', 'map_reduce', 'dimensions'], default='single',
+                        help='AI分析方式 (默认: single)')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+
+    stub = None
+    api_base = args.api_base
+    if not api_base:
+        stub = server_from_args(args).start()
+        api_base = stub.api_base
+    print(f"🧪 大模型服务: {api_base}")
+
+    df = make_dataset(args.rows)
+    analyzer = DeepSeekAnalyzer()
+    configure_analyzer(analyzer, api_base, args.ai_mode)
+
+    # /api/analyze 通过真实HTTP访问：Flask应用运行在本地随机端口
+    server = None
+    data_file = f"bench_llm_{args.rows}.csv"
+    data_path = os.path.join(web.config.DATA_DIR, data_file)
+    existing = set()
+    if args.target in ('api', 'both'):
+        os.makedirs(web.config.DATA_DIR, exist_ok=True)
+        existing = set(os.listdir(web.config.DATA_DIR))
+        df.to_csv(data_path, index=False, encoding='utf-8-sig')
+        web.config.ANALYSIS_CACHE_ENABLED = False
+        configure_analyzer(web.get_analyzer(), api_base, args.ai_mode)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, web.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{server.port}" if server else None
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=max(levels)))
+
+    def call_analyzer():
+        result = analyzer.analyze_with_ai(df)
+        text = result.get('ai_analysis', '')
+        return not result.get('error') and not text.startswith(('API调用失败', 'API调用出错'))
+
+    def call_api():
+        response = session.post(f"{app_url}/api/analyze", json={'file': data_file, 'type': 'ai'}, timeout=300)
+        body = response.json()
+        data = body.get('data') or {}
+        text = data.get('ai_analysis', '')
+        return response.status_code == 200 and not data.get('error') \
+            and not text.startswith(('API调用失败', 'API调用出错'))
+
+    targets = []
+    if args.target in ('analyzer', 'both'):
+        targets.append(('analyze_with_ai', call_analyzer))
+    if args.target in ('api', 'both'):
+        targets.append(('/api/analyze', call_api))
+
+    print(f"📊 数据行数: {args.rows}，AI分析方式: {args.ai_mode}，每级请求数: {args.requests}")
+    print("=" * 80)
+    print(f"   {'对象':<14}{'并发':>4}{'请求数':>5}{'失败':>4}{'次/秒':>8}"
+          f"{'p50(s)':>9}{'p95(s)':>9}{'p99(s)':>9}{'max(s)':>9}")
+    try:
+        for name, func in targets:
+            for concurrency in levels:
+                results, elapsed = run_level(func, concurrency, args.requests)
+                report(name, concurrency, results, elapsed)
+    finally:
+        if server:
+            server.shutdown()
+            # 清理压测产生的数据文件和分析结果
+            for name in set(os.listdir(web.config.DATA_DIR)) - existing:
+                path = os.path.join(web.config.DATA_DIR, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+
+    print("=" * 80)
+    clients = [('analyze_with_ai', analyzer)]
+    if server:
+        clients.append(('/api/analyze', web.get_analyzer()))
+    for name, client_owner in clients:
+        metrics = client_owner.llm_client.metrics()
+        print(f"   客户端[{name}]: 调用 {metrics['calls']} 次，重试 {metrics['retries']} 次，"
+              f"失败 {metrics['errors']} 次，熔断拒绝 {metrics['rejected']} 次")
+    if stub:
+        stats = stub.stats()
+        print(f"   替身服务: 请求 {stats['requests']} 次，注入429 {stats['rate_limited']} 次，"
+              f"注入500 {stats['errors']} 次，最大并发 {stats['max_inflight']}")
+        stub.stop()
+
+if __name__ == '__main__':
+    main()
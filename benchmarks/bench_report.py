@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+综合报告性能基准
+对比基线版本（benchmarks/legacy_report.py 中保留的旧代码）、当前代码各部分独立计算、
+以及各部分共享分析上下文（新流程）的耗时
+
+用法: python benchmarks/bench_report.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+from ai_analyzer.analysis_context import AnalysisContext
+from benchmarks.legacy_report import LegacyReport
+
+def make_dataset(rows, seed=42):
+    """生成模拟笔记数据"""
+    rng = np.random.default_rng(seed)
+    topics = ['美食探店', '旅行攻略', '穿搭技巧', '护肤心得', '健身教程', '家居好物', '读书笔记', '宠物日常']
+    titles = np.array([f"{t} 分享 第{i}期" for t in topics for i in range(50)])
+    authors = np.array([f"博主{i}" for i in range(max(rows // 20, 1))])
+    likes = rng.lognormal(mean=5, sigma=1.5, size=rows).astype(int)
+    return pd.DataFrame({
+        'title': titles[rng.integers(0, len(titles), rows)],
+        'author': authors[rng.integers(0, len(authors), rows)],
+        'likes': likes.astype(str),
+        'publish_time': '2024-01-01'
+    })
+
+def run_legacy(legacy, df):
+    """基线版本：旧代码各部分各自从原始数据重新计算"""
+    trends = legacy.analyze_trends(df)
+    legacy._calculate_statistics(df)
+    legacy._prepare_chart_data(df)
+    return trends
+
+def run_unshared(analyzer, df):
+    """当前代码，各部分各自传入原始数据（每次调用单独建立分析上下文）"""
+    trends = analyzer.analyze_trends(df)
+    analyzer._calculate_statistics(df)
+    analyzer._prepare_chart_data(df)
+    return trends
+
+def run_shared(analyzer, df):
+    """新流程：各部分共享同一个分析上下文"""
+    ctx = AnalysisContext(df)
+    trends = analyzer.analyze_trends(ctx)
+    analyzer._calculate_statistics(ctx)
+    analyzer._prepare_chart_data(ctx)
+    return trends
+
+def timeit(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='综合报告性能基准')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='数据行数 (默认: 1000000)')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最优 (默认: 3)')
+    args = parser.parse_args()
+
+    print(f"📊 生成 {args.rows} 行测试数据...")
+    df = make_dataset(args.rows)
+    analyzer = DeepSeekAnalyzer()
+
+    legacy = timeit(run_legacy, LegacyReport(), df, repeat=args.repeat)
+    unshared = timeit(run_unshared, analyzer, df, repeat=args.repeat)
+    shared = timeit(run_shared, analyzer, df, repeat=args.repeat)
+
+    print("=" * 50)
+    print(f"   基线版本（旧流程）: {legacy:.3f} 秒")
+    print(f"   当前代码独立计算: {unshared:.3f} 秒")
+    print(f"   共享上下文（新流程）: {shared:.3f} 秒")
+    print(f"   相对基线加速比: {legacy / shared:.2f}x")
+    print(f"   相对独立计算加速比: {unshared / shared:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据存储格式基准
+同一份模拟数据分别保存为 CSV / Parquet / Arrow，对比文件大小、完整加载（load_data）、
+加载后计算统计数据，以及只读取分析用到的列的耗时。
+Arrow文件由 load_data 内存映射打开，字段在统计时才按需转换，因此主要看"加载+统计"一列
+
+用法: python benchmarks/bench_storage.py --rows 1000000
+"""
+
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from contextlib import redirect_stdout
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+from benchmarks.bench_report import make_dataset
+from crawler.storage import FORMAT_EXTENSIONS, read_dataset, write_dataset
+
+# 统计分析用到的列
+PROJECTED_COLUMNS = ['author', 'likes']
+
+def make_crawl_dataset(rows, seed=42):
+    """在模拟笔记数据上补齐爬虫输出的其余字段"""
+    rng = np.random.default_rng(seed)
+    df = make_dataset(rows, seed)
+    df['link'] = 'https://www.xiaohongshu.com/explore/' + pd.Series(rng.integers(0, 16 ** 12, rows)).map('{:024x}'.format)
+    df['image_url'] = 'https://sns-img.xhscdn.com/' + pd.Series(rng.integers(0, 16 ** 12, rows)).map('{:032x}'.format)
+    df['publish_time'] = pd.Series(rng.integers(1, 30, rows)).astype(str) + '天前'
+    crawl = pd.Timestamp('2024-12-01') + pd.to_timedelta(rng.integers(0, 86400 * 7, rows), unit='s')
+    df['crawl_time'] = crawl.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+def timeit(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='数据存储格式基准')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='数据行数 (默认: 1000000)')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最优 (默认: 3)')
+    args = parser.parse_args()
+
+    print(f"📊 生成 {args.rows} 行测试数据...")
+    df = make_crawl_dataset(args.rows)
+    analyzer = DeepSeekAnalyzer()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for data_format, extension in FORMAT_EXTENSIONS.items():
+            path = os.path.join(tmp, f"bench{extension}")
+            write_dataset(df, path, data_format)
+
+            def load():
+                with redirect_stdout(io.StringIO()):
+                    return analyzer.load_data(path)
+
+            results[data_format] = {
+                'size': os.path.getsize(path),
+                'load': timeit(load, args.repeat),
+                'stats': timeit(lambda: analyzer._calculate_statistics(load()), args.repeat),
+                'projected': timeit(lambda: read_dataset(path, PROJECTED_COLUMNS), args.repeat)
+            }
+
+    baseline = results['csv']
+    print("=" * 50)
+    print(f"   {'格式':<8}{'文件大小':>12}{'完整加载':>12}{'加载+统计':>12}{'读取' + '+'.join(PROJECTED_COLUMNS):>18}")
+    for data_format, item in results.items():
+        print(f"   {data_format:<8}{item['size'] / 1024 / 1024:>10.1f}MB"
+              f"{item['load']:>11.3f}s{item['stats']:>11.3f}s{item['projected']:>17.3f}s"
+              f"   (大小 {item['size'] / baseline['size']:.0%}，加载+统计 {baseline['stats'] / item['stats']:.1f}x)")
+
+if __name__ == '__main__':
+    main()
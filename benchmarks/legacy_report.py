@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+综合报告旧流程（基准对照）
+原样保留共享分析上下文之前 DeepSeekAnalyzer 中的趋势分析、统计和图表数据计算，
+各部分各自从原始数据重新解析点赞数、统计作者和标题，供 bench_report.py 对比耗时
+"""
+
+import pandas as pd
+from typing import List, Dict, Any
+
+
+class LegacyReport:
+    def analyze_trends(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """分析热门趋势"""
+        if data.empty:
+            return {"error": "数据为空"}
+            
+        analysis = {
+            "total_notes": len(data),
+            "top_authors": [],
+            "popular_topics": [],
+            "engagement_analysis": {},
+            "time_analysis": {},
+            "recommendations": []
+        }
+        
+        # 分析热门作者
+        if 'author' in data.columns:
+            author_counts = data['author'].value_counts().head(5)
+            analysis["top_authors"] = [
+                {"author": author, "count": count} 
+                for author, count in author_counts.items()
+            ]
+        
+        # 分析点赞数
+        if 'likes' in data.columns:
+            try:
+                # 清理点赞数据
+                likes_data = data['likes'].astype(str).str.extract(r'(\d+)')[0].astype(float)
+                analysis["engagement_analysis"] = {
+                    "avg_likes": likes_data.mean(),
+                    "max_likes": likes_data.max(),
+                    "min_likes": likes_data.min(),
+                    "total_likes": likes_data.sum()
+                }
+            except:
+                analysis["engagement_analysis"] = {"error": "无法解析点赞数据"}
+        
+        # 分析标题关键词
+        if 'title' in data.columns:
+            keywords = self._extract_keywords(data['title'].tolist())
+            analysis["popular_topics"] = keywords[:10]
+        
+        # 生成建议
+        analysis["recommendations"] = self._generate_recommendations(data)
+        
+        return analysis
+    
+    def _extract_keywords(self, titles: List[str]) -> List[Dict[str, Any]]:
+        """提取标题中的关键词"""
+        import re
+        from collections import Counter
+        
+        # 合并所有标题
+        all_text = ' '.join(titles)
+        
+        # 移除特殊字符，保留中文和英文
+        cleaned_text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z\s]', '', all_text)
+        
+        # 分词（简单按空格分割）
+        words = cleaned_text.split()
+        
+        # 过滤短词
+        words = [word for word in words if len(word) > 1]
+        
+        # 统计词频
+        word_counts = Counter(words)
+        
+        return [
+            {"keyword": word, "frequency": count} 
+            for word, count in word_counts.most_common(20)
+        ]
+    
+    def _generate_recommendations(self, data: pd.DataFrame) -> List[str]:
+        """生成分析建议"""
+        recommendations = []
+        
+        if len(data) > 0:
+            recommendations.append(f"共分析了 {len(data)} 条笔记")
+            
+            if 'likes' in data.columns:
+                try:
+                    likes_data = data['likes'].astype(str).str.extract(r'(\d+)')[0].astype(float)
+                    avg_likes = likes_data.mean()
+                    recommendations.append(f"平均点赞数: {avg_likes:.1f}")
+                    
+                    if avg_likes > 1000:
+                        recommendations.append("该主题内容受欢迎程度较高")
+                    elif avg_likes > 100:
+                        recommendations.append("该主题内容受欢迎程度中等")
+                    else:
+                        recommendations.append("该主题内容受欢迎程度较低")
+                except:
+                    recommendations.append("无法分析点赞数据")
+            
+            if 'author' in data.columns:
+                unique_authors = data['author'].nunique()
+                recommendations.append(f"涉及 {unique_authors} 位作者")
+                
+                if unique_authors < len(data) * 0.3:
+                    recommendations.append("建议关注头部作者的内容策略")
+                else:
+                    recommendations.append("内容创作者分布较为分散")
+        
+        return recommendations
+    
+    def _calculate_statistics(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """计算详细统计数据"""
+        stats = {
+            "basic_stats": {},
+            "engagement_stats": {},
+            "author_stats": {},
+            "content_stats": {}
+        }
+        
+        # 基础统计
+        stats["basic_stats"] = {
+            "total_notes": len(data),
+            "unique_authors": data['author'].nunique() if 'author' in data.columns else 0,
+            "date_range": self._get_date_range(data) if 'publish_time' in data.columns else "未知"
+        }
+        
+        # 互动统计
+        if 'likes' in data.columns:
+            try:
+                likes_data = data['likes'].astype(str).str.extract(r'(\d+)')[0].astype(float)
+                stats["engagement_stats"] = {
+                    "avg_likes": likes_data.mean(),
+                    "median_likes": likes_data.median(),
+                    "max_likes": likes_data.max(),
+                    "min_likes": likes_data.min(),
+                    "total_likes": likes_data.sum(),
+                    "likes_distribution": {
+                        "high": len(likes_data[likes_data > likes_data.quantile(0.8)]),
+                        "medium": len(likes_data[(likes_data > likes_data.quantile(0.2)) & (likes_data <= likes_data.quantile(0.8))]),
+                        "low": len(likes_data[likes_data <= likes_data.quantile(0.2)])
+                    }
+                }
+            except:
+                stats["engagement_stats"] = {"error": "无法解析点赞数据"}
+        
+        # 作者统计
+        if 'author' in data.columns:
+            author_counts = data['author'].value_counts()
+            stats["author_stats"] = {
+                "top_authors": author_counts.head(10).to_dict(),
+                "author_distribution": {
+                    "single_post": len(author_counts[author_counts == 1]),
+                    "multiple_posts": len(author_counts[author_counts > 1])
+                }
+            }
+        
+        # 内容统计
+        if 'title' in data.columns:
+            title_lengths = data['title'].str.len()
+            stats["content_stats"] = {
+                "avg_title_length": title_lengths.mean(),
+                "title_length_distribution": {
+                    "short": len(title_lengths[title_lengths <= 10]),
+                    "medium": len(title_lengths[(title_lengths > 10) & (title_lengths <= 30)]),
+                    "long": len(title_lengths[title_lengths > 30])
+                }
+            }
+        
+        return stats
+
+    def _get_date_range(self, data: pd.DataFrame) -> str:
+        """获取数据的时间范围"""
+        try:
+            # 尝试解析发布时间
+            dates = pd.to_datetime(data['publish_time'], errors='coerce')
+            valid_dates = dates.dropna()
+            if len(valid_dates) > 0:
+                start_date = valid_dates.min().strftime('%Y-%m-%d')
+                end_date = valid_dates.max().strftime('%Y-%m-%d')
+                return f"{start_date} 至 {end_date}"
+        except:
+            pass
+        return "时间范围未知"
+
+    def _prepare_chart_data(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """准备图表数据"""
+        chart_data = {}
+        
+        # 作者分布图
+        if 'author' in data.columns:
+            author_counts = data['author'].value_counts().head(10)
+            chart_data["author_distribution"] = {
+                "labels": author_counts.index.tolist(),
+                "data": author_counts.values.tolist()
+            }
+        
+        # 点赞数分布图
+        if 'likes' in data.columns:
+            try:
+                likes_data = data['likes'].astype(str).str.extract(r'(\d+)')[0].astype(float)
+                # 创建点赞数区间
+                bins = [0, 100, 500, 1000, 5000, float('inf')]
+                labels = ['0-100', '101-500', '501-1000', '1001-5000', '5000+']
+                likes_binned = pd.cut(likes_data, bins=bins, labels=labels, include_lowest=True)
+                likes_dist = likes_binned.value_counts()
+                chart_data["likes_distribution"] = {
+                    "labels": likes_dist.index.tolist(),
+                    "data": likes_dist.values.tolist()
+                }
+            except:
+                pass
+        
+        # 标题长度分布
+        if 'title' in data.columns:
+            title_lengths = data['title'].str.len()
+            bins = [0, 10, 20, 30, 50, float('inf')]
+            labels = ['0-10', '11-20', '21-30', '31-50', '50+']
+            length_binned = pd.cut(title_lengths, bins=bins, labels=labels, include_lowest=True)
+            length_dist = length_binned.value_counts()
+            chart_data["title_length_distribution"] = {
+                "labels": length_dist.index.tolist(),
+                "data": length_dist.values.tolist()
+            }
+        
+        return chart_data
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地大模型替身服务
+实现OpenAI兼容的 /v1/chat/completions（流式和非流式），用于压测和延迟测试，不消耗DeepSeek额度。
+可配置首token延迟分布、生成速度、错误率和429限流注入，并模拟提示词前缀缓存（返回 prompt_cache_hit_tokens）。
+
+用法:
+  python benchmarks/llm_stub_server.py --port 8765 --latency 0.5 --tokens-per-second 50
+  DEEPSEEK_API_BASE=http://127.0.0.1:8765 DEEPSEEK_API_KEY=stub python main.py analyze -f data/xxx.csv -t ai
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_analyzer.tokens import estimate_tokens
+
+# 模拟生成的文本（每个字约1个token）
+FILLER_TEXT = (
+    "从数据来看，高互动内容集中在实用型话题，标题普遍包含数字和明确的收益点。"
+    "头部作者发帖频率稳定，互动率明显高于平均水平。"
+    "建议围绕细分场景持续输出，保持固定的更新节奏，并结合热点话题提升曝光。"
+)
+
+# 前缀缓存以64个token为单位命中（与DeepSeek一致）
+CACHE_BLOCK_TOKENS = 64
+
+
+class StubLLMServer:
+    """
+    大模型替身服务
+    :param latency: 首token延迟（秒）的均值
+    :param latency_dist: 延迟分布 fixed / uniform / exponential / lognormal
+    :param tokens_per_second: 生成速度（token/秒，0表示不限速）
+    :param completion_tokens: 每次生成的token数（不超过请求的max_tokens）
+    :param error_rate: 返回500的概率
+    :param rate_limit_rate: 返回429的概率
+    :param retry_after: 429响应的Retry-After（秒）
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, latency: float = 0.5,
+                 latency_dist: str = 'lognormal', tokens_per_second: float = 50,
+                 completion_tokens: int = 200, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1, seed: int = None):
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._prefixes = set()
+        self._inflight = 0
+        self.counters = {'requests': 0, 'ok': 0, 'errors': 0, 'rate_limited': 0,
+                         'stream': 0, 'max_inflight': 0}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubLLMServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self) -> None:
+        self.httpd.serve_forever()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, inflight=self._inflight)
+
+    def _count(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += delta
+
+    def _sample_latency(self) -> float:
+        with self._lock:
+            if self.latency <= 0 or self.latency_dist == 'fixed':
+                return max(self.latency, 0)
+            if self.latency_dist == 'uniform':
+                return self.random.uniform(0, 2 * self.latency)
+            if self.latency_dist == 'exponential':
+                return self.random.expovariate(1 / self.latency)
+            # 对数正态：均值为latency，长尾明显
+            sigma = 0.5
+            return self.random.lognormvariate(0, sigma) * self.latency / math.exp(sigma ** 2 / 2)
+
+    def _roll(self, probability: float) -> bool:
+        with self._lock:
+            return probability > 0 and self.random.random() < probability
+
+    def _usage(self, messages: list, completion_tokens: int) -> dict:
+        """估算token用量；系统提示重复出现时按64 token为单位计入前缀缓存命中"""
+        prompt_tokens = sum(estimate_tokens(m.get('content', '')) for m in messages)
+        cached = 0
+        if messages and messages[0].get('role') == 'system':
+            system = messages[0].get('content', '')
+            with self._lock:
+                if system in self._prefixes:
+                    cached = estimate_tokens(system) // CACHE_BLOCK_TOKENS * CACHE_BLOCK_TOKENS
+                self._prefixes.add(system)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+            'prompt_cache_hit_tokens': cached,
+            'prompt_cache_miss_tokens': prompt_tokens - cached
+        }
+
+    def _tokens(self, count: int) -> list:
+        return [FILLER_TEXT[i % len(FILLER_TEXT)] for i in range(count)]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/stats':
+                    self._send_json(200, server.stats())
+                else:
+                    self._send_json(404, {'error': {'message': 'not found'}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                raw = self.rfile.read(length)
+                if self.path.rstrip('/') != '/v1/chat/completions':
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    self._send_json(400, {'error': {'message': 'invalid json'}})
+                    return
+
+                server._count('requests')
+                with server._lock:
+                    server._inflight += 1
+                    server.counters['max_inflight'] = max(server.counters['max_inflight'], server._inflight)
+                try:
+                    self._complete(request)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server._lock:
+                        server._inflight -= 1
+
+            def _complete(self, request: dict) -> None:
+                if server._roll(server.rate_limit_rate):
+                    server._count('rate_limited')
+                    self._send_json(429, {'error': {'message': 'rate limited'}},
+                                    {'Retry-After': str(server.retry_after)})
+                    return
+
+                time.sleep(server._sample_latency())
+
+                if server._roll(server.error_rate):
+                    server._count('errors')
+                    self._send_json(500, {'error': {'message': 'injected server error'}})
+                    return
+
+                messages = request.get('messages') or []
+                count = min(server.completion_tokens, int(request.get('max_tokens') or server.completion_tokens))
+                tokens = server._tokens(count)
+                usage = server._usage(messages, count)
+                delay = 1 / server.tokens_per_second if server.tokens_per_second > 0 else 0
+                meta = {
+                    'id': f"chatcmpl-stub-{time.time_ns()}",
+                    'created': int(time.time()),
+                    'model': request.get('model', 'stub')
+                }
+
+                if request.get('stream'):
+                    server._count('stream')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/event-stream')
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.send_header('Connection', 'close')
+                    self.end_headers()
+                    for token in tokens:
+                        chunk = dict(meta, object='chat.completion.chunk',
+                                     choices=[{'index': 0, 'delta': {'content': token}, 'finish_reason': None}])
+                        self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(delay)
+                    final = dict(meta, object='chat.completion.chunk',
+                                 choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+                    self.wfile.write(f"data: {json.dumps(final)}\n\n".encode('utf-8'))
+                    if (request.get('stream_options') or {}).get('include_usage'):
+                        tail = dict(meta, object='chat.completion.chunk', choices=[], usage=usage)
+                        self.wfile.write(f"data: {json.dumps(tail)}\n\n".encode('utf-8'))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                    self.close_connection = True
+                else:
+                    time.sleep(delay * count)
+                    self._send_json(200, dict(
+                        meta,
+                        object='chat.completion',
+                        choices=[{
+                            'index': 0,
+                            'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                            'finish_reason': 'stop'
+                        }],
+                        usage=usage
+                    ))
+                server._count('ok')
+
+        return Handler
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """替身服务参数（供基准脚本复用）"""
+    parser.add_argument('--latency', type=float, default=0.5, help='首token延迟均值（秒，默认: 0.5）')
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'exponential', 'lognormal'],
+                        default='lognormal', help='延迟分布 (默认: lognormal)')
+    parser.add_argument('--tokens-per-second', type=float, default=50, help='生成速度 (默认: 50 token/秒)')
+    parser.add_argument('--completion-tokens', type=int, default=200, help='每次生成的token数 (默认: 200)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回500的概率 (默认: 0)')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='返回429的概率 (默认: 0)')
+    parser.add_argument('--retry-after', type=float, default=1, help='429响应的Retry-After秒数 (默认: 1)')
+    parser.add_argument('--seed', type=int, help='随机种子')
+
+
+def server_from_args(args, host: str = '127.0.0.1', port: int = 0) -> StubLLMServer:
+    return StubLLMServer(
+        host=host, port=port,
+        latency=args.latency,
+        latency_dist=args.latency_dist,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地大模型替身服务（OpenAI兼容）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    print(f"🧪 大模型替身服务已启动: {server.api_base}")
+    print(f"   设置 DEEPSEEK_API_BASE={server.api_base} 即可使用")
+    print(f"   运行统计: {server.api_base}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 服务已停止")
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,17 @@ class Config:
     # DeepSeek API配置
     DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY', '')
     DEEPSEEK_API_BASE = os.getenv('DEEPSEEK_API_BASE', 'https://api.deepseek.com')
+    DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
+    
+    # DeepSeek客户端配置
+    LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', 10))  # 连接超时（秒）
+    LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', 120))       # 读取超时（秒）
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 3))             # 429/5xx最大重试次数
+    LLM_BACKOFF_BASE = 1.0    # 指数退避基数（秒）
+    LLM_BACKOFF_MAX = 30.0    # 单次重试最长等待（秒）
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 10))                # 连接池大小
+    LLM_CIRCUIT_FAILURE_THRESHOLD = 5   # 连续失败多少次后熔断
+    LLM_CIRCUIT_RESET_TIMEOUT = 60      # 熔断后多久尝试恢复（秒）
     
     # 小红书配置
     XHS_BASE_URL = 'https://www.xiaohongshu.com'
@@ -15,6 +26,7 @@ class Config:
     # 爬虫配置
     CRAWLER_DELAY = 2  # 请求间隔（秒）
     MAX_RETRIES = 3    # 最大重试次数
+    CRAWL_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # crawl_time字段格式
     USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     
     # Selenium配置
@@ -32,12 +44,99 @@ class Config:
     DATA_DIR = 'data'
     TEMPLATES_DIR = 'templates'
     STATIC_DIR = 'static'
+    DATA_FORMAT = os.getenv('DATA_FORMAT', 'csv')  # 爬取数据保存格式：csv / parquet / arrow（后两者需要pyarrow）
+    ARROW_MAPPED_MAX_FILES = 8  # 进程内保持内存映射的Arrow文件数上限（按最近最少使用关闭）
+    PARQUET_COMPRESSION = 'zstd'  # Parquet压缩算法
+    ARROW_COMPRESSION = 'uncompressed'  # Arrow IPC（Feather）压缩算法，不压缩时分析可直接内存映射零拷贝读取
+    WAREHOUSE_ENABLED = os.getenv('WAREHOUSE_ENABLED', 'True').lower() == 'true'  # 爬取结果同时写入笔记数据仓库
+    WAREHOUSE_PATH = os.path.join(DATA_DIR, 'cache', 'warehouse.sqlite3')
+    
+    # 后台爬取任务配置
+    CRAWL_JOBS_PATH = os.path.join(DATA_DIR, 'cache', 'crawl_jobs.sqlite3')
+    CRAWL_JOB_WORKERS = int(os.getenv('CRAWL_JOB_WORKERS', 1))         # 同时执行的爬取任务数（每个任务一个浏览器）
+    CRAWL_JOB_QUEUE_SIZE = int(os.getenv('CRAWL_JOB_QUEUE_SIZE', 10))  # 排队和执行中的任务上限，超出时返回429
+    CRAWL_JOB_HISTORY = 200                                            # 保留的已结束任务数
+    CRAWL_JOB_KEEPALIVE = 15                                           # 进度流没有新消息时发送保活注释的间隔（秒）
+    
+    # 数据归档配置
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False').lower() == 'true'  # Web服务后台定期归档（归档后删除原文件，需手动开启）
+    ARCHIVE_DIR = os.path.join(DATA_DIR, 'archive')
+    ARCHIVE_FORMAT = 'parquet'        # 归档分区文件格式（需要pyarrow）
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', 6 * 60 * 60))  # 后台归档间隔（秒）
+    ARCHIVE_MIN_AGE_HOURS = float(os.getenv('ARCHIVE_MIN_AGE_HOURS', 24))  # 只归档修改时间早于此的数据文件
+    ARCHIVE_MAX_FILE_BYTES = 64 * 1024 * 1024  # 超过该大小的数据文件不归档
+    ARCHIVE_RETENTION_DAYS = int(os.getenv('ARCHIVE_RETENTION_DAYS', 0))  # 归档分区保留天数（0 为永久保留）
+    ANALYSIS_RETENTION_DAYS = int(os.getenv('ANALYSIS_RETENTION_DAYS', 0))  # 分析结果文件保留天数（0 为永久保留）
+    CATALOG_PATH = os.path.join(DATA_DIR, 'cache', 'catalog.sqlite3')  # 数据目录文件清单
+    CATALOG_PAGE_SIZE = 100           # 文件列表每页条数（默认）
     
     # AI分析配置
     MAX_TOKENS = 4000
     TEMPERATURE = 0.7
     ANALYSIS_TEMPLATE = 'templates/analysis_template.md'
+    PROMPT_DATA_TOKENS = MAX_TOKENS  # 提示词中数据部分（聚合指标+代表性笔记）的token预算
+    AI_ANALYSIS_MODE = os.getenv('AI_ANALYSIS_MODE', 'single')  # single / map_reduce / dimensions
+    AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 4))  # 并发请求上限
+    AI_CHUNK_TOKENS = 6000     # map_reduce 模式每个分片的token预算
+    AI_MAX_CHUNKS = 32         # 分片数上限，超出时按行均匀抽样
+    AI_MAP_MAX_TOKENS = 600    # 分片摘要的最大生成长度
+    AI_DIMENSION_MAX_TOKENS = 1000  # dimensions 模式每个维度的最大生成长度
+    
+    # 分块分析配置（超大数据文件）
+    ANALYSIS_CHUNK_SIZE = int(os.getenv('ANALYSIS_CHUNK_SIZE', 200000))  # 每次读取的行数
+    ANALYSIS_CHUNKED_MIN_BYTES = int(os.getenv('ANALYSIS_CHUNKED_MIN_BYTES', 256 * 1024 * 1024))  # 超过该大小自动分块分析
+    ANALYSIS_LOAD_WORKERS = int(os.getenv('ANALYSIS_LOAD_WORKERS', os.cpu_count() or 4))  # 多文件分析时并行读取的线程数
+    BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', os.cpu_count() or 4))  # 批量分析的进程数
+    ANALYSIS_SAMPLE_POOL = 2000          # 分块分析时为AI提示保留的代表性笔记候选数
+    ANALYSIS_AUTHOR_CAPACITY = 10000     # 分块分析时跟踪发帖数的作者数上限（作者数不超过时结果精确）
+    KEYWORD_CHUNK_VOCAB = 100000         # 分块分析时合并后保留的n-gram词条数上限
+    
+    # 近似统计配置
+    ANALYSIS_APPROXIMATE = os.getenv('ANALYSIS_APPROXIMATE', 'False').lower() == 'true'  # 分位数和作者数用草图估计
+    SKETCH_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'sketches')
+    SKETCH_RELATIVE_ACCURACY = 0.01      # 点赞分位数草图的相对误差
+    SKETCH_HLL_PRECISION = 14            # HyperLogLog寄存器数 2^14（作者数标准误差约0.8%）
+    SKETCH_CACHE_TTL = int(os.getenv('SKETCH_CACHE_TTL', 30 * 24 * 60 * 60))  # 草图多久未访问后删除（秒）
+    SKETCH_CACHE_MAX_ENTRIES = 1000
     
+    # 关键词提取配置
+    KEYWORD_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'keywords')
+    KEYWORD_CACHE_TTL = int(os.getenv('KEYWORD_CACHE_TTL', 7 * 24 * 60 * 60))  # 过期时间（秒）
+    KEYWORD_CACHE_MAX_ENTRIES = 500
+    KEYWORD_CACHE_MAX_BYTES = 100 * 1024 * 1024  # 100MB
+    KEYWORD_NGRAM_MIN = 2               # 中文n-gram最短长度
+    KEYWORD_NGRAM_MAX = 4               # 中文n-gram最长长度
+    KEYWORD_BACKGROUND_MAX_FILES = 50   # 背景语料最多使用最近的多少个历史数据文件
+    KEYWORD_BACKGROUND_VOCAB = 20000    # 每个历史数据文件保留的词条数上限
+    KEYWORD_BACKGROUND_MEMO_SIZE = 4    # 内存中保留的合并背景语料份数（按最近使用淘汰）
+    
+    # 分析结果缓存配置
+    ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'True').lower() == 'true'
+    ANALYSIS_CACHE_DIR = os.path.join(DATA_DIR, 'cache', 'analysis')
+    ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 24 * 60 * 60))  # 过期时间（秒）
+    ANALYSIS_CACHE_MAX_ENTRIES = 200
+    ANALYSIS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+    ANALYSIS_CACHE_HASH_MEMO_SIZE = 1024  # 内存中记忆内容哈希的文件数（按最近使用淘汰）
+    
+    # 数据集内存缓存配置（Web服务进程内按文件路径、大小和修改时间缓存已解析的数据）
+    DATASET_CACHE_ENABLED = os.getenv('DATASET_CACHE_ENABLED', 'True').lower() == 'true'
+    DATASET_CACHE_MAX_BYTES = int(os.getenv('DATASET_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # 512MB
+    
+    # 大模型响应缓存配置
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True').lower() == 'true'
+    LLM_CACHE_PATH = os.path.join(DATA_DIR, 'cache', 'llm_cache.sqlite3')
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 60 * 60))  # 过期时间（秒）
+    LLM_CACHE_MAX_ENTRIES = 1000
+    LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 50MB
+
+    # Token用量记录配置
+    LLM_USAGE_LOG_ENABLED = os.getenv('LLM_USAGE_LOG_ENABLED', 'True').lower() == 'true'
+    LLM_USAGE_LOG_PATH = os.path.join(DATA_DIR, 'cache', 'llm_usage.sqlite3')
+    # 单价（元/百万token），用于估算费用和缓存节省
+    LLM_PRICE_INPUT_CACHE_HIT = float(os.getenv('LLM_PRICE_INPUT_CACHE_HIT', 0.5))
+    LLM_PRICE_INPUT_CACHE_MISS = float(os.getenv('LLM_PRICE_INPUT_CACHE_MISS', 2))
+    LLM_PRICE_OUTPUT = float(os.getenv('LLM_PRICE_OUTPUT', 8))
+
     # 文件配置
     CSV_ENCODING = 'utf-8-sig'
     JSON_ENCODING = 'utf-8'
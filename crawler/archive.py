@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import glob
+import shutil
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.catalog import default_catalog, record_file
+from crawler.storage import data_extension, is_data_file, parse_crawl_file_name, read_dataset, write_dataset
+
+# 同一进程内的归档操作串行执行（后台定时归档与手动触发可能同时发生）
+_archive_lock = threading.Lock()
+
+
+class CrawlArchive:
+    """
+    爬取数据归档
+    把数据目录中较早的小数据文件按 主题/日期 合并为压缩的列式分区文件
+    （archive/topic=<主题>/date=<YYYY-MM-DD>/part.parquet），原文件删除；
+    分区的行数、大小、来源文件和时间范围记录在清单 manifest.json 中，
+    查询时先按主题和日期范围从清单中筛选分区，只读取命中的分区文件
+    """
+
+    SOURCE_COLUMN = 'crawl_file'  # 归档数据中记录来源文件名的字段
+
+    def __init__(self, archive_dir: str = None):
+        self.config = Config()
+        self.archive_dir = archive_dir or self.config.ARCHIVE_DIR
+        self.manifest_path = os.path.join(self.archive_dir, 'manifest.json')
+
+    def load_manifest(self) -> Dict[str, Any]:
+        """读取归档清单"""
+        if not os.path.exists(self.manifest_path):
+            return {'partitions': {}, 'compacted_at': None}
+        with open(self.manifest_path, 'r', encoding=self.config.JSON_ENCODING) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding=self.config.JSON_ENCODING) as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _partition_dir(self, topic: str, date: str) -> str:
+        safe_topic = ''.join('_' if c in '/\\:' else c for c in topic)
+        return os.path.join(f"topic={safe_topic}", f"date={date}")
+
+    def candidates(self, now: datetime = None) -> Dict[Tuple[str, str], List[str]]:
+        """
+        待归档的数据文件，按 (主题, 日期) 分组
+        只归档爬虫保存的文件中修改时间早于 ARCHIVE_MIN_AGE_HOURS、不超过 ARCHIVE_MAX_FILE_BYTES 的文件
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(hours=self.config.ARCHIVE_MIN_AGE_HOURS)).timestamp()
+        groups = {}
+        if not os.path.isdir(self.config.DATA_DIR):
+            return groups
+        for name in sorted(os.listdir(self.config.DATA_DIR)):
+            info = parse_crawl_file_name(name) if is_data_file(name) else None
+            if not info:
+                continue
+            path = os.path.join(self.config.DATA_DIR, name)
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff or stat.st_size > self.config.ARCHIVE_MAX_FILE_BYTES:
+                continue
+            groups.setdefault((info['topic'], info['crawled_at'][:10]), []).append(path)
+        return groups
+
+    def _compact_partition(self, manifest: Dict[str, Any], topic: str, date: str, paths: List[str]) -> None:
+        """把数据文件合并进分区（重写分区文件；之前归档过的同名来源文件以本次为准）"""
+        key = f"{topic}/{date}"
+        entry = manifest['partitions'].get(key)
+        names = [os.path.basename(path) for path in paths]
+
+        frames = []
+        if entry:
+            existing = read_dataset(os.path.join(self.archive_dir, entry['path']))
+            frames.append(existing[~existing[self.SOURCE_COLUMN].isin(names)])
+        for path, name in zip(paths, names):
+            df = read_dataset(path)
+            df[self.SOURCE_COLUMN] = name
+            frames.append(df)
+        data = pd.concat(frames, ignore_index=True)
+
+        data_format = self.config.ARCHIVE_FORMAT
+        relative = os.path.join(self._partition_dir(topic, date), f"part{data_extension(data_format)}")
+        path = os.path.join(self.archive_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_dataset(data, path, data_format)
+
+        sources = sorted(set(entry['sources'] if entry else []) | set(names))
+        crawl_times = [parse_crawl_file_name(name)['crawled_at'] for name in sources]
+        manifest['partitions'][key] = {
+            'topic': topic,
+            'date': date,
+            'path': relative,
+            'format': data_format,
+            'rows': len(data),
+            'bytes': os.path.getsize(path),
+            'sources': sources,
+            'first_crawl': min(crawl_times),
+            'last_crawl': max(crawl_times),
+            'updated_at': datetime.now().strftime(self.config.CRAWL_TIME_FORMAT)
+        }
+
+    def compact(self, now: datetime = None) -> Dict[str, Any]:
+        """
+        归档一次：合并待归档的数据文件，再按保留期删除过期的分区和分析结果
+        清单写入后才删除原文件，中途失败时原文件保留，下次归档会替换分区中的同名来源
+        """
+        now = now or datetime.now()
+        result = {'archived': [], 'partitions': [], 'failed': {}, 'expired_partitions': [], 'expired_analyses': []}
+        with _archive_lock:
+            manifest = self.load_manifest()
+            for (topic, date), paths in self.candidates(now).items():
+                try:
+                    self._compact_partition(manifest, topic, date, paths)
+                    result['archived'].extend(paths)
+                    result['partitions'].append(f"{topic}/{date}")
+                except Exception as e:
+                    result['failed'][f"{topic}/{date}"] = str(e)
+
+            result['expired_partitions'] = self._expire_partitions(manifest, now)
+            manifest['compacted_at'] = now.strftime(self.config.CRAWL_TIME_FORMAT)
+            self._save_manifest(manifest)
+
+            for path in result['archived']:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # 归档期间已被删除
+                except OSError as e:
+                    print(f"删除已归档的数据文件失败 {path}: {e}")
+                record_file(path)
+            result['expired_analyses'] = self._expire_analyses(now)
+        return result
+
+    def _expire_partitions(self, manifest: Dict[str, Any], now: datetime) -> List[str]:
+        """删除早于 ARCHIVE_RETENTION_DAYS 的分区（0 表示永久保留）"""
+        if self.config.ARCHIVE_RETENTION_DAYS <= 0:
+            return []
+        cutoff = (now - timedelta(days=self.config.ARCHIVE_RETENTION_DAYS)).strftime('%Y-%m-%d')
+        expired = [key for key, entry in manifest['partitions'].items() if entry['date'] < cutoff]
+        for key in expired:
+            entry = manifest['partitions'].pop(key)
+            partition_dir = os.path.join(self.archive_dir, os.path.dirname(entry['path']))
+            shutil.rmtree(partition_dir, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(partition_dir))  # 主题下已没有分区时一并删除
+            except OSError:
+                pass
+        return expired
+
+    def _expire_analyses(self, now: datetime) -> List[str]:
+        """删除早于 ANALYSIS_RETENTION_DAYS 的分析结果文件（0 表示永久保留）"""
+        if self.config.ANALYSIS_RETENTION_DAYS <= 0:
+            return []
+        cutoff = (now - timedelta(days=self.config.ANALYSIS_RETENTION_DAYS)).timestamp()
+        expired = []
+        for path in glob.glob(os.path.join(self.config.DATA_DIR, 'analysis_*.json')):
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                record_file(path)
+                expired.append(path)
+        return expired
+
+    def partitions(self, topic: str = None, start: str = None, end: str = None) -> List[Dict[str, Any]]:
+        """
+        按主题和日期范围（YYYY-MM-DD，含两端）从清单中筛选分区
+        """
+        start = start[:10] if start else None
+        end = end[:10] if end else None
+        return sorted(
+            (entry for entry in self.load_manifest()['partitions'].values()
+             if (topic is None or entry['topic'] == topic)
+             and (start is None or entry['date'] >= start)
+             and (end is None or entry['date'] <= end)),
+            key=lambda entry: (entry['date'], entry['topic'])
+        )
+
+    def scan(self, topic: str = None, start: str = None, end: str = None, columns: List[str] = None) -> pd.DataFrame:
+        """读取命中的分区（只读取 columns 指定的列）"""
+        frames = [
+            read_dataset(os.path.join(self.archive_dir, entry['path']), columns)
+            for entry in self.partitions(topic, start, end)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        return pd.concat(frames, ignore_index=True)
+
+    def export(self, topic: str = None, start: str = None, end: str = None,
+               filename: str = None, data_format: str = None) -> str:
+        """把查询结果导出为数据目录中的数据文件（可直接用于分析）"""
+        data = self.scan(topic, start, end)
+        if data.empty:
+            raise ValueError("没有符合条件的归档数据")
+        if not filename:
+            span = '-'.join(d.replace('-', '') for d in (start, end) if d) or 'all'
+            filename = f"xhs_{topic or 'archive'}_archive_{span}{data_extension(data_format)}"
+        os.makedirs(self.config.DATA_DIR, exist_ok=True)
+        path = write_dataset(data, os.path.join(self.config.DATA_DIR, filename), data_format)
+        record_file(path, len(data), list(data.columns))
+        return path
+
+
+def find_data_files(topic: str = None, start: str = None, end: str = None) -> List[str]:
+    """
+    主题和日期范围（YYYY-MM-DD，含两端）内的全部爬取数据：已归档的分区和数据目录中尚未归档的文件，按时间排序
+    """
+    catalog = default_catalog()
+    catalog.refresh()
+    archive = CrawlArchive()
+    found = [(entry['first_crawl'], os.path.join(archive.archive_dir, entry['path']))
+             for entry in archive.partitions(topic, start, end)]
+    found += [(entry['crawled_at'], entry['path']) for entry in catalog.find_data_files(topic, start, end)]
+    return [path for _, path in sorted(found)]
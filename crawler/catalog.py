@@ -0,0 +1,352 @@
+import os
+import csv
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog为可选依赖，没有时按数据目录的修改时间判断是否需要重新扫描
+    FileSystemEventHandler = object
+    Observer = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.storage import data_format_of, is_data_file, parse_crawl_file_name
+
+# 文件类型：爬取数据文件 / 分析结果文件
+DATA_KIND = 'data'
+ANALYSIS_KIND = 'analysis'
+
+
+def file_kind(name: str) -> Optional[str]:
+    """目录中的文件属于哪一类（不需要编目的文件返回None）"""
+    if is_data_file(name):
+        return DATA_KIND
+    if name.endswith('.json'):
+        return ANALYSIS_KIND
+    return None
+
+
+class _DirtyHandler(FileSystemEventHandler):
+    """文件系统事件只记录变化的文件名，下次查询列表时再更新这些文件的记录"""
+
+    def __init__(self, catalog: 'DataCatalog'):
+        self.catalog = catalog
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path and os.path.dirname(os.path.abspath(path)) == self.catalog.data_dir:
+                self.catalog.invalidate(os.path.basename(path))
+
+
+class DataCatalog:
+    """
+    数据目录的文件清单（SQLite）
+    记录每个数据文件和分析结果文件的大小、修改时间、行数、主题和字段，
+    按类型、主题和修改时间建索引，文件列表按游标分页从索引读取，耗时只与页大小有关。
+    程序写入文件时直接更新清单；其他途径的变化由文件监视（watchdog）标记，
+    没有安装watchdog时在数据目录修改时间变化后重新对比目录
+    （因此程序自身的SQLite数据库都放在 data/cache/ 下，读写数据库不会改变数据目录的修改时间）
+    """
+
+    def __init__(self, db_path: str = None, data_dir: str = None):
+        self.config = Config()
+        self.db_path = db_path or self.config.CATALOG_PATH
+        self.data_dir = os.path.abspath(data_dir or self.config.DATA_DIR)
+        self._initialized = False
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._observer = None
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS files (
+                    name TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    format TEXT,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    rows INTEGER,
+                    topic TEXT,
+                    crawled_at TEXT,
+                    schema TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_kind_mtime ON files(kind, mtime, name);
+                CREATE INDEX IF NOT EXISTS idx_files_topic_mtime ON files(kind, topic, mtime, name);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            ''')
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _describe(self, name: str, rows: int = None, columns: List[str] = None) -> Optional[Dict[str, Any]]:
+        """读取文件的元数据（行数和字段未给出时从文件中读取：列式格式只读元数据，CSV逐行计数）"""
+        kind = file_kind(name)
+        path = os.path.join(self.data_dir, name)
+        if kind is None or not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        info = parse_crawl_file_name(name) or {}
+        entry = {
+            'name': name,
+            'kind': kind,
+            'format': data_format_of(name) if kind == DATA_KIND else 'json',
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'rows': rows,
+            'topic': info.get('topic'),
+            'crawled_at': info.get('crawled_at'),
+            'schema': columns
+        }
+        if columns is None or (rows is None and kind == DATA_KIND):
+            try:
+                entry['rows'], entry['schema'] = self._read_shape(path, entry['format'])
+            except Exception as e:
+                print(f"读取文件信息失败 {name}: {e}")
+        return entry
+
+    def _read_shape(self, path: str, data_format: str) -> Tuple[Optional[int], Optional[List[str]]]:
+        if data_format == 'json':
+            with open(path, 'r', encoding=self.config.JSON_ENCODING) as f:
+                data = json.load(f)
+            return None, list(data) if isinstance(data, dict) else None
+        if data_format == 'parquet' and pq is not None:
+            metadata = pq.read_metadata(path)
+            return metadata.num_rows, metadata.schema.to_arrow_schema().names
+        if data_format == 'arrow' and pa is not None:
+            with pa.memory_map(path, 'r') as source:
+                reader = pa.ipc.open_file(source)
+                return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches)), reader.schema.names
+        with open(path, 'r', encoding=self.config.CSV_ENCODING, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            return sum(1 for _ in reader), header
+
+    def _upsert(self, conn: sqlite3.Connection, entry: Dict[str, Any]) -> None:
+        conn.execute('''
+            INSERT OR REPLACE INTO files(name, kind, format, size, mtime, rows, topic, crawled_at, schema)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (entry['name'], entry['kind'], entry['format'], entry['size'], entry['mtime'], entry['rows'],
+              entry['topic'], entry['crawled_at'], json.dumps(entry['schema'], ensure_ascii=False)))
+
+    def record(self, path: str, rows: int = None, columns: List[str] = None) -> None:
+        """写入文件后更新清单（数据目录之外的文件忽略）"""
+        if os.path.dirname(os.path.abspath(path)) != self.data_dir:
+            return
+        name = os.path.basename(path)
+        entry = self._describe(name, rows, columns)
+        conn = self._connect()
+        try:
+            with conn:
+                if entry:
+                    self._upsert(conn, entry)
+                else:
+                    conn.execute('DELETE FROM files WHERE name = ?', (name,))
+        finally:
+            conn.close()
+
+    def invalidate(self, name: str) -> None:
+        """标记文件已变化（下次查询前更新）"""
+        with self._dirty_lock:
+            self._dirty.add(name)
+
+    def sync(self) -> Dict[str, int]:
+        """
+        与数据目录完整对比一次：新增和大小/修改时间变化的文件重新读取信息，已删除的文件移出清单
+        """
+        conn = self._connect()
+        try:
+            known = {name: (size, mtime) for name, size, mtime in conn.execute('SELECT name, size, mtime FROM files')}
+            seen, changed = set(), []
+            directory_mtime = os.stat(self.data_dir).st_mtime_ns if os.path.isdir(self.data_dir) else 0
+            for item in (os.scandir(self.data_dir) if directory_mtime else []):
+                if not item.is_file() or file_kind(item.name) is None:
+                    continue
+                seen.add(item.name)
+                stat = item.stat()
+                if known.get(item.name) != (stat.st_size, stat.st_mtime):
+                    changed.append(item.name)
+            removed = set(known) - seen
+            with conn:
+                for name in changed:
+                    entry = self._describe(name)
+                    if entry:
+                        self._upsert(conn, entry)
+                conn.executemany('DELETE FROM files WHERE name = ?', [(name,) for name in removed])
+                conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('directory_mtime', ?)",
+                             (str(directory_mtime),))
+            return {'changed': len(changed), 'removed': len(removed)}
+        finally:
+            conn.close()
+
+    def refresh(self) -> None:
+        """
+        查询前更新清单：
+        有文件监视时只更新被标记的文件；否则数据目录的修改时间变化（有文件新增、删除或改名）时完整对比
+        """
+        if self._observer is not None:
+            with self._dirty_lock:
+                dirty, self._dirty = self._dirty, set()
+            for name in dirty:
+                self.record(os.path.join(self.data_dir, name))
+            return
+
+        directory_mtime = os.stat(self.data_dir).st_mtime_ns if os.path.isdir(self.data_dir) else 0
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'directory_mtime'").fetchone()
+        finally:
+            conn.close()
+        if row is None or row[0] != str(directory_mtime):
+            self.sync()
+
+    def start_watcher(self) -> bool:
+        """启动文件监视（需要watchdog），启动前完整对比一次；返回是否已启动"""
+        if Observer is None or self._observer is not None:
+            return self._observer is not None
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.sync()
+        observer = Observer()
+        observer.schedule(_DirtyHandler(self), self.data_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    @staticmethod
+    def _filters(kind: str, topic: str = None, data_format: str = None,
+                 query: str = None) -> Tuple[List[str], List[Any]]:
+        conditions, params = ['kind = ?'], [kind]
+        if topic:
+            conditions.append('topic = ?')
+            params.append(topic)
+        if data_format:
+            conditions.append('format = ?')
+            params.append(data_format)
+        if query:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            params.append('%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        return conditions, params
+
+    def list_files(self, kind: str, topic: str = None, data_format: str = None, query: str = None,
+                   cursor: str = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        按修改时间从新到旧分页列出文件
+        :param cursor: 上一页返回的游标（从该位置之后继续，不使用OFFSET）
+        :return: (本页文件, 下一页游标；没有下一页时为None)
+        """
+        conditions, params = self._filters(kind, topic, data_format, query)
+        if cursor:
+            mtime, _, name = cursor.partition('|')
+            conditions.append('(mtime < ? OR (mtime = ? AND name < ?))')
+            params += [float(mtime), float(mtime), name]
+        conn = self._connect()
+        try:
+            rows = conn.execute(f'''
+                SELECT name, format, size, mtime, rows, topic, crawled_at, schema FROM files
+                WHERE {' AND '.join(conditions)}
+                ORDER BY mtime DESC, name DESC LIMIT ?
+            ''', params + [limit + 1]).fetchall()
+        finally:
+            conn.close()
+
+        files = [{
+            'name': name,
+            'path': os.path.join(self.config.DATA_DIR, name),
+            'format': data_format,
+            'size': size,
+            'modified': datetime.fromtimestamp(mtime).strftime(self.config.CRAWL_TIME_FORMAT),
+            'rows': rows,
+            'topic': topic,
+            'crawled_at': crawled_at,
+            'schema': json.loads(schema) if schema else None,
+            '_mtime': mtime
+        } for name, data_format, size, mtime, rows, topic, crawled_at, schema in rows[:limit]]
+        next_cursor = f"{files[-1]['_mtime']!r}|{files[-1]['name']}" if len(rows) > limit else None
+        for item in files:
+            del item['_mtime']
+        return files, next_cursor
+
+    def count(self, kind: str, topic: str = None, data_format: str = None, query: str = None) -> int:
+        """符合条件的文件数"""
+        conditions, params = self._filters(kind, topic, data_format, query)
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM files WHERE {' AND '.join(conditions)}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def find_data_files(self, topic: str = None, start: str = None, end: str = None) -> List[Dict[str, str]]:
+        """按主题和爬取日期范围（YYYY-MM-DD，含两端）查找爬虫保存的数据文件（按爬取时间排序）"""
+        conditions, params = ['kind = ?', 'crawled_at IS NOT NULL'], [DATA_KIND]
+        if topic:
+            conditions.append('topic = ?')
+            params.append(topic)
+        if start:
+            conditions.append('substr(crawled_at, 1, 10) >= ?')
+            params.append(start[:10])
+        if end:
+            conditions.append('substr(crawled_at, 1, 10) <= ?')
+            params.append(end[:10])
+        conn = self._connect()
+        try:
+            rows = conn.execute(f'''
+                SELECT name, crawled_at FROM files WHERE {' AND '.join(conditions)} ORDER BY crawled_at, name
+            ''', params).fetchall()
+        finally:
+            conn.close()
+        return [{'path': os.path.join(self.config.DATA_DIR, name), 'crawled_at': crawled_at} for name, crawled_at in rows]
+
+    def topics(self) -> List[str]:
+        """数据文件中出现的主题"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT DISTINCT topic FROM files WHERE kind = ? AND topic IS NOT NULL ORDER BY topic", (DATA_KIND,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def default_catalog() -> DataCatalog:
+    """进程内共用的文件清单（只建一次表）"""
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = DataCatalog()
+        return _default_catalog
+
+
+def record_file(path: str, rows: int = None, columns: List[str] = None) -> None:
+    """写入数据目录中的文件后更新文件清单（失败不影响文件本身）"""
+    try:
+        default_catalog().record(path, rows, columns)
+    except Exception as e:
+        print(f"更新文件清单失败: {e}")
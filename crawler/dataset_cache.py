@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.storage import read_dataset
+
+# 缓存返回浅拷贝，依赖写时复制保证调用方的原地修改（.loc 赋值、fillna(inplace=True) 等）不影响缓存的数据；
+# pandas 3 起始终开启，pandas 2.2 需要手动开启
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+
+class DatasetCache:
+    """
+    进程内的数据集缓存（LRU，按内存占用淘汰）
+    键为 (绝对路径, 读取的列)，每项记录文件的大小和修改时间，文件被改写后旧数据自动失效；
+    刚保存的爬取结果和反复分析的数据文件直接从内存返回，不再读取和解析文件
+    返回的是浅拷贝（pandas写时复制，导入时确保开启），调用方增删列或原地修改不影响缓存中的数据
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = Config.DATASET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        # 键 -> ((大小, 修改时间), DataFrame, 内存占用)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(path: str, columns: List[str] = None) -> Tuple[str, Optional[Tuple[str, ...]]]:
+        return os.path.abspath(path), tuple(columns) if columns is not None else None
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _remove(self, key) -> None:
+        _, _, size = self._entries.pop(key)
+        self.total_bytes -= size
+
+    def get(self, path: str, columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """读取缓存的数据（文件已改写或删除时视为未命中）"""
+        key = self._key(path, columns)
+        version = self._version(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1].copy(deep=False)
+            if entry:
+                self._remove(key)
+            self.misses += 1
+        return None
+
+    def put(self, path: str, df: pd.DataFrame, columns: List[str] = None) -> None:
+        """缓存文件的数据（超过容量上限的单个数据集不缓存），按最近最少使用淘汰直到总占用不超过上限"""
+        version = self._version(path)
+        if version is None:
+            return
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        key = self._key(path, columns)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            while self._entries and self.total_bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (version, df.copy(deep=False), size)
+            self.total_bytes += size
+
+    def load(self, path: str, columns: List[str] = None) -> pd.DataFrame:
+        """读取数据文件，优先从缓存返回"""
+        df = self.get(path, columns)
+        if df is None:
+            df = read_dataset(path, columns)
+            self.put(path, df, columns)
+        return df
+
+    def invalidate(self, path: str) -> None:
+        """删除文件的全部缓存（各种列组合）"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
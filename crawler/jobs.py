@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import uuid
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.xhs_crawler import CrawlCancelled, XHSCrawler
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """排队和执行中的爬取任务已达上限"""
+
+
+class CrawlJobQueue:
+    """
+    后台爬取任务队列
+    任务记录保存在SQLite（data/cache/crawl_jobs.sqlite3）中，由固定数量的工作线程按提交顺序执行，
+    每个工作线程使用独立的爬虫实例（各自的浏览器）；排队和执行中的任务总数不超过 CRAWL_JOB_QUEUE_SIZE，
+    超出时拒绝提交。服务重启后，未完成的任务（包括重启时正在执行的任务）重新排队执行
+    执行中任务的进度事件（含每条提取到的笔记）保存在内存中，供流式接口推送
+    """
+
+    EVENT_HISTORY = 20  # 内存中保留进度事件的已结束任务数
+
+    def __init__(self, db_path: str = None, workers: int = None, max_pending: int = None,
+                 crawler_factory: Callable[[], Any] = XHSCrawler):
+        self.config = Config()
+        self.db_path = db_path or self.config.CRAWL_JOBS_PATH
+        self.workers = workers or self.config.CRAWL_JOB_WORKERS
+        self.max_pending = max_pending or self.config.CRAWL_JOB_QUEUE_SIZE
+        self.crawler_factory = crawler_factory
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = {}  # 执行中的任务ID -> {'cancel': 取消标记, 'progress': 进度}
+        self._events = OrderedDict()  # 任务ID -> 进度事件列表（执行中和最近结束的任务）
+        self._changed = threading.Condition(self._lock)  # 有新的进度事件或任务结束时通知
+        self._threads = []
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    limit_count INTEGER NOT NULL,
+                    data_format TEXT,
+                    cookies TEXT,
+                    state TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, created_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+            ''')
+            conn.commit()
+            self._initialized = True
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _update(self, job_id: str, **fields) -> None:
+        for key in ('progress', 'result'):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], ensure_ascii=False)
+        assignments = ', '.join(f"{key} = ?" for key in fields)
+        conn = self._connect()
+        try:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime(Config.CRAWL_TIME_FORMAT)
+
+    def start(self) -> int:
+        """
+        启动工作线程（重复调用无效果），把上次运行时未完成的任务重新排队
+        :return: 重新排队的任务数
+        """
+        with self._lock:
+            if self._threads:
+                return 0
+            conn = self._connect()
+            try:
+                conn.execute('UPDATE jobs SET state = ?, started_at = NULL, progress = NULL WHERE state = ?',
+                             (QUEUED, RUNNING))
+                conn.commit()
+                pending = [row['id'] for row in conn.execute(
+                    'SELECT id FROM jobs WHERE state = ? ORDER BY created_at, rowid', (QUEUED,))]
+            finally:
+                conn.close()
+            for job_id in pending:
+                self._queue.put(job_id)
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"crawl-job-{i + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return len(pending)
+
+    def submit(self, topic: str, limit: int, cookies: str = None, data_format: str = None) -> Dict[str, Any]:
+        """
+        提交爬取任务
+        :raises QueueFullError: 排队和执行中的任务已达 CRAWL_JOB_QUEUE_SIZE
+        :return: 任务信息
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            try:
+                pending = conn.execute('SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)',
+                                       (QUEUED, RUNNING)).fetchone()[0]
+                if pending >= self.max_pending:
+                    raise QueueFullError(f"爬取任务队列已满（{pending} 个任务排队或执行中），请稍后再试")
+                conn.execute(
+                    'INSERT INTO jobs (id, topic, limit_count, data_format, cookies, state, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (job_id, topic, limit, data_format, cookies or None, QUEUED, self._now())
+                )
+                # 只保留最近的 CRAWL_JOB_HISTORY 个已结束任务
+                conn.execute(
+                    f'''DELETE FROM jobs WHERE state IN ({", ".join("?" * len(FINISHED_STATES))}) AND id NOT IN (
+                        SELECT id FROM jobs WHERE state IN ({", ".join("?" * len(FINISHED_STATES))})
+                        ORDER BY created_at DESC LIMIT ?)''',
+                    (*FINISHED_STATES, *FINISHED_STATES, self.config.CRAWL_JOB_HISTORY)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        self._queue.put(job_id)
+        return self.get(job_id)
+
+    def _to_job(self, row: sqlite3.Row, conn: sqlite3.Connection) -> Dict[str, Any]:
+        job = {
+            'id': row['id'],
+            'topic': row['topic'],
+            'limit': row['limit_count'],
+            'format': row['data_format'],
+            'state': row['state'],
+            'progress': json.loads(row['progress']) if row['progress'] else None,
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'cancel_requested': bool(row['cancel_requested']),
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+        running = self._running.get(row['id'])
+        if running:
+            job['progress'] = dict(running['progress'])
+        if row['state'] == QUEUED:
+            # 排在前面的任务数（0 表示下一个执行）
+            job['queue_position'] = conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE state = ? AND (created_at < ? OR (created_at = ? AND rowid < ?))',
+                (QUEUED, row['created_at'], row['created_at'], row['rowid'])
+            ).fetchone()[0]
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """任务信息（不存在时返回None）"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT rowid, * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            return self._to_job(row, conn) if row else None
+        finally:
+            conn.close()
+
+    def list_jobs(self, state: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """最近提交的任务（可按状态筛选）"""
+        conn = self._connect()
+        try:
+            if state:
+                rows = conn.execute('SELECT rowid, * FROM jobs WHERE state = ? ORDER BY created_at DESC LIMIT ?',
+                                    (state, limit)).fetchall()
+            else:
+                rows = conn.execute('SELECT rowid, * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+            return [self._to_job(row, conn) for row in rows]
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """各状态的任务数"""
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        finally:
+            conn.close()
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'queued': counts.get(QUEUED, 0),
+            'running': counts.get(RUNNING, 0),
+            'states': counts
+        }
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        取消任务：排队中的任务直接取消；执行中的任务设置取消标记，爬虫在下一次等待或提取笔记前结束并关闭浏览器
+        :return: 任务信息（不存在时返回None）
+        """
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return None
+            if job['state'] == QUEUED:
+                self._update(job_id, state=CANCELLED, cookies=None, finished_at=self._now())
+            elif job['state'] == RUNNING:
+                self._update(job_id, cancel_requested=1)
+                running = self._running.get(job_id)
+                if running:
+                    running['cancel'].set()
+        return self.get(job_id)
+
+    def wait_events(self, job_id: str, after: int = 0, timeout: float = 15.0) -> Optional[List[Dict[str, Any]]]:
+        """
+        任务的进度事件中序号大于 after 的部分；任务执行中且暂时没有新事件时最多等待 timeout 秒
+        :return: 事件列表 [{'id': 序号, 'event': 事件, 'data': 数据}]；任务尚未开始执行（或事件已不在内存中）时返回None
+        """
+        with self._changed:
+            events = self._events.get(job_id)
+            if events is not None and len(events) <= after and job_id in self._running:
+                self._changed.wait(timeout)
+            return None if events is None else events[after:]
+
+    def _work(self) -> None:
+        """工作线程：依次执行队列中的任务（爬虫实例在线程内复用）"""
+        crawler = self.crawler_factory()
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(crawler, job_id)
+            except Exception as e:
+                print(f"❌ 执行爬取任务 {job_id} 出错: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, crawler, job_id: str) -> None:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None or job['state'] != QUEUED:
+                return  # 排队期间已取消
+            conn = self._connect()
+            try:
+                cookies = conn.execute('SELECT cookies FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+            finally:
+                conn.close()
+            progress = {'stage': 'started', 'notes': 0, 'limit': job['limit'], 'updated_at': self._now()}
+            running = {'cancel': threading.Event(), 'progress': progress}
+            self._running[job_id] = running
+            events = self._events[job_id] = []
+            finished = [key for key in self._events if key not in self._running]
+            for key in finished[:max(0, len(finished) - self.EVENT_HISTORY)]:
+                del self._events[key]
+            self._update(job_id, state=RUNNING, started_at=self._now(), progress=progress)
+
+        def on_progress(event: str, data: Dict[str, Any]) -> None:
+            with self._changed:
+                progress['stage'] = event
+                if 'count' in data:
+                    progress['notes'] = data['count']
+                if 'attempt' in data:
+                    progress['attempt'] = data['attempt']
+                progress['updated_at'] = self._now()
+                events.append({'id': len(events) + 1, 'event': event, 'data': data})
+                self._changed.notify_all()
+
+        print(f"🕷️ 开始执行爬取任务 {job_id}: 主题={job['topic']}, 数量={job['limit']}")
+        crawler.cancel_event = running['cancel']
+        crawler.progress_callback = on_progress
+        fields = {}
+        try:
+            filepath = crawler.crawl_hot_notes(job['topic'], job['limit'], cookies, job['format'])
+            if filepath:
+                fields = {'state': SUCCEEDED, 'result': {
+                    'filepath': filepath,
+                    'filename': os.path.basename(filepath),
+                    'count': progress['notes']
+                }}
+            else:
+                fields = {'state': FAILED, 'error': '爬取失败，未获取到数据'}
+        except CrawlCancelled:
+            fields = {'state': CANCELLED}
+        except Exception as e:
+            fields = {'state': FAILED, 'error': str(e)}
+        finally:
+            crawler.cancel_event = None
+            crawler.progress_callback = None
+            with self._changed:
+                self._running.pop(job_id, None)
+                # 任务结束后不再保留cookies
+                self._update(job_id, **fields, progress=progress, cookies=None, finished_at=self._now())
+                self._changed.notify_all()
+        print(f"🕷️ 爬取任务 {job_id} 结束: {fields.get('state')}")
@@ -0,0 +1,229 @@
+import os
+import re
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow为可选依赖，只有Parquet/Arrow格式需要
+    pa = feather = pq = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+
+# 数据文件格式及扩展名
+FORMAT_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+EXTENSION_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+# 爬虫保存的数据文件名：xhs_<主题>_<YYYYmmdd>_<HHMMSS>.<扩展名>
+CRAWL_FILE_PATTERN = re.compile(r'^xhs_(?P<topic>.+)_(?P<date>\d{8})_(?P<time>\d{6})$')
+# 归档查询导出的数据文件名：xhs_<主题>_archive_<起止日期或all>.<扩展名>
+ARCHIVE_EXPORT_PATTERN = re.compile(r'^xhs_(?P<topic>.+)_archive_(?P<span>all|[\d-]+)$')
+
+# 点赞数文本："1234"、"1.2万"、"3k"
+LIKES_PATTERN = r'(?P<number>\d+(?:\.\d+)?)\s*(?P<unit>万|w|W|千|k|K)?'
+LIKES_UNITS = {'万': 10000, 'w': 10000, 'W': 10000, '千': 1000, 'k': 1000, 'K': 1000}
+
+# 已内存映射的Arrow文件（LRU）：绝对路径 -> ((大小, 修改时间), Table)
+_mapped_tables = OrderedDict()
+_mapped_lock = threading.Lock()
+
+
+def data_format_of(path: str) -> str:
+    """按扩展名判断数据文件格式（未知扩展名按CSV处理）"""
+    return EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+def data_extension(data_format: str = None) -> str:
+    """数据格式对应的文件扩展名"""
+    data_format = data_format or Config.DATA_FORMAT
+    if data_format not in FORMAT_EXTENSIONS:
+        raise ValueError(f"不支持的数据格式: {data_format}（可选: {', '.join(FORMAT_EXTENSIONS)}）")
+    return FORMAT_EXTENSIONS[data_format]
+
+
+def is_data_file(name: str) -> bool:
+    """是否为爬取数据文件"""
+    return os.path.splitext(name)[1].lower() in EXTENSION_FORMATS
+
+
+def parse_crawl_file_name(path: str) -> Optional[Dict[str, str]]:
+    """从爬虫保存的文件名中解析主题和爬取时间"""
+    match = CRAWL_FILE_PATTERN.match(os.path.splitext(os.path.basename(path))[0])
+    if not match:
+        return None
+    try:
+        crawled_at = datetime.strptime(match['date'] + match['time'], '%Y%m%d%H%M%S')
+    except ValueError:
+        return None
+    return {'topic': match['topic'], 'crawled_at': crawled_at.strftime(Config.CRAWL_TIME_FORMAT)}
+
+
+def is_archive_export(path: str) -> bool:
+    """是否为归档查询导出的数据文件（内容来自已归档的爬取数据）"""
+    return bool(ARCHIVE_EXPORT_PATTERN.match(os.path.splitext(os.path.basename(path))[0]))
+
+
+def parse_likes(values) -> pd.Series:
+    """
+    解析点赞数（浮点数，无法解析的为NaN）
+    按 "1.2万"、"3k" 等写法换算单位；数据仓库、分析报告、草图和分块聚合共用，同一笔记的点赞数处处一致。
+    点赞数取值大量重复，只解析去重后的取值
+    """
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    parts = pd.Series(np.asarray(uniques, dtype=object), dtype=object).astype(str).str.extract(LIKES_PATTERN)
+    parsed = pd.to_numeric(parts['number'], errors='coerce') * parts['unit'].map(LIKES_UNITS).fillna(1)
+    # 末尾的NaN供缺失值的编码 -1 取用
+    return pd.Series(np.append(parsed.to_numpy(dtype=float), np.nan)[codes], index=values.index)
+
+
+def _require_pyarrow(data_format: str) -> None:
+    if pa is None:
+        raise ValueError(f"{data_format} 格式需要安装 pyarrow")
+
+
+def typed_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    为列式存储整理字段类型
+    爬取时间转为时间戳；点赞数全为整数时存为整数，含 "1.2万" 等文本时保留原文；
+    其余字段为字符串（Parquet/Arrow 会对重复较多的作者等字段自动字典编码）
+    """
+    df = df.copy()
+    if 'crawl_time' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['crawl_time']):
+        parsed = pd.to_datetime(df['crawl_time'], format=Config.CRAWL_TIME_FORMAT, errors='coerce')
+        if parsed.notna().sum() == df['crawl_time'].notna().sum():
+            df['crawl_time'] = parsed
+    if 'likes' in df.columns and not pd.api.types.is_numeric_dtype(df['likes']):
+        parsed = pd.to_numeric(df['likes'], errors='coerce')
+        if parsed.notna().sum() == df['likes'].notna().sum() and (parsed.dropna() % 1 == 0).all():
+            df['likes'] = parsed.astype('int64' if parsed.notna().all() else 'Int64')
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].astype('str').where(df[column].notna())
+    return df
+
+
+def write_dataset(df: pd.DataFrame, path: str, data_format: str = None) -> str:
+    """按格式写入数据文件（默认按扩展名判断）"""
+    data_format = data_format or data_format_of(path)
+    if data_format == 'csv':
+        df.to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+        return path
+
+    _require_pyarrow(data_format)
+    if data_format not in ('parquet', 'arrow'):
+        raise ValueError(f"不支持的数据格式: {data_format}")
+    table = pa.Table.from_pandas(typed_frame(df), preserve_index=False)
+    # 先写临时文件再替换：正在被内存映射读取的旧文件保持不变，不会读到写了一半的内容
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if data_format == 'parquet':
+        pq.write_table(table, tmp_path, compression=Config.PARQUET_COMPRESSION)
+    else:
+        # 写成单个记录批：读取时数值列不需要跨批拼接，可以零拷贝转换为pandas列
+        feather.write_feather(table.combine_chunks(), tmp_path, compression=Config.ARROW_COMPRESSION,
+                              chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _schema_names(path: str, data_format: str) -> List[str]:
+    if data_format == 'parquet':
+        return pq.read_schema(path).names
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def _project(path: str, data_format: str, columns: Optional[List[str]]) -> Optional[List[str]]:
+    """只保留文件中存在的列（CSV之外的格式读取不存在的列会报错）"""
+    if columns is None:
+        return None
+    names = _schema_names(path, data_format)
+    return [c for c in columns if c in names]
+
+
+def read_dataset(path: str, columns: List[str] = None, dtype: Dict[str, str] = None) -> pd.DataFrame:
+    """
+    读取数据文件
+    :param columns: 只读取这些列（文件中没有的列忽略）；列式格式只解码所需的列
+    :param dtype: CSV的列类型（列式格式自带类型，忽略该参数）
+    """
+    data_format = data_format_of(path)
+    if data_format == 'csv':
+        usecols = (lambda column: column in columns) if columns is not None else None
+        return pd.read_csv(path, encoding=Config.CSV_ENCODING, usecols=usecols, dtype=dtype)
+
+    _require_pyarrow(data_format)
+    columns = _project(path, data_format, columns)
+    if data_format == 'parquet':
+        table = pq.read_table(path, columns=columns)
+    else:
+        table = open_mapped(path)
+        table = table.select(columns) if columns is not None else table
+    return table.to_pandas()
+
+
+def open_mapped(path: str) -> 'pa.Table':
+    """
+    内存映射打开Arrow IPC（Feather）文件
+    同一文件（路径、大小和修改时间相同）在进程内只映射一次，各次分析共享同一份只读数据，
+    数据由系统页缓存按需换入，不在进程内复制；未压缩的文件零拷贝，压缩的文件读取时需要解压到内存
+    最多保持 ARROW_MAPPED_MAX_FILES 个文件的映射，按最近最少使用淘汰；文件被改写或删除后旧映射随之丢弃
+    """
+    _require_pyarrow('arrow')
+    key = os.path.abspath(path)
+    version = _file_version(path)
+    with _mapped_lock:
+        entry = _mapped_tables.get(key)
+        if entry and entry[0] == version:
+            _mapped_tables.move_to_end(key)
+            return entry[1]
+        _mapped_tables.pop(key, None)
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    with _mapped_lock:
+        _mapped_tables[key] = (version, table)
+        for other, (other_version, _) in list(_mapped_tables.items()):
+            if other != key and _file_version(other) != other_version:
+                del _mapped_tables[other]
+        while len(_mapped_tables) > Config.ARROW_MAPPED_MAX_FILES:
+            _mapped_tables.popitem(last=False)
+    return table
+
+
+def _file_version(path: str) -> Optional[tuple]:
+    """文件的 (大小, 修改时间)，文件不存在时为None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def iter_dataset(path: str, columns: List[str] = None, chunksize: int = None,
+                 dtype: Dict[str, str] = None) -> Iterator[pd.DataFrame]:
+    """按 chunksize 行分块读取数据文件（分块分析用，内存占用与文件大小无关）"""
+    chunksize = chunksize or Config.ANALYSIS_CHUNK_SIZE
+    data_format = data_format_of(path)
+    if data_format == 'csv':
+        usecols = (lambda column: column in columns) if columns is not None else None
+        yield from pd.read_csv(path, encoding=Config.CSV_ENCODING, usecols=usecols, dtype=dtype, chunksize=chunksize)
+        return
+
+    _require_pyarrow(data_format)
+    columns = _project(path, data_format, columns)
+    if data_format == 'parquet':
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    table = open_mapped(path)
+    table = table.select(columns) if columns is not None else table
+    for offset in range(0, table.num_rows, chunksize):
+        yield table.slice(offset, chunksize).to_pandas()
@@ -0,0 +1,357 @@
+import os
+import sys
+import glob
+import sqlite3
+import hashlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config
+from crawler.storage import EXTENSION_FORMATS, is_archive_export, parse_crawl_file_name, parse_likes, read_dataset
+
+# 笔记链接中的笔记ID：/explore/<id> 或 /discovery/item/<id>
+NOTE_ID_PATTERN = '/(?:explore|discovery/item)/([0-9a-zA-Z]+)'
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """字段的文本值（缺失为None，没有该字段时全为None）"""
+    if column not in df.columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    values = df[column]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.strftime(Config.CRAWL_TIME_FORMAT)
+    return values.astype(object).where(values.notna(), None).map(lambda v: v if v is None else str(v))
+
+
+def note_keys(df: pd.DataFrame) -> pd.Series:
+    """笔记ID：取自链接，没有链接时以标题和作者的哈希代替"""
+    title, author, link = _text_column(df, 'title'), _text_column(df, 'author'), _text_column(df, 'link')
+    note_key = link.str.extract(NOTE_ID_PATTERN)[0] if link.notna().any() else pd.Series(np.nan, index=df.index)
+    missing = note_key.isna()
+    if missing.any():
+        fallback = (title[missing].fillna('') + '\x00' + author[missing].fillna('')).map(
+            lambda v: 'h' + hashlib.sha1(v.encode('utf-8')).hexdigest()[:23]
+        )
+        note_key = note_key.astype(object).where(~missing, fallback)
+    return note_key.astype(object)
+
+
+class NotesWarehouse:
+    """
+    笔记数据仓库（SQLite，WAL模式）
+    每次爬取写入规范化的表：crawls（爬取批次）、authors（作者）、notes（笔记，按笔记ID去重）、
+    engagement（每次爬取时笔记的点赞快照）。笔记ID、主题、作者和爬取时间上都有索引，
+    跨批次的查询不再需要逐个加载历史数据文件
+    """
+
+    NOTE_COLUMNS = ['note_key', 'title', 'author', 'link', 'image_url', 'publish_time',
+                    'likes', 'likes_text', 'crawl_time']
+
+    def __init__(self, db_path: str = None):
+        self.config = Config()
+        self.db_path = db_path or self.config.WAREHOUSE_PATH
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """每次操作使用独立连接，避免跨线程共享；WAL模式下读取不阻塞写入"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS crawls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    crawled_at TEXT NOT NULL,
+                    source_file TEXT UNIQUE,
+                    source_key TEXT,
+                    note_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_crawls_topic ON crawls(topic, crawled_at);
+                CREATE INDEX IF NOT EXISTS idx_crawls_crawled_at ON crawls(crawled_at);
+
+                CREATE TABLE IF NOT EXISTS authors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    note_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_authors_note_count ON authors(note_count);
+
+                CREATE TABLE IF NOT EXISTS notes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    note_key TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    author_id INTEGER REFERENCES authors(id),
+                    link TEXT,
+                    image_url TEXT,
+                    publish_time TEXT,
+                    first_crawl_id INTEGER REFERENCES crawls(id),
+                    last_crawl_id INTEGER REFERENCES crawls(id),
+                    last_likes INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_notes_author ON notes(author_id);
+                CREATE INDEX IF NOT EXISTS idx_notes_last_likes ON notes(last_likes);
+
+                CREATE TABLE IF NOT EXISTS engagement (
+                    crawl_id INTEGER NOT NULL REFERENCES crawls(id),
+                    note_id INTEGER NOT NULL REFERENCES notes(id),
+                    likes INTEGER,
+                    likes_text TEXT,
+                    crawl_time TEXT,
+                    PRIMARY KEY (crawl_id, note_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_engagement_note ON engagement(note_id, crawl_time);
+                CREATE INDEX IF NOT EXISTS idx_engagement_crawl_time ON engagement(crawl_time);
+            ''')
+            conn.commit()
+            self._initialized = True
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    @staticmethod
+    def prepare_notes(df: pd.DataFrame, crawled_at: str = None) -> pd.DataFrame:
+        """
+        整理一次爬取的笔记数据
+        笔记ID取自链接，没有链接时以标题和作者的哈希代替；点赞数按 "1.2万" 等写法换算为整数
+        """
+        likes_text = _text_column(df, 'likes')
+        likes = parse_likes(likes_text)
+        crawl_time = _text_column(df, 'crawl_time')
+        if crawled_at:
+            crawl_time = crawl_time.fillna(crawled_at)
+
+        return pd.DataFrame({
+            'note_key': note_keys(df),
+            'title': _text_column(df, 'title'),
+            'author': _text_column(df, 'author'),
+            'link': _text_column(df, 'link'),
+            'image_url': _text_column(df, 'image_url'),
+            'publish_time': _text_column(df, 'publish_time'),
+            'likes': likes.round().astype(object).where(likes.notna(), None),
+            'likes_text': likes_text,
+            'crawl_time': crawl_time
+        }, columns=NotesWarehouse.NOTE_COLUMNS)
+
+    def ingest(self, df: pd.DataFrame, topic: str, source_file: str = None,
+               crawled_at: str = None) -> Optional[int]:
+        """
+        写入一次爬取的数据（单个事务）
+        :param source_file: 来源数据文件，同一文件再次导入时替换之前的记录
+        :param crawled_at: 爬取时间（默认取数据中最晚的 crawl_time，没有则为当前时间）
+        :return: 爬取批次ID
+        """
+        notes = self.prepare_notes(df, crawled_at)
+        if crawled_at is None:
+            crawled_at = notes['crawl_time'].dropna().max() if notes['crawl_time'].notna().any() else None
+            crawled_at = crawled_at or datetime.now().strftime(self.config.CRAWL_TIME_FORMAT)
+        notes['crawl_time'] = notes['crawl_time'].fillna(crawled_at)
+        source_key = self._source_key(source_file) if source_file else None
+
+        conn = self._connect()
+        try:
+            with conn:
+                if source_file:
+                    self._delete_crawl(conn, source_file)
+                crawl_id = conn.execute(
+                    'INSERT INTO crawls(topic, crawled_at, source_file, source_key, note_count) VALUES (?, ?, ?, ?, ?)',
+                    (topic, crawled_at, source_file and os.path.abspath(source_file), source_key, len(notes))
+                ).lastrowid
+
+                conn.execute('CREATE TEMP TABLE IF NOT EXISTS staging (%s)' % ', '.join(self.NOTE_COLUMNS))
+                conn.execute('DELETE FROM staging')
+                conn.executemany(
+                    'INSERT INTO staging VALUES (%s)' % ', '.join('?' * len(self.NOTE_COLUMNS)),
+                    notes.itertuples(index=False, name=None)
+                )
+                conn.execute('INSERT OR IGNORE INTO authors(name) SELECT DISTINCT author FROM staging WHERE author IS NOT NULL')
+                # 同一批次内重复的笔记以最后一行为准；导入较早的历史文件时不覆盖较新批次的最新状态（只补充缺失的字段）
+                newer = ":crawled_at >= COALESCE((SELECT crawled_at FROM crawls WHERE id = notes.last_crawl_id), '')"
+
+                def latest(column):
+                    return (f"CASE WHEN {newer} THEN COALESCE(excluded.{column}, notes.{column}) "
+                            f"ELSE COALESCE(notes.{column}, excluded.{column}) END")
+
+                conn.execute(f'''
+                    INSERT INTO notes(note_key, title, author_id, link, image_url, publish_time,
+                                      first_crawl_id, last_crawl_id, last_likes)
+                    SELECT s.note_key, s.title, a.id, s.link, s.image_url, s.publish_time, :crawl_id, :crawl_id, s.likes
+                    FROM staging s LEFT JOIN authors a ON a.name = s.author
+                    WHERE s.rowid IN (SELECT MAX(rowid) FROM staging GROUP BY note_key)
+                    ON CONFLICT(note_key) DO UPDATE SET
+                        title = {latest('title')},
+                        author_id = {latest('author_id')},
+                        link = {latest('link')},
+                        image_url = {latest('image_url')},
+                        publish_time = {latest('publish_time')},
+                        first_crawl_id = COALESCE(notes.first_crawl_id, excluded.first_crawl_id),
+                        last_likes = CASE WHEN {newer} THEN excluded.last_likes ELSE notes.last_likes END,
+                        last_crawl_id = CASE WHEN {newer} THEN excluded.last_crawl_id ELSE notes.last_crawl_id END
+                ''', {'crawl_id': crawl_id, 'crawled_at': crawled_at})
+                conn.execute('''
+                    INSERT OR REPLACE INTO engagement(crawl_id, note_id, likes, likes_text, crawl_time)
+                    SELECT ?, n.id, s.likes, s.likes_text, s.crawl_time
+                    FROM staging s JOIN notes n ON n.note_key = s.note_key
+                ''', (crawl_id,))
+                self._refresh_author_counts(conn, 'SELECT DISTINCT author FROM staging')
+                conn.execute('DELETE FROM staging')
+            return crawl_id
+        finally:
+            conn.close()
+
+    def _delete_crawl(self, conn: sqlite3.Connection, source_file: str) -> None:
+        """删除同一来源文件之前导入的批次（笔记保留，快照删除）"""
+        row = conn.execute('SELECT id FROM crawls WHERE source_file = ?', (os.path.abspath(source_file),)).fetchone()
+        if row:
+            conn.execute('DELETE FROM engagement WHERE crawl_id = ?', (row[0],))
+            conn.execute('UPDATE notes SET first_crawl_id = NULL WHERE first_crawl_id = ?', (row[0],))
+            conn.execute('UPDATE notes SET last_crawl_id = NULL WHERE last_crawl_id = ?', (row[0],))
+            conn.execute('DELETE FROM crawls WHERE id = ?', (row[0],))
+
+    @staticmethod
+    def _refresh_author_counts(conn: sqlite3.Connection, names_sql: str) -> None:
+        """重新统计受影响作者的笔记数（用于按笔记数排序的作者查询走索引）"""
+        conn.execute(f'''
+            UPDATE authors SET note_count = (SELECT COUNT(*) FROM notes WHERE notes.author_id = authors.id)
+            WHERE name IN ({names_sql})
+        ''')
+
+    @staticmethod
+    def _source_key(path: str) -> str:
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def import_files(self, paths: List[str] = None) -> Dict[str, Any]:
+        """
+        导入已有的数据文件（默认为数据目录下文件名符合爬虫格式的全部文件，
+        不包括归档导出文件，其中的笔记在归档前已经导入过）
+        已导入且未修改的文件跳过；指定的文件名不是爬虫格式时以文件名作为主题
+        """
+        if paths is None:
+            paths = sorted(
+                path for extension in EXTENSION_FORMATS
+                for path in glob.glob(os.path.join(self.config.DATA_DIR, f'*{extension}'))
+                if parse_crawl_file_name(path) and not is_archive_export(path)
+            )
+        conn = self._connect()
+        try:
+            imported = dict(conn.execute('SELECT source_file, source_key FROM crawls WHERE source_file IS NOT NULL'))
+        finally:
+            conn.close()
+
+        result = {'imported': [], 'skipped': [], 'failed': {}}
+        for path in paths:
+            if imported.get(os.path.abspath(path)) == self._source_key(path):
+                result['skipped'].append(path)
+                continue
+            info = parse_crawl_file_name(path) or {
+                'topic': os.path.splitext(os.path.basename(path))[0], 'crawled_at': None
+            }
+            try:
+                df = read_dataset(path)
+                self.ingest(df, info['topic'], source_file=path, crawled_at=info['crawled_at'])
+                result['imported'].append(path)
+            except Exception as e:
+                result['failed'][path] = str(e)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """仓库概况：各表行数和爬取时间范围"""
+        conn = self._connect()
+        try:
+            crawls, first, last = conn.execute('SELECT COUNT(*), MIN(crawled_at), MAX(crawled_at) FROM crawls').fetchone()
+            return {
+                'crawls': crawls,
+                'notes': conn.execute('SELECT COUNT(*) FROM notes').fetchone()[0],
+                'authors': conn.execute('SELECT COUNT(*) FROM authors').fetchone()[0],
+                'snapshots': conn.execute('SELECT COUNT(*) FROM engagement').fetchone()[0],
+                'first_crawl': first,
+                'last_crawl': last
+            }
+        finally:
+            conn.close()
+
+    def topics(self) -> List[Dict[str, Any]]:
+        """各主题的爬取次数、快照数和最近爬取时间"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('''
+                SELECT topic, COUNT(*), SUM(note_count), MAX(crawled_at)
+                FROM crawls GROUP BY topic ORDER BY MAX(crawled_at) DESC
+            ''').fetchall()
+        finally:
+            conn.close()
+        return [
+            {'topic': topic, 'crawls': crawls, 'snapshots': snapshots, 'last_crawl': last}
+            for topic, crawls, snapshots, last in rows
+        ]
+
+    def top_authors(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """全部历史中收录笔记最多的作者"""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT name, note_count FROM authors ORDER BY note_count DESC LIMIT ?', (limit,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{'author': name, 'notes': count} for name, count in rows]
+
+    def top_notes(self, topic: str = None, since: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        点赞最高的笔记
+        :param topic: 只看该主题的爬取批次（取批次内的最高点赞）
+        :param since: 只看该时间之后的爬取批次（格式同 CRAWL_TIME_FORMAT）
+        """
+        conn = self._connect()
+        try:
+            if topic or since:
+                conditions, params = [], []
+                if topic:
+                    conditions.append('c.topic = ?')
+                    params.append(topic)
+                if since:
+                    conditions.append('c.crawled_at >= ?')
+                    params.append(since)
+                rows = conn.execute(f'''
+                    SELECT n.note_key, n.title, a.name, MAX(e.likes) AS likes
+                    FROM crawls c
+                    JOIN engagement e ON e.crawl_id = c.id
+                    JOIN notes n ON n.id = e.note_id
+                    LEFT JOIN authors a ON a.id = n.author_id
+                    WHERE {' AND '.join(conditions)}
+                    GROUP BY e.note_id ORDER BY likes DESC LIMIT ?
+                ''', params + [limit]).fetchall()
+            else:
+                rows = conn.execute('''
+                    SELECT n.note_key, n.title, a.name, n.last_likes
+                    FROM notes n LEFT JOIN authors a ON a.id = n.author_id
+                    WHERE n.last_likes IS NOT NULL
+                    ORDER BY n.last_likes DESC LIMIT ?
+                ''', (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [{'note_id': key, 'title': title, 'author': author, 'likes': likes}
+                for key, title, author, likes in rows]
+
+    def note_history(self, note_id: str) -> List[Dict[str, Any]]:
+        """单条笔记在各次爬取中的点赞快照（按爬取时间排序）"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('''
+                SELECT e.crawl_time, c.topic, e.likes, e.likes_text
+                FROM notes n
+                JOIN engagement e ON e.note_id = n.id
+                JOIN crawls c ON c.id = e.crawl_id
+                WHERE n.note_key = ?
+                ORDER BY e.crawl_time
+            ''', (note_id,)).fetchall()
+        finally:
+            conn.close()
+        return [{'crawl_time': t, 'topic': topic, 'likes': likes, 'likes_text': text}
+                for t, topic, likes, text in rows]
@@ -20,6 +20,13 @@ import subprocess
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
+from crawler.catalog import record_file
+from crawler.storage import data_extension, write_dataset
+from crawler.warehouse import NotesWarehouse
+
+class CrawlCancelled(Exception):
+    """爬取任务被取消"""
+
 
 class XHSCrawler:
     def __init__(self):
@@ -34,6 +41,31 @@ class XHSCrawler:
             'Upgrade-Insecure-Requests': '1',
         })
         self.driver = None
+        self.cancel_event = None       # 后台爬取任务的取消标记（threading.Event），设置后尽快结束爬取
+        # 爬取进度回调 (事件, 数据字典)，事件依次为 attempt、driver_ready、page_loaded、scroll、notes_found、
+        # note（每提取一条笔记，数据中附带该笔记）和 saved（数据文件已保存）
+        self.progress_callback = None
+        
+    def _check_cancelled(self):
+        """爬取任务已取消时抛出 CrawlCancelled"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CrawlCancelled("爬取任务已取消")
+    
+    def _sleep(self, seconds):
+        """等待（爬取任务取消时立即结束）"""
+        if self.cancel_event is None:
+            time.sleep(seconds)
+        elif self.cancel_event.wait(seconds):
+            raise CrawlCancelled("爬取任务已取消")
+    
+    def _report(self, event, **data):
+        """报告爬取进度（回调出错不影响爬取）"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(event, data)
+        except Exception as e:
+            print(f"报告爬取进度失败: {e}")
         
     def _get_chrome_version(self):
         """获取Chrome浏览器版本"""
@@ -243,13 +275,16 @@ class XHSCrawler:
         notes_data = []
         
         for attempt in range(max_retries):
+            self._check_cancelled()
             print(f"\n🔄 第 {attempt + 1} 次尝试...")
+            self._report('attempt', attempt=attempt + 1, max_attempts=max_retries)
             
             try:
                 # 初始化WebDriver
                 if not self.init_driver(cookies):
                     print("❌ WebDriver初始化失败")
                     continue
+                self._report('driver_ready')
                 
                 # 检查登录状态
                 if not self.is_logged_in():
@@ -261,12 +296,13 @@ class XHSCrawler:
                 print(f"🌐 访问搜索页面: {search_url}")
                 
                 self.driver.get(search_url)
-                time.sleep(random.uniform(3, 5))
+                self._sleep(random.uniform(3, 5))
                 
                 # 等待页面加载
                 WebDriverWait(self.driver, 10).until(
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
+                self._report('page_loaded', url=search_url)
                 
                 # 尝试多个选择器来定位笔记元素
                 selectors = [
@@ -297,8 +333,9 @@ class XHSCrawler:
                     # 滚动加载更多内容
                     for i in range(min(3, limit // 5 + 1)):
                         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        time.sleep(random.uniform(2, 4))
+                        self._sleep(random.uniform(2, 4))
                         print(f"📜 滚动加载第 {i+1} 次")
+                        self._report('scroll', scroll=i + 1)
                     
                     # 重新获取元素
                     for selector in selectors:
@@ -312,12 +349,17 @@ class XHSCrawler:
                             continue
                 
                 # 提取笔记数据
+                self._report('notes_found', found=len(note_elements))
                 for i, element in enumerate(note_elements):
+                    self._check_cancelled()
                     try:
                         note_data = self._extract_note_data(element)
                         if note_data:
                             notes_data.append(note_data)
                             print(f"📝 已获取笔记 {i+1}: {note_data.get('title', '无标题')}")
+                            self._report('note', count=len(notes_data), limit=limit, note=note_data)
+                    except CrawlCancelled:
+                        raise
                     except Exception as e:
                         print(f"❌ 提取笔记 {i+1} 数据时出错: {e}")
                         continue
@@ -337,11 +379,14 @@ class XHSCrawler:
                     except:
                         pass
                     self.driver = None
+                # 取消时关闭浏览器后直接结束，不再重试
+                if isinstance(e, CrawlCancelled):
+                    raise
                 
                 if attempt < max_retries - 1:
                     wait_time = 5 * (attempt + 1)
                     print(f"⏳ 等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    self._sleep(wait_time)
         
         # 清理资源
         if self.driver:
@@ -453,7 +498,7 @@ class XHSCrawler:
                 'link': link,
                 'publish_time': publish_time,
                 'image_url': image_url,
-                'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'crawl_time': datetime.now().strftime(self.config.CRAWL_TIME_FORMAT)
             }
             
         except Exception as e:
@@ -464,35 +509,54 @@ class XHSCrawler:
         """创建模拟数据（已禁用 - 只获取真实数据）"""
         raise Exception("模拟数据功能已禁用，请配置有效的Cookie获取真实数据")
     
-    def save_to_csv(self, data, filename=None):
-        """保存数据到CSV文件"""
+    def save_to_csv(self, data, filename=None, data_format=None):
+        """
+        保存数据文件
+        :param data_format: csv / parquet / arrow（默认取配置项 DATA_FORMAT，指定文件名时按扩展名判断）
+        """
         if not filename:
-            filename = f"xhs_notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            data_format = data_format or self.config.DATA_FORMAT
+            filename = f"xhs_notes_{datetime.now().strftime('%Y%m%d_%H%M%S')}{data_extension(data_format)}"
             
         # 确保数据目录存在
         os.makedirs(self.config.DATA_DIR, exist_ok=True)
         filepath = os.path.join(self.config.DATA_DIR, filename)
         
         df = pd.DataFrame(data)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        write_dataset(df, filepath, data_format)
+        record_file(filepath, len(df), list(df.columns))
         print(f"数据已保存到: {filepath}")
         return filepath
     
-    def crawl_hot_notes(self, topic, limit=20, cookies=None):
+    def save_to_warehouse(self, data, topic, filepath=None):
+        """将本次爬取写入笔记数据仓库（失败不影响已保存的数据文件）"""
+        try:
+            crawl_id = NotesWarehouse().ingest(pd.DataFrame(data), topic, source_file=filepath)
+            print(f"已写入笔记数据仓库（批次 {crawl_id}）")
+        except Exception as e:
+            print(f"写入笔记数据仓库失败: {e}")
+    
+    def crawl_hot_notes(self, topic, limit=20, cookies=None, data_format=None):
         """
         爬取指定主题的热门笔记
         :param topic: 主题关键词
         :param limit: 获取数量
         :param cookies: 可选的cookies字符串
+        :param data_format: 数据保存格式（默认取配置项 DATA_FORMAT）
         :return: 保存的文件路径
         """
         print(f"开始爬取主题 '{topic}' 的热门笔记...")
         notes_data = self.search_notes(topic, limit, cookies)
         
         if notes_data:
-            filename = f"xhs_{topic}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = self.save_to_csv(notes_data, filename)
+            data_format = data_format or self.config.DATA_FORMAT
+            filename = f"xhs_{topic}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{data_extension(data_format)}"
+            self._check_cancelled()
+            filepath = self.save_to_csv(notes_data, filename, data_format)
+            if self.config.WAREHOUSE_ENABLED:
+                self.save_to_warehouse(notes_data, topic, filepath)
             print(f"成功爬取 {len(notes_data)} 条笔记")
+            self._report('saved', filepath=filepath, count=len(notes_data))
             return filepath
         else:
             print("未获取到任何笔记数据")
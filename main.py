@@ -7,6 +7,7 @@
 
 import os
 import sys
+import glob
 import argparse
 from datetime import datetime
 
@@ -16,7 +17,15 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import Config
 from crawler.xhs_crawler import XHSCrawler
 from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
-from web_app.app import app
+from ai_analyzer.analysis_cache import AnalysisCache
+from ai_analyzer.usage_log import UsageLog
+from ai_analyzer.chunked_context import merge_file_sketches
+from ai_analyzer.batch import run_batch, save_summary
+from crawler.warehouse import NotesWarehouse
+from crawler.archive import CrawlArchive, find_data_files
+from crawler.catalog import record_file
+from crawler.storage import FORMAT_EXTENSIONS, data_extension, is_data_file, read_dataset, write_dataset
+from web_app.app import app, start_archive_thread, start_job_workers
 
 def print_banner():
     """打印项目横幅"""
@@ -47,12 +56,13 @@ def crawl_mode(args):
     print(f"📊 爬取参数:")
     print(f"   主题: {args.topic}")
     print(f"   数量: {args.limit}")
+    print(f"   保存格式: {args.format or Config.DATA_FORMAT}")
     print(f"   输出文件: {args.output if args.output else '自动生成'}")
     
     # 执行爬取
     try:
         crawler = XHSCrawler()
-        result = crawler.crawl_hot_notes(args.topic, args.limit, args.cookies)
+        result = crawler.crawl_hot_notes(args.topic, args.limit, args.cookies, args.format)
         
         if result:
             print(f"✅ 爬取完成！数据已保存到: {result}")
@@ -106,54 +116,146 @@ def crawl_mode(args):
         import traceback
         traceback.print_exc()
 
+def batch_mode(args):
+    """批量分析模式：每个数据文件单独分析，文件分发到多个进程"""
+    if not args.file and not (args.topic or args.start or args.end):
+        print("❌ 错误: 请用 -f 指定数据文件，或用 --topic/--start/--end 指定范围")
+        return
+    paths = resolve_analysis_files(args)
+    if not paths:
+        return
+    
+    workers = min(args.workers or Config.BATCH_WORKERS, len(paths))
+    print(f"📦 批量分析 {len(paths)} 个数据文件（{workers} 个进程，AI并发上限 "
+          f"{args.ai_concurrency or Config.AI_MAX_CONCURRENCY}，类型 {args.type}）")
+    
+    def progress(item, done, total):
+        name = os.path.basename(item['file'])
+        if item['status'] == 'failed':
+            print(f"   [{done}/{total}] ❌ {name}: {item['error']}")
+        else:
+            status = '缓存' if item['status'] == 'cached' else f"{item['rows']} 条"
+            print(f"   [{done}/{total}] ✅ {name} ({status}, {item['seconds']:.1f}s) → {item['analysis_file']}")
+    
+    summary = run_batch(paths, args.type, args.workers, args.ai_concurrency, args.force,
+                        approximate=True if args.approx else None, progress=progress)
+    summary_file = save_summary(summary)
+    
+    print("=" * 50)
+    print(f"✅ 完成 {summary['succeeded']} 个，缓存 {summary['cached']} 个，失败 {summary['failed']} 个")
+    print(f"   总耗时: {summary['elapsed_seconds']:.1f}s，{summary['files_per_second']:.2f} 文件/秒，"
+          f"{summary['rows_per_second']:.0f} 行/秒，平均并行度 {summary['parallelism']:.1f}")
+    print(f"📄 汇总已保存到: {summary_file}")
+
+def resolve_analysis_files(args):
+    """
+    要分析的数据文件：-f 指定的文件（支持通配符）以及 --topic/--start/--end 范围内的爬取数据（含归档）
+    :return: 文件路径列表，有文件不存在时返回None
+    """
+    paths = []
+    for pattern in args.file or []:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        matches = [path for path in matches if os.path.exists(path)]
+        if not matches:
+            print(f"❌ 错误: 文件不存在: {pattern}")
+            return None
+        paths.extend(matches)
+    if args.topic or args.start or args.end:
+        found = find_data_files(args.topic, args.start, args.end)
+        if not found:
+            print("❌ 错误: 没有符合条件的数据文件")
+            return None
+        paths.extend(found)
+    return list(dict.fromkeys(paths))
+
 def analyze_mode(args):
     """分析模式"""
     print("🤖 启动分析模式...")
     
     # 参数验证
-    if not os.path.exists(args.file):
-        print(f"❌ 错误: 文件不存在: {args.file}")
+    if not args.file and not (args.topic or args.start or args.end):
+        print("❌ 错误: 请用 -f 指定数据文件，或用 --topic/--start/--end 指定范围")
+        return
+    paths = resolve_analysis_files(args)
+    if not paths:
         return
+    # 单个文件按原方式加载（大文件可分块、Arrow内存映射），多个文件合并去重后分析
+    data_file = paths[0] if len(paths) == 1 else paths
     
     print(f"📊 分析参数:")
-    print(f"   数据文件: {args.file}")
+    if len(paths) == 1:
+        print(f"   数据文件: {data_file}")
+    else:
+        print(f"   数据文件: {len(paths)} 个（{', '.join(os.path.relpath(p, Config.DATA_DIR) for p in paths[:3])}{' ...' if len(paths) > 3 else ''}）")
     print(f"   分析类型: {args.type}")
     print(f"   输出文件: {args.output if args.output else '自动生成'}")
     
     try:
         analyzer = DeepSeekAnalyzer()
+        if args.ai_mode:
+            analyzer.ai_mode = args.ai_mode
+        if args.approx:
+            analyzer.approximate = True
         
-        # 加载数据
-        df = analyzer.load_data(args.file)
-        if df.empty:
-            print("❌ 数据加载失败")
-            return
-        
-        print(f"📊 成功加载 {len(df)} 条数据")
+        # 查询分析缓存
+        cache = AnalysisCache()
+        cache_key = None
+        entry = None
+        if Config.ANALYSIS_CACHE_ENABLED:
+            cache_key = cache.make_key(
+                data_file, args.type, model_params=analyzer.model_params(),
+                background=analyzer.keyword_extractor.background_signature()
+            )
+            entry = None if args.force else cache.get(cache_key)
         
-        # 根据分析类型执行不同的分析
-        if args.type == 'comprehensive':
-            print("📈 进行综合分析...")
-            result = analyzer.generate_comprehensive_report(df)
-        elif args.type == 'trends':
-            print("📈 进行趋势分析...")
-            result = {
-                'trends': analyzer.analyze_trends(df),
-                'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'data_file': args.file
-            }
-        elif args.type == 'ai':
-            print("🤖 进行AI深度分析...")
-            result = analyzer.analyze_with_ai(df)
+        result = None
+        analysis_file = None
+        if entry:
+            print("⚡ 命中分析缓存")
+            result = entry['result']
+            cached_file = entry.get('analysis_file')
+            if not args.output and cached_file and os.path.exists(os.path.join(Config.DATA_DIR, cached_file)):
+                analysis_file = os.path.join(Config.DATA_DIR, cached_file)
         else:
-            print(f"❌ 不支持的分析类型: {args.type}")
-            return
+            # 加载数据（大文件分块读取，只保留聚合结果）
+            if len(paths) > 1:
+                df = analyzer.load_files(paths)
+            elif args.chunked or analyzer.should_chunk(data_file):
+                df = analyzer.load_data_chunked(data_file, args.chunksize)
+            else:
+                df = analyzer.load_data(data_file)
+            if df.empty:
+                print("❌ 数据加载失败")
+                return
+            
+            print(f"📊 成功加载 {len(df)} 条数据")
+            
+            # 根据分析类型执行不同的分析
+            if args.type == 'comprehensive':
+                print("📈 进行综合分析...")
+                result = analyzer.generate_comprehensive_report(df)
+            elif args.type == 'trends':
+                print("📈 进行趋势分析...")
+                result = {
+                    'trends': analyzer.analyze_trends(df),
+                    'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'data_file': data_file
+                }
+            elif args.type == 'ai':
+                print("🤖 进行AI深度分析...")
+                result = analyzer.analyze_with_ai(df)
+            else:
+                print(f"❌ 不支持的分析类型: {args.type}")
+                return
         
-        # 保存分析结果
-        if args.output:
-            analysis_file = analyzer.save_analysis(result, args.output)
-        else:
-            analysis_file = analyzer.save_analysis(result)
+        # 保存分析结果（命中缓存且结果文件仍在时不重复写入）
+        if not analysis_file:
+            if args.output:
+                analysis_file = analyzer.save_analysis(result, args.output)
+            else:
+                analysis_file = analyzer.save_analysis(result)
+            if cache_key and cache.is_cacheable(result):
+                cache.put(cache_key, result, os.path.basename(analysis_file))
         
         print(f"📄 分析结果已保存到: {analysis_file}")
         
@@ -180,6 +282,11 @@ def analyze_mode(args):
             print(f"   作者数量: {basic_stats.get('unique_authors', 0)}")
             print(f"   时间范围: {basic_stats.get('date_range', '未知')}")
             
+            authors_bound = stats.get('approximation', {}).get('unique_authors')
+            if authors_bound:
+                low, high = authors_bound['interval_95']
+                print(f"   (近似统计) 作者数量95%区间: {low} ~ {high}")
+            
             # 热门作者
             trends = result.get('trends', {})
             top_authors = trends.get('top_authors', [])
@@ -217,6 +324,10 @@ def analyze_mode(args):
                 print(f"   最高点赞: {engagement.get('max_likes', 0):.1f}")
                 print(f"   最低点赞: {engagement.get('min_likes', 0):.1f}")
             
+            time_analysis = trends.get('time_analysis', {})
+            if time_analysis:
+                print(f"   发布时间: {time_analysis.get('date_range', '未知')}")
+            
             # 热门作者
             top_authors = trends.get('top_authors', [])
             if top_authors:
@@ -264,6 +375,8 @@ def web_mode(args):
     print(f"   按 Ctrl+C 停止服务")
     print("=" * 50)
     
+    start_archive_thread()
+    start_job_workers()
     try:
         app.run(
             host=config.FLASK_HOST,
@@ -288,8 +401,8 @@ def list_files_mode(args):
         print(f"📂 数据目录: {data_dir}")
         print("=" * 50)
         
-        # 列出CSV文件
-        csv_files = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
+        # 列出数据文件（CSV / Parquet / Arrow）
+        csv_files = [f for f in os.listdir(data_dir) if is_data_file(f)]
         if csv_files:
             print("📊 数据文件:")
             for file in sorted(csv_files):
@@ -315,6 +428,168 @@ def list_files_mode(args):
     except Exception as e:
         print(f"❌ 获取文件列表失败: {e}")
 
+def usage_mode(args):
+    """token用量报告模式"""
+    print("💰 token用量报告...")
+    
+    report = UsageLog().report(args.days)
+    if report.get('error'):
+        print(f"❌ {report['error']}")
+        return
+    
+    print(f"📊 统计范围: {'最近 %g 天' % args.days if args.days else '全部'}")
+    print("=" * 50)
+    print(f"   分析次数: {report['analyses']}")
+    print(f"   API调用: {report['calls']} 次（本地缓存命中 {report['local_cache_hits']} 次）")
+    print(f"   提示词token: {report['prompt_tokens']}（前缀缓存命中 {report['cached_tokens']}，"
+          f"{report['prompt_cache_hit_ratio']:.1%}）")
+    print(f"   生成token: {report['completion_tokens']}")
+    print(f"   估算费用: ¥{report['cost']:.4f}（前缀缓存节省 ¥{report['saved_by_cache']:.4f}）")
+    
+    labels = {'prompt_cache_hit': '命中前缀缓存', 'prompt_cache_miss': '未命中前缀缓存'}
+    for key, item in report['latency'].items():
+        print(f"   {labels[key]}: {item['calls']} 次，平均延迟 {item['avg_latency']:.2f}s，"
+              f"平均提示词 {item['avg_prompt_tokens']:.0f} token")
+    
+    for kind, item in report['by_kind'].items():
+        print(f"   [{kind}] {item['calls']} 次，提示词 {item['prompt_tokens']}，"
+              f"缓存 {item['cached_tokens']}，生成 {item['completion_tokens']}")
+
+def convert_mode(args):
+    """数据格式转换模式"""
+    print("🔁 转换数据文件格式...")
+    
+    if not os.path.exists(args.file):
+        print(f"❌ 错误: 文件不存在: {args.file}")
+        return
+    
+    output = args.output or os.path.splitext(args.file)[0] + data_extension(args.format)
+    if os.path.abspath(output) == os.path.abspath(args.file):
+        print("❌ 错误: 输出文件与输入文件相同")
+        return
+    
+    try:
+        df = read_dataset(args.file)
+        write_dataset(df, output, args.format)
+        record_file(output, len(df), list(df.columns))
+    except Exception as e:
+        print(f"❌ 转换失败: {e}")
+        return
+    
+    before, after = os.path.getsize(args.file), os.path.getsize(output)
+    print(f"✅ 已转换 {len(df)} 行: {output}")
+    print(f"   文件大小: {before} → {after} bytes ({after / before:.1%})")
+
+def warehouse_mode(args):
+    """笔记数据仓库模式"""
+    store = NotesWarehouse()
+    
+    if args.action == 'import':
+        print("📥 导入数据文件到笔记数据仓库...")
+        result = store.import_files(args.files)
+        print(f"   导入: {len(result['imported'])} 个，跳过（已导入）: {len(result['skipped'])} 个")
+        for path, error in result['failed'].items():
+            print(f"   ❌ {path}: {error}")
+    
+    if args.action == 'history':
+        if not args.note:
+            print("❌ 错误: 请用 --note 指定笔记ID")
+            return
+        history = store.note_history(args.note)
+        if not history:
+            print(f"❌ 未找到笔记: {args.note}")
+            return
+        print(f"📈 笔记 {args.note} 的点赞变化:")
+        for item in history:
+            print(f"   {item['crawl_time']} [{item['topic']}] {item['likes_text']}")
+        return
+    
+    summary = store.summary()
+    print("🗄️ 笔记数据仓库")
+    print("=" * 50)
+    print(f"   爬取批次: {summary['crawls']}，笔记: {summary['notes']}，作者: {summary['authors']}，"
+          f"点赞快照: {summary['snapshots']}")
+    print(f"   爬取时间: {summary['first_crawl'] or '-'} 至 {summary['last_crawl'] or '-'}")
+    
+    topics = store.topics()
+    if topics:
+        print("\n🏷️ 主题:")
+        for item in topics[:args.limit]:
+            print(f"   {item['topic']}: {item['crawls']} 次爬取，{item['snapshots']} 条，最近 {item['last_crawl']}")
+    
+    authors = store.top_authors(args.limit)
+    if authors:
+        print("\n👥 收录笔记最多的作者:")
+        for i, item in enumerate(authors, 1):
+            print(f"   {i}. {item['author']} ({item['notes']} 篇)")
+    
+    notes = store.top_notes(args.topic, args.since, args.limit)
+    if notes:
+        print(f"\n🔥 点赞最高的笔记{'（' + args.topic + '）' if args.topic else ''}:")
+        for i, item in enumerate(notes, 1):
+            print(f"   {i}. {item['title']} - {item['author']} ({item['likes']} 赞) [{item['note_id']}]")
+
+def archive_mode(args):
+    """数据归档模式"""
+    archive = CrawlArchive()
+    
+    if args.action == 'compact':
+        print("🗜️ 归档较早的数据文件...")
+        result = archive.compact()
+        print(f"✅ 已归档 {len(result['archived'])} 个文件到 {len(result['partitions'])} 个分区")
+        if result['expired_partitions'] or result['expired_analyses']:
+            print(f"   过期删除: {len(result['expired_partitions'])} 个分区，{len(result['expired_analyses'])} 个分析结果")
+        for key, error in result['failed'].items():
+            print(f"   ❌ {key}: {error}")
+        return
+    
+    if args.action == 'export':
+        try:
+            output = archive.export(args.topic, args.start, args.end, args.output, args.format)
+        except Exception as e:
+            print(f"❌ 导出失败: {e}")
+            return
+        print(f"✅ 已导出: {output}")
+        print(f"💡 分析: python main.py analyze -f {output}")
+        return
+    
+    partitions = archive.partitions(args.topic, args.start, args.end)
+    if not partitions:
+        print("📦 没有符合条件的归档分区")
+        return
+    print(f"📦 归档分区（{len(partitions)} 个）:")
+    for entry in partitions:
+        print(f"   {entry['topic']} {entry['date']}: {entry['rows']} 行，{len(entry['sources'])} 个文件，"
+              f"{entry['bytes'] / 1024:.1f}KB")
+    print(f"   合计: {sum(e['rows'] for e in partitions)} 行，{sum(e['bytes'] for e in partitions) / 1024 / 1024:.1f}MB")
+
+def sketch_mode(args):
+    """多文件近似统计模式"""
+    print("📐 近似统计（草图合并）...")
+    
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(f"❌ 错误: 文件不存在: {', '.join(missing)}")
+        return
+    
+    try:
+        summary = merge_file_sketches(args.files).summary()
+    except Exception as e:
+        print(f"❌ 近似统计失败: {e}")
+        return
+    
+    bounds = summary['error_bounds']
+    print(f"📊 数据文件: {len(args.files)} 个")
+    print("=" * 50)
+    print(f"   总笔记数: {summary['total_notes']}")
+    low, high = bounds['unique_authors']['interval_95']
+    print(f"   作者数量: 约 {summary['unique_authors']}（95%区间 {low} ~ {high}，"
+          f"标准误差 {bounds['unique_authors']['relative_std_error']:.2%}）")
+    intervals = bounds['likes_quantiles']['intervals']
+    for q, value in summary['likes_quantiles'].items():
+        low, high = intervals[q]
+        print(f"   点赞{float(q):.0%}分位: 约 {value:.1f}（真实值在 {low} ~ {high}）")
+
 def main():
     """主函数"""
     # 创建配置实例
@@ -327,10 +602,21 @@ def main():
 使用示例:
   python main.py crawl -t "美食" -l 20                    # 爬取美食主题20条笔记
   python main.py crawl -t "旅行" -l 50 -a                 # 爬取并分析旅行主题
+  python main.py crawl -t "美食" -l 20 --format parquet   # 保存为Parquet列式文件
   python main.py analyze -f data/xhs_美食_20241201.csv    # 分析指定文件
   python main.py analyze -f data/xhs_美食_20241201.csv -t comprehensive  # 综合分析
+  python main.py analyze -f "data/xhs_美食_202412*.csv"   # 多个文件合并去重后分析
+  python main.py analyze --topic "美食" --start 2024-12-01 --end 2024-12-07  # 分析一周的爬取数据
+  python main.py batch -f "data/xhs_*.csv" --workers 8    # 多进程批量分析，每个文件一份结果
   python main.py web                                      # 启动Web应用
   python main.py list                                     # 列出所有文件
+  python main.py usage --days 7                           # 查看最近7天token用量
+  python main.py sketch -f data/a.csv data/b.csv          # 多文件近似汇总点赞分位数和作者数
+  python main.py convert -f data/a.csv --format parquet   # 将CSV数据转换为Parquet
+  python main.py warehouse import                         # 将已有数据文件导入笔记数据仓库
+  python main.py warehouse stats --topic "美食"            # 查看历史爬取汇总
+  python main.py archive compact                          # 将较早的数据文件归档为按主题/日期分区的Parquet
+  python main.py archive export --topic "美食" --start 2024-12-01 --end 2024-12-07  # 导出归档数据用于分析
         """
     )
     
@@ -343,13 +629,26 @@ def main():
     crawl_parser.add_argument('-c', '--cookies', help='cookies字符串')
     crawl_parser.add_argument('-o', '--output', help='输出文件名')
     crawl_parser.add_argument('-a', '--analyze', action='store_true', help='爬取后自动分析')
+    crawl_parser.add_argument('--format', choices=list(FORMAT_EXTENSIONS),
+                              help='数据保存格式 (默认: 配置项 DATA_FORMAT；parquet/arrow 需要pyarrow)')
     
     # 分析命令
     analyze_parser = subparsers.add_parser('analyze', help='分析数据')
-    analyze_parser.add_argument('-f', '--file', required=True, help='数据文件路径')
+    analyze_parser.add_argument('-f', '--file', nargs='+', help='数据文件路径（可多个，支持通配符；多个文件合并去重后分析）')
+    analyze_parser.add_argument('--topic', help='分析该主题的全部爬取数据（含归档）')
+    analyze_parser.add_argument('--start', help='只分析该日期之后的爬取，如 2024-12-01')
+    analyze_parser.add_argument('--end', help='只分析该日期之前的爬取（含），如 2024-12-07')
     analyze_parser.add_argument('-t', '--type', choices=['comprehensive', 'trends', 'ai'], 
                                default='comprehensive', help='分析类型 (默认: comprehensive)')
     analyze_parser.add_argument('-o', '--output', help='输出文件名')
+    analyze_parser.add_argument('--force', action='store_true', help='忽略分析缓存，强制重新分析')
+    analyze_parser.add_argument('--chunked', action='store_true',
+                                help='分块读取数据文件（超出内存的大文件，超过阈值时自动启用）')
+    analyze_parser.add_argument('--chunksize', type=int, help='分块读取的行数 (默认: 200000)')
+    analyze_parser.add_argument('--approx', action='store_true',
+                                help='点赞分位数和作者数用草图近似估计（附误差范围）')
+    analyze_parser.add_argument('--ai-mode', choices=['single', 'map_reduce', 'dimensions'],
+                               help='AI分析方式 (默认: 配置项 AI_ANALYSIS_MODE)')
     
     # Web命令
     web_parser = subparsers.add_parser('web', help='启动Web应用')
@@ -357,6 +656,51 @@ def main():
     # 文件列表命令
     list_parser = subparsers.add_parser('list', help='列出文件')
     
+    # token用量命令
+    usage_parser = subparsers.add_parser('usage', help='查看token用量和费用')
+    usage_parser.add_argument('--days', type=float, help='只统计最近若干天')
+    
+    # 格式转换命令
+    convert_parser = subparsers.add_parser('convert', help='转换数据文件格式')
+    convert_parser.add_argument('-f', '--file', required=True, help='数据文件路径')
+    convert_parser.add_argument('--format', choices=list(FORMAT_EXTENSIONS), required=True, help='目标格式')
+    convert_parser.add_argument('-o', '--output', help='输出文件路径 (默认: 同名换扩展名)')
+    
+    # 笔记数据仓库命令
+    warehouse_parser = subparsers.add_parser('warehouse', help='笔记数据仓库（导入、汇总查询）')
+    warehouse_parser.add_argument('action', choices=['import', 'stats', 'history'], help='操作')
+    warehouse_parser.add_argument('-f', '--files', nargs='+', help='要导入的数据文件 (默认: 数据目录下全部)')
+    warehouse_parser.add_argument('--topic', help='只看该主题')
+    warehouse_parser.add_argument('--since', help='只看该时间之后的爬取，如 2024-12-01')
+    warehouse_parser.add_argument('--note', help='笔记ID（history）')
+    warehouse_parser.add_argument('--limit', type=int, default=10, help='显示条数 (默认: 10)')
+    
+    # 批量分析命令
+    batch_parser = subparsers.add_parser('batch', help='批量分析（每个文件单独分析，多进程）')
+    batch_parser.add_argument('-f', '--file', nargs='+', help='数据文件路径（可多个，支持通配符）')
+    batch_parser.add_argument('--topic', help='分析该主题的全部数据文件（含归档分区）')
+    batch_parser.add_argument('--start', help='只分析该日期之后的爬取，如 2024-12-01')
+    batch_parser.add_argument('--end', help='只分析该日期之前的爬取（含），如 2024-12-07')
+    batch_parser.add_argument('-t', '--type', choices=['comprehensive', 'trends', 'ai'],
+                              default='comprehensive', help='分析类型 (默认: comprehensive)')
+    batch_parser.add_argument('--workers', type=int, help='进程数 (默认: CPU核数)')
+    batch_parser.add_argument('--ai-concurrency', type=int, help='所有进程合计的AI并发请求上限 (默认: 4)')
+    batch_parser.add_argument('--force', action='store_true', help='忽略分析缓存，强制重新分析')
+    batch_parser.add_argument('--approx', action='store_true', help='点赞分位数和作者数用草图近似估计')
+    
+    # 数据归档命令
+    archive_parser = subparsers.add_parser('archive', help='数据归档（合并、查看、导出）')
+    archive_parser.add_argument('action', choices=['compact', 'list', 'export'], help='操作')
+    archive_parser.add_argument('--topic', help='主题')
+    archive_parser.add_argument('--start', help='开始日期，如 2024-12-01')
+    archive_parser.add_argument('--end', help='结束日期（含），如 2024-12-07')
+    archive_parser.add_argument('--format', choices=list(FORMAT_EXTENSIONS), help='导出格式 (默认: DATA_FORMAT)')
+    archive_parser.add_argument('-o', '--output', help='导出文件名 (保存在数据目录)')
+    
+    # 近似统计命令
+    sketch_parser = subparsers.add_parser('sketch', help='合并多个数据文件的近似统计')
+    sketch_parser.add_argument('-f', '--files', nargs='+', required=True, help='数据文件路径')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -376,6 +720,18 @@ def main():
         web_mode(args)
     elif args.command == 'list':
         list_files_mode(args)
+    elif args.command == 'usage':
+        usage_mode(args)
+    elif args.command == 'sketch':
+        sketch_mode(args)
+    elif args.command == 'convert':
+        convert_mode(args)
+    elif args.command == 'warehouse':
+        warehouse_mode(args)
+    elif args.command == 'archive':
+        archive_mode(args)
+    elif args.command == 'batch':
+        batch_mode(args)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI分析模式测试脚本
+验证 dimensions 模式各维度分别请求，指定自定义模板时改为按模板单次调用（不调用真实API）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+
+
+@contextmanager
+def fake_analyzer():
+    """不写缓存和用量日志的分析器，API调用记录提示内容后返回固定文本"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            mock.patch.object(Config, 'LLM_CACHE_ENABLED', False), \
+            mock.patch.object(Config, 'LLM_USAGE_LOG_ENABLED', False), \
+            mock.patch.object(Config, 'DATA_DIR', tmp_dir), \
+            mock.patch.object(Config, 'KEYWORD_CACHE_DIR', os.path.join(tmp_dir, 'keywords')):
+        analyzer = DeepSeekAnalyzer()
+        analyzer.use_mock = False
+        prompts = []
+        lock = threading.Lock()
+
+        def call(prompt, *args, **kwargs):
+            with lock:
+                prompts.append(prompt)
+            return '分析内容'
+
+        def stream(prompt, *args, **kwargs):
+            prompts.append(prompt)
+            yield '分析'
+            yield '内容'
+
+        with mock.patch.object(analyzer, '_call_deepseek_api', side_effect=call), \
+                mock.patch.object(analyzer, '_stream_deepseek_api', side_effect=stream):
+            yield analyzer, prompts, tmp_dir
+
+
+def sample_data():
+    return pd.DataFrame({
+        'title': ['周末火锅探店', '烧烤攻略合集', '甜品店推荐'],
+        'author': ['甲', '乙', '甲'],
+        'likes': ['120', '1.2万', '30']
+    })
+
+
+def write_template(tmp_dir):
+    path = os.path.join(tmp_dir, 'template.md')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# 自定义模板\n共 {total_notes} 条笔记，请按模板输出报告')
+    return path
+
+
+def test_dimensions_without_template():
+    """测试 dimensions 模式每个维度单独请求，结果按维度分节"""
+    print("🧩 测试分维度分析...")
+    with fake_analyzer() as (analyzer, prompts, _):
+        result = analyzer.analyze_with_ai(sample_data(), mode='dimensions')
+        assert result['analysis_mode'] == 'dimensions'
+        assert len(prompts) == len(DeepSeekAnalyzer.ANALYSIS_DIMENSIONS)
+        assert list(result['ai_sections']) == [key for key, _, _ in DeepSeekAnalyzer.ANALYSIS_DIMENSIONS]
+    print("   ✅ 各维度分别请求")
+
+
+def test_dimensions_with_template():
+    """测试 dimensions 模式指定模板时按模板单次调用，模板不会被忽略"""
+    print("\n📝 测试分维度模式下的自定义模板...")
+    with fake_analyzer() as (analyzer, prompts, tmp_dir):
+        template = write_template(tmp_dir)
+        result = analyzer.analyze_with_ai(sample_data(), template=template, mode='dimensions')
+        assert prompts == ['# 自定义模板\n共 3 条笔记，请按模板输出报告']
+        assert result['ai_analysis'] == '分析内容'
+        assert 'ai_sections' not in result and result.get('analysis_mode') != 'dimensions'
+
+        prompts.clear()
+        analyzer.ai_mode = 'dimensions'
+        events = list(analyzer.stream_analysis_with_ai(sample_data(), template=template))
+        assert prompts == ['# 自定义模板\n共 3 条笔记，请按模板输出报告'], "流式分析同样使用模板"
+        assert events[-1]['event'] == 'done' and events[-1]['result']['ai_analysis'] == '分析内容'
+    print("   ✅ 指定模板时改为按模板单次调用")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 AI分析模式测试")
+    print("=" * 50)
+    test_dimensions_without_template()
+    test_dimensions_with_template()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果缓存测试脚本
+验证缓存键（内容哈希、分析参数、关键词背景语料）、TTL过期、LRU淘汰和命中统计（使用临时目录）
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.analysis_cache import AnalysisCache
+
+
+def write_text(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def test_make_key():
+    """测试缓存键：按文件内容而非路径，分析类型、模板、模型参数和背景语料变化时键随之变化"""
+    print("🔑 测试缓存键...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = AnalysisCache(cache_dir=os.path.join(tmp_dir, 'cache'))
+        first = write_text(os.path.join(tmp_dir, 'a.csv'), 'title,likes\n火锅,10\n')
+        copy = write_text(os.path.join(tmp_dir, 'b.csv'), 'title,likes\n火锅,10\n')
+        other = write_text(os.path.join(tmp_dir, 'c.csv'), 'title,likes\n烧烤,20\n')
+        template = write_text(os.path.join(tmp_dir, 'template.md'), '# 模板')
+        model = {'model': 'deepseek-chat', 'temperature': 0.7}
+
+        key = cache.make_key(first, 'comprehensive', template, model, background='bg1')
+        assert key == cache.make_key(copy, 'comprehensive', template, model, background='bg1'), "内容相同的文件键相同"
+        variants = [
+            cache.make_key(other, 'comprehensive', template, model, background='bg1'),
+            cache.make_key(first, 'trends', template, model, background='bg1'),
+            cache.make_key(first, 'comprehensive', None, model, background='bg1'),
+            cache.make_key(first, 'comprehensive', template, dict(model, temperature=0.2), background='bg1'),
+            cache.make_key(first, 'comprehensive', template, model, background='bg2'),
+            cache.make_key([first, other], 'comprehensive', template, model, background='bg1'),
+        ]
+        assert len(set(variants + [key])) == len(variants) + 1
+
+        # 模板按内容哈希；数据文件改写后键变化
+        write_text(template, '# 新模板')
+        assert cache.make_key(first, 'comprehensive', template, model, background='bg1') != key
+        write_text(template, '# 模板')
+        assert cache.make_key(first, 'comprehensive', template, model, background='bg1') == key
+        write_text(first, 'title,likes\n火锅,11\n')
+        assert cache.make_key(first, 'comprehensive', template, model, background='bg1') != key
+
+        # 缓存版本变化后旧条目失效
+        with mock.patch.object(AnalysisCache, 'CACHE_VERSION', AnalysisCache.CACHE_VERSION + 1):
+            assert cache.make_key(copy, 'comprehensive', template, model, background='bg1') != key
+    print("   ✅ 缓存键正确")
+
+
+def test_is_cacheable():
+    """测试失败的分析结果不缓存"""
+    print("\n🚫 测试可缓存判断...")
+    assert AnalysisCache.is_cacheable({'trends': {}, 'ai_analysis': {'ai_analysis': '分析内容'}})
+    assert not AnalysisCache.is_cacheable({'error': '数据为空'})
+    assert not AnalysisCache.is_cacheable({'ai_analysis': {'error': 'API调用失败'}})
+    assert not AnalysisCache.is_cacheable({'ai_analysis': {'ai_analysis': 'API调用失败: 401'}})
+    assert not AnalysisCache.is_cacheable({'ai_analysis': 'API调用出错: timeout'})
+    assert not AnalysisCache.is_cacheable(None)
+    print("   ✅ 可缓存判断正确")
+
+
+def test_ttl_and_eviction():
+    """测试TTL过期、按最近访问淘汰以及总大小限制"""
+    print("\n⏳ 测试过期和淘汰...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = AnalysisCache(cache_dir=tmp_dir, ttl=60, max_entries=2, max_bytes=10 * 1024 * 1024)
+        cache.put('a', {'value': 1}, 'analysis_a.json')
+        assert cache.get('a')['result'] == {'value': 1}
+        assert cache.get('a')['analysis_file'] == 'analysis_a.json'
+
+        now = time.time()
+        with mock.patch('ai_analyzer.analysis_cache.time.time', return_value=now + 61):
+            assert cache.get('a') is None, "超过TTL的条目应过期"
+        assert not os.path.exists(os.path.join(tmp_dir, 'a.json')), "过期条目应删除"
+
+        # 条目数超出上限时淘汰最久未访问的条目（读取会刷新访问时间）
+        for key in ('a', 'b'):
+            cache.put(key, {'key': key})
+        os.utime(os.path.join(tmp_dir, 'a.json'), (now - 30, now - 30))
+        os.utime(os.path.join(tmp_dir, 'b.json'), (now - 20, now - 20))
+        assert cache.get('a') is not None
+        cache.put('c', {'key': 'c'})
+        assert sorted(os.listdir(tmp_dir)) == ['a.json', 'c.json']
+
+        # 长期未访问的条目在淘汰时按TTL清理
+        os.utime(os.path.join(tmp_dir, 'a.json'), (now - 120, now - 120))
+        assert cache.evict() == 1
+        assert os.listdir(tmp_dir) == ['c.json']
+
+        # 总大小限制
+        small = AnalysisCache(cache_dir=tmp_dir, ttl=0, max_entries=100)
+        small.clear()
+        for i in range(5):
+            small.put(f"k{i}", {'payload': 'x' * 400})
+            os.utime(os.path.join(tmp_dir, f"k{i}.json"), (now - 50 + i, now - 50 + i))
+        small.max_bytes = int(os.path.getsize(os.path.join(tmp_dir, 'k0.json')) * 2.5)
+        small.evict()
+        assert sorted(os.listdir(tmp_dir)) == ['k3.json', 'k4.json']
+    print("   ✅ 过期和淘汰正确")
+
+
+def test_stats_thread_safe():
+    """测试多个线程同时读取时命中统计准确"""
+    print("\n📈 测试命中统计...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = AnalysisCache(cache_dir=tmp_dir, ttl=0)
+        cache.put('hit', {'value': 1})
+
+        def worker():
+            for _ in range(100):
+                cache.get('hit')
+                cache.get('miss')
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats['hits'] == 800 and stats['misses'] == 800
+        assert stats['hit_ratio'] == 0.5
+    print("   ✅ 命中统计正确")
+
+
+def test_hash_memo_bounded():
+    """测试内容哈希的记忆每个路径只保留最新版本，文件数超出上限时按最近使用淘汰"""
+    print("\n🧠 测试内容哈希记忆...")
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(Config, 'ANALYSIS_CACHE_HASH_MEMO_SIZE', 2):
+        cache = AnalysisCache(cache_dir=os.path.join(tmp_dir, 'cache'))
+        path = write_text(os.path.join(tmp_dir, 'a.csv'), 'title\n火锅\n')
+        first = cache.file_hash(path)
+        for i in range(5):
+            write_text(path, f"title\n火锅{i}\n")
+            os.utime(path, (time.time() + i + 1, time.time() + i + 1))
+            assert cache.file_hash(path) != first
+        assert len(cache._hash_memo) == 1, "文件改写后旧版本的哈希被替换"
+
+        others = [write_text(os.path.join(tmp_dir, f"{name}.csv"), name) for name in ('b', 'c')]
+        cache.file_hash(others[0])
+        cache.file_hash(path)
+        cache.file_hash(others[1])
+        assert list(cache._hash_memo) == [os.path.abspath(path), os.path.abspath(others[1])]
+    print("   ✅ 内容哈希记忆有上限")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 分析结果缓存测试")
+    print("=" * 50)
+    test_make_key()
+    test_is_cacheable()
+    test_ttl_and_eviction()
+    test_stats_thread_safe()
+    test_hash_memo_bounded()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
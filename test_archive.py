@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据归档测试脚本
+验证归档合并、清单内容和保留期清理（使用临时目录，不影响 data/）
+"""
+
+import os
+import sys
+import json
+import tempfile
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from crawler.archive import CrawlArchive
+from crawler.catalog import DataCatalog
+
+
+@contextmanager
+def temp_data_dir():
+    """临时数据目录（文件清单也放在临时目录中）"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        catalog = DataCatalog(os.path.join(data_dir, 'cache', 'catalog.sqlite3'), data_dir)
+        with mock.patch.object(Config, 'DATA_DIR', data_dir), \
+                mock.patch('crawler.catalog._default_catalog', catalog):
+            yield data_dir
+
+
+def write_crawl_file(data_dir, name, titles, mtime):
+    """写入一个爬取数据文件，并把修改时间设为指定时间"""
+    path = os.path.join(data_dir, name)
+    pd.DataFrame({
+        'title': titles,
+        'author': [f"作者{i}" for i in range(len(titles))],
+        'likes': ['100'] * len(titles)
+    }).to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+    os.utime(path, (mtime.timestamp(), mtime.timestamp()))
+    return path
+
+
+def test_compact_and_manifest():
+    """测试归档合并和清单内容"""
+    print("🗄️ 测试归档合并...")
+    with temp_data_dir() as data_dir:
+        old = datetime(2024, 1, 5)
+        first = write_crawl_file(data_dir, 'xhs_美食_20240101_100000.csv', ['火锅', '烧烤'], old)
+        second = write_crawl_file(data_dir, 'xhs_美食_20240101_180000.csv', ['甜品'], old)
+        other_day = write_crawl_file(data_dir, 'xhs_美食_20240102_090000.csv', ['早餐'], old)
+        recent = write_crawl_file(data_dir, 'xhs_美食_20240110_080000.csv', ['夜宵'], datetime(2024, 1, 10))
+        write_crawl_file(data_dir, 'notes.csv', ['非爬虫文件'], old)
+
+        archive = CrawlArchive(os.path.join(data_dir, 'archive'))
+        result = archive.compact(now=datetime(2024, 1, 10, 12))
+
+        assert sorted(result['partitions']) == ['美食/2024-01-01', '美食/2024-01-02']
+        assert not result['failed']
+        for path in (first, second, other_day):
+            assert not os.path.exists(path), f"已归档的文件应删除: {path}"
+        assert os.path.exists(recent), "未到归档时间的文件应保留"
+        assert os.path.exists(os.path.join(data_dir, 'notes.csv')), "非爬虫文件不归档"
+
+        with open(archive.manifest_path, 'r', encoding=Config.JSON_ENCODING) as f:
+            manifest = json.load(f)
+        entry = manifest['partitions']['美食/2024-01-01']
+        assert entry['rows'] == 3
+        assert entry['sources'] == ['xhs_美食_20240101_100000.csv', 'xhs_美食_20240101_180000.csv']
+        assert entry['first_crawl'] == '2024-01-01 10:00:00'
+        assert entry['last_crawl'] == '2024-01-01 18:00:00'
+        assert entry['format'] == Config.ARCHIVE_FORMAT
+        assert entry['bytes'] == os.path.getsize(os.path.join(archive.archive_dir, entry['path']))
+        assert manifest['compacted_at'] == '2024-01-10 12:00:00'
+
+        data = archive.scan('美食', '2024-01-01', '2024-01-01')
+        assert sorted(data['title']) == ['火锅', '烧烤', '甜品']
+        assert set(data[CrawlArchive.SOURCE_COLUMN]) == set(entry['sources'])
+        assert len(archive.partitions(start='2024-01-02')) == 1
+
+        # 同名来源文件再次归档时替换分区中原有的行
+        write_crawl_file(data_dir, 'xhs_美食_20240101_100000.csv', ['火锅', '烧烤', '串串'], old)
+        archive.compact(now=datetime(2024, 1, 10, 12))
+        entry = archive.load_manifest()['partitions']['美食/2024-01-01']
+        assert entry['rows'] == 4
+        assert sorted(archive.scan('美食', '2024-01-01', '2024-01-01')['title']) == ['串串', '火锅', '烧烤', '甜品']
+    print("   ✅ 归档合并和清单内容正确")
+
+
+def test_retention():
+    """测试归档分区和分析结果的保留期清理"""
+    print("\n🧹 测试保留期清理...")
+    with temp_data_dir() as data_dir:
+        old = datetime(2024, 1, 5)
+        write_crawl_file(data_dir, 'xhs_旅行_20240101_100000.csv', ['海边'], old)
+        write_crawl_file(data_dir, 'xhs_旅行_20240103_100000.csv', ['雪山'], old)
+        analysis = os.path.join(data_dir, 'analysis_20240101_100000.json')
+        with open(analysis, 'w', encoding=Config.JSON_ENCODING) as f:
+            json.dump({'trends': {}}, f)
+        os.utime(analysis, (old.timestamp(), old.timestamp()))
+
+        archive = CrawlArchive(os.path.join(data_dir, 'archive'))
+        # 默认永久保留
+        result = archive.compact(now=datetime(2024, 3, 1))
+        assert result['expired_partitions'] == [] and result['expired_analyses'] == []
+        assert len(archive.partitions()) == 2
+        assert os.path.exists(analysis)
+
+        with mock.patch.object(Config, 'ARCHIVE_RETENTION_DAYS', 5), \
+                mock.patch.object(Config, 'ANALYSIS_RETENTION_DAYS', 1):
+            result = archive.compact(now=datetime(2024, 1, 7))
+        assert result['expired_partitions'] == ['旅行/2024-01-01']
+        assert result['expired_analyses'] == [analysis]
+        assert not os.path.exists(analysis)
+        assert [entry['date'] for entry in archive.partitions()] == ['2024-01-03']
+        assert not os.path.exists(os.path.join(archive.archive_dir, 'topic=旅行', 'date=2024-01-01'))
+        assert os.path.exists(os.path.join(archive.archive_dir, 'topic=旅行', 'date=2024-01-03'))
+    print("   ✅ 过期分区和分析结果已删除，其余保留")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 数据归档测试")
+    print("=" * 50)
+    test_compact_and_manifest()
+    test_retention()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件清单测试脚本
+验证文件列表的游标分页、按主题/日期查找，以及文件变化后清单的更新（使用临时目录，不影响 data/）
+"""
+
+import os
+import sys
+import json
+import tempfile
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from crawler.catalog import ANALYSIS_KIND, DATA_KIND, DataCatalog
+
+
+def write_file(data_dir, name, rows=1, mtime=None):
+    """写入数据文件（.json 为分析结果），可指定修改时间"""
+    path = os.path.join(data_dir, name)
+    if name.endswith('.json'):
+        with open(path, 'w', encoding=Config.JSON_ENCODING) as f:
+            json.dump({'trends': {}}, f)
+    else:
+        pd.DataFrame({'title': [f"标题{i}" for i in range(rows)], 'likes': range(rows)}).to_csv(
+            path, index=False, encoding=Config.CSV_ENCODING)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def make_catalog(data_dir):
+    return DataCatalog(os.path.join(data_dir, 'cache', 'catalog.sqlite3'), data_dir)
+
+
+def test_pagination():
+    """测试游标分页：按修改时间从新到旧，修改时间相同按文件名，逐页不重复不遗漏"""
+    print("📄 测试游标分页...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        base = 1_700_000_000
+        names = [f"xhs_美食_2024010{i}_120000.csv" for i in range(1, 8)]
+        for i, name in enumerate(names):
+            # 最后三个文件修改时间相同
+            write_file(data_dir, name, rows=i + 1, mtime=base + min(i, 4) * 60)
+        write_file(data_dir, 'analysis_20240101_120000.json', mtime=base)
+
+        catalog = make_catalog(data_dir)
+        catalog.refresh()
+        assert catalog.count(DATA_KIND) == 7
+        assert catalog.count(ANALYSIS_KIND) == 1
+
+        pages, cursor = [], None
+        while True:
+            files, cursor = catalog.list_files(DATA_KIND, cursor=cursor, limit=3)
+            pages.append([item['name'] for item in files])
+            if cursor is None:
+                break
+        assert [len(page) for page in pages] == [3, 3, 1]
+        listed = [name for page in pages for name in page]
+        expected = sorted(names, key=lambda name: (min(names.index(name), 4), name), reverse=True)
+        assert listed == expected, listed
+
+        files, cursor = catalog.list_files(DATA_KIND, limit=7)
+        assert cursor is None, "最后一页不应返回游标"
+        by_name = {item['name']: item for item in files}
+        assert by_name[names[2]]['rows'] == 3
+        assert by_name[names[2]]['topic'] == '美食'
+        assert by_name[names[2]]['crawled_at'] == '2024-01-03 12:00:00'
+        assert by_name[names[2]]['schema'] == ['title', 'likes']
+    print("   ✅ 分页顺序和游标正确")
+
+
+def test_find_data_files():
+    """测试按主题和爬取日期范围查找数据文件"""
+    print("\n🔎 测试按主题和日期查找...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        for name in ('xhs_美食_20240101_080000.csv', 'xhs_美食_20240103_080000.csv',
+                     'xhs_旅行_20240102_080000.csv', 'notes.csv'):
+            write_file(data_dir, name)
+        catalog = make_catalog(data_dir)
+        catalog.refresh()
+
+        found = [os.path.basename(item['path']) for item in catalog.find_data_files('美食', '2024-01-02', '2024-01-03')]
+        assert found == ['xhs_美食_20240103_080000.csv']
+        assert len(catalog.find_data_files(start='2024-01-01', end='2024-01-02')) == 2
+        assert catalog.topics() == ['旅行', '美食']
+        assert catalog.count(DATA_KIND, topic='美食') == 2
+        assert catalog.count(DATA_KIND, query='旅行') == 1
+    print("   ✅ 查找结果正确")
+
+
+def test_invalidation():
+    """测试文件新增、改写和删除后清单随之更新"""
+    print("\n🔄 测试清单更新...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        first = write_file(data_dir, 'xhs_美食_20240101_080000.csv', rows=2)
+        catalog = make_catalog(data_dir)
+        catalog.refresh()
+        assert catalog.count(DATA_KIND) == 1
+
+        # 其他途径新增、删除文件：数据目录修改时间变化，下次查询前重新对比
+        second = write_file(data_dir, 'xhs_美食_20240102_080000.csv', rows=4)
+        catalog.refresh()
+        assert catalog.count(DATA_KIND) == 2
+        os.remove(first)
+        catalog.refresh()
+        files, _ = catalog.list_files(DATA_KIND)
+        assert [item['name'] for item in files] == [os.path.basename(second)]
+
+        # 程序改写文件后直接更新清单
+        write_file(data_dir, os.path.basename(second), rows=9)
+        catalog.record(second)
+        files, _ = catalog.list_files(DATA_KIND)
+        assert files[0]['rows'] == 9
+
+        # 给出行数和字段时不读取文件
+        catalog.record(second, rows=100, columns=['title'])
+        files, _ = catalog.list_files(DATA_KIND)
+        assert files[0]['rows'] == 100 and files[0]['schema'] == ['title']
+
+        # 删除后记录：移出清单；数据目录之外的文件忽略
+        os.remove(second)
+        catalog.record(second)
+        assert catalog.count(DATA_KIND) == 0
+        with tempfile.TemporaryDirectory() as other_dir:
+            catalog.record(write_file(other_dir, 'xhs_美食_20240103_080000.csv'))
+        assert catalog.count(DATA_KIND) == 0
+
+        # 数据库放在 data/cache 下，读写清单不改变数据目录的修改时间
+        directory_mtime = os.stat(data_dir).st_mtime_ns
+        catalog.sync()
+        catalog.list_files(DATA_KIND)
+        assert os.stat(data_dir).st_mtime_ns == directory_mtime
+    print("   ✅ 新增、改写和删除的文件均已更新")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 文件清单测试")
+    print("=" * 50)
+    test_pagination()
+    test_find_data_files()
+    test_invalidation()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分块分析测试脚本
+验证各分块的部分聚合（PartialAggregates）合并后与一次性计算的 AnalysisContext 结果一致
+（使用临时目录，不影响 data/）
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.analysis_context import AnalysisContext
+from ai_analyzer.chunked_context import ChunkedAnalysisContext, PartialAggregates, weighted_quantiles
+from ai_analyzer.keywords import KeywordExtractor
+from ai_analyzer.sketches import HeavyHitters
+
+LIKES_BINS = [0, 10, 100, 1000, 10000, float('inf')]
+LIKES_LABELS = ['0-10', '10-100', '100-1k', '1k-1w', '1w+']
+TITLE_BINS = [0, 10, 20, 30, float('inf')]
+TITLE_LABELS = ['短', '中', '长', '超长']
+
+
+def sample_frame(rows=1000, seed=7):
+    """模拟爬取数据（按文本读入）：点赞含 "1.2万" 和缺失值，发布时间含相对时间和无法解析的值"""
+    rng = np.random.default_rng(seed)
+    words = ['火锅', '烧烤', '甜品', '探店', '美食', '周末', '攻略', '咖啡', '早餐']
+    titles = [''.join(rng.choice(words, size=rng.integers(1, 5))) + f"第{i % 17}期" for i in range(rows)]
+    likes = rng.integers(0, 5000, size=rows).astype(str).astype(object)
+    likes[::13] = '1.2万'
+    likes[::29] = None
+    publish = np.array(['3天前', '昨天 12:30', '12-31', '2023-11-02', '未知', '5小时前'], dtype=object)
+    return pd.DataFrame({
+        'title': titles,
+        'author': [f"作者{n}" for n in rng.integers(0, 150, size=rows)],
+        'likes': likes,
+        'publish_time': publish[rng.integers(0, len(publish), size=rows)],
+        'crawl_time': '2024-01-05 10:00:00'
+    })
+
+
+def merge_chunks(df, chunksize, extractor=None, pool_size=None):
+    """按 chunksize 切分后逐块计算并合并部分聚合"""
+    aggregates = PartialAggregates()
+    for index, start in enumerate(range(0, len(df), chunksize)):
+        chunk = df.iloc[start:start + chunksize].reset_index(drop=True)
+        part = PartialAggregates.from_chunk(chunk, extractor, pool_size=pool_size, seed=index)
+        aggregates.merge(part, pool_size=pool_size)
+    return aggregates
+
+
+def assert_same_aggregates(chunked, exact):
+    """聚合接口结果逐项一致"""
+    assert len(chunked) == len(exact)
+    assert chunked.columns == exact.columns
+    summary, expected = chunked.likes_summary, exact.likes_summary
+    for name in ('max_likes', 'min_likes', 'total_likes'):
+        assert summary[name] == expected[name], name
+    assert abs(summary['avg_likes'] - expected['avg_likes']) < 1e-9
+    for q, value in exact.likes_quantiles.items():
+        assert abs(chunked.likes_quantiles[q] - value) < 1e-9, q
+    assert chunked.likes_tiers == exact.likes_tiers
+    assert chunked.likes_histogram(LIKES_BINS, LIKES_LABELS).tolist() == \
+        exact.likes_histogram(LIKES_BINS, LIKES_LABELS).tolist()
+
+    assert chunked.author_counts.to_dict() == exact.author_counts.to_dict()
+    assert chunked.author_counts.tolist() == exact.author_counts.tolist(), "按发帖数降序"
+    assert chunked.unique_authors == exact.unique_authors
+    assert chunked.author_distribution == exact.author_distribution
+
+    assert abs(chunked.title_length_mean - exact.title_length_mean) < 1e-9
+    assert chunked.title_length_histogram(TITLE_BINS, TITLE_LABELS).tolist() == \
+        exact.title_length_histogram(TITLE_BINS, TITLE_LABELS).tolist()
+
+    assert chunked.date_range == exact.date_range
+    assert chunked.dated_notes == exact.dated_notes
+    assert chunked.weekday_counts.tolist() == exact.weekday_counts.tolist()
+
+
+def test_weighted_quantiles():
+    """测试由取值计数计算的分位数与 Series.quantile 的线性插值一致"""
+    print("📐 测试加权分位数...")
+    rng = np.random.default_rng(1)
+    for size in (1, 2, 5, 100, 1001):
+        values = pd.Series(rng.integers(0, 50, size=size).astype(float))
+        quantiles = [0, 0.2, 0.5, 0.8, 0.99, 1]
+        result = weighted_quantiles(values.value_counts(), quantiles)
+        expected = values.quantile(quantiles)
+        for q in quantiles:
+            assert abs(result[q] - expected[q]) < 1e-9, (size, q)
+    assert np.isnan(weighted_quantiles(pd.Series(dtype='int64'), [0.5])[0.5])
+    print("   ✅ 加权分位数正确")
+
+
+def test_merge_matches_single_pass():
+    """测试不同分块大小下合并结果与一次性计算一致（包括分块边界不整齐和单行分块）"""
+    print("\n🧩 测试部分聚合合并...")
+    df = sample_frame()
+    exact = AnalysisContext(df)
+    for chunksize in (1000, 333, 64, 1):
+        aggregates = merge_chunks(df, chunksize)
+        assert aggregates.rows == len(df)
+        assert_same_aggregates(ChunkedAnalysisContext(aggregates), exact)
+        print(f"   ✅ 分块大小 {chunksize} 结果一致")
+
+
+def test_term_stats_merge():
+    """测试各分块的词频和文档频率合并后与整体统计一致，词表上限只保留高频词条"""
+    print("\n🔤 测试关键词统计合并...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        extractor = KeywordExtractor(cache_dir=tmp_dir, background_dir=tmp_dir)
+        df = sample_frame(rows=600)
+        total, tf, doc_freq = extractor.term_stats(df['title'])
+        merged = merge_chunks(df, 97, extractor).term_stats
+        assert merged[0] == total
+        assert merged[1].to_dict() == tf.to_dict()
+        assert merged[2].to_dict() == doc_freq.to_dict()
+
+        first = extractor.term_stats(df['title'][:300])
+        second = extractor.term_stats(df['title'][300:])
+        limited = KeywordExtractor.merge_term_stats(first, second, vocab=5)
+        assert len(limited[1]) == 5 and list(limited[2].index) == list(limited[1].index)
+        assert limited[1].min() >= tf.sort_values(ascending=False).iloc[4]
+    print("   ✅ 关键词统计合并正确")
+
+
+def test_sample_pool():
+    """测试样本池不超过上限，且保留点赞最高的笔记"""
+    print("\n🎯 测试样本池...")
+    df = sample_frame()
+    aggregates = merge_chunks(df, 100, pool_size=50)
+    samples = aggregates.samples
+    assert len(samples) == 50
+    likes = AnalysisContext(df).likes.fillna(0)
+    assert samples['_likes'].nlargest(25).min() >= likes.nlargest(25).min(), "点赞最高的一半应全部保留"
+    assert samples['title'].isin(df['title']).all()
+
+    ctx = ChunkedAnalysisContext(aggregates)
+    assert len(ctx) == len(df) and len(ctx.data) == 50
+    assert '_likes' not in ctx.data.columns and '_random' not in ctx.data.columns
+    print("   ✅ 样本池正确")
+
+
+def test_heavy_hitters_bounded():
+    """测试作者数超出跟踪上限时内存有上限，高频作者和计数范围正确，作者数由HyperLogLog估计"""
+    print("\n👥 测试高频作者...")
+    rng = np.random.default_rng(3)
+    authors = pd.Series([f"作者{n}" for n in rng.zipf(1.3, size=20000) % 5000])
+    exact = authors.value_counts()
+
+    hitters = HeavyHitters(capacity=200)
+    for start in range(0, len(authors), 1000):
+        hitters.update(authors[start:start + 1000].value_counts())
+        assert len(hitters.counts) <= 200, "跟踪的作者数不超过上限"
+    assert not hitters.exact
+    true_counts = exact.reindex(hitters.counts.index, fill_value=0)
+    assert ((hitters.counts - hitters.errors) <= true_counts).all() and (true_counts <= hitters.counts).all()
+    assert exact[~exact.index.isin(hitters.counts.index)].max() <= hitters.floor, "未跟踪的作者计数不超过 floor"
+    assert list(hitters.top(5).index) == list(exact.head(5).index)
+
+    # 分两部分构建后合并，计数范围同样成立
+    left, right = HeavyHitters(capacity=200), HeavyHitters(capacity=200)
+    left.update(authors[:12000].value_counts())
+    right.update(authors[12000:].value_counts())
+    merged = left.merge(right)
+    true_counts = exact.reindex(merged.counts.index, fill_value=0)
+    assert ((merged.counts - merged.errors) <= true_counts).all() and (true_counts <= merged.counts).all()
+    assert list(merged.top(5).index) == list(exact.head(5).index)
+
+    df = pd.DataFrame({'author': authors, 'likes': '1'})
+    with mock.patch.object(Config, 'ANALYSIS_AUTHOR_CAPACITY', 200):
+        ctx = ChunkedAnalysisContext(merge_chunks(df, 1000))
+    assert len(ctx.author_counts) <= 200
+    assert list(ctx.author_counts.head(5).index) == list(exact.head(5).index)
+    unique = exact.size
+    assert abs(ctx.unique_authors - unique) <= 4 * 1.04 / 128 * unique
+    distribution = ctx.author_distribution
+    assert sum(distribution.values()) == ctx.unique_authors
+    assert distribution['multiple_posts'] <= int((exact > 1).sum())
+    print("   ✅ 高频作者正确，内存有上限")
+
+
+def test_from_file():
+    """测试分块读取CSV文件的结果与一次性读取后计算一致"""
+    print("\n📂 测试分块读取文件...")
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            mock.patch.object(Config, 'SKETCH_CACHE_DIR', os.path.join(tmp_dir, 'sketches')):
+        path = os.path.join(tmp_dir, 'xhs_美食_20240105_100000.csv')
+        sample_frame().to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+        extractor = KeywordExtractor(cache_dir=tmp_dir, background_dir=tmp_dir)
+
+        chunked = ChunkedAnalysisContext.from_file(path, chunksize=128, keyword_extractor=extractor)
+        exact = AnalysisContext(pd.read_csv(path, encoding=Config.CSV_ENCODING, dtype=ChunkedAnalysisContext.DTYPES))
+        assert chunked.source == path
+        assert_same_aggregates(chunked, exact)
+        assert chunked.sketches.rows == len(exact)
+        assert os.listdir(os.path.join(tmp_dir, 'sketches')), "草图按来源文件保存"
+    print("   ✅ 分块读取文件结果一致")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 分块分析测试")
+    print("=" * 50)
+    test_weighted_quantiles()
+    test_merge_matches_single_pass()
+    test_term_stats_merge()
+    test_sample_pool()
+    test_heavy_hitters_bounded()
+    test_from_file()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据集缓存测试脚本
+验证调用方原地修改返回的数据不影响缓存，文件改写后缓存失效（使用临时目录）
+"""
+
+import os
+import sys
+import time
+import tempfile
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from crawler.dataset_cache import DatasetCache
+
+
+def write_data(path, likes):
+    pd.DataFrame({'title': ['火锅', '烧烤'], 'likes': likes}).to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+
+
+def test_mutation_does_not_corrupt_cache():
+    """测试对返回数据的 .loc 赋值、fillna(inplace=True) 和增删列不影响后续请求读到的缓存数据"""
+    print("🛡️ 测试原地修改...")
+    assert int(pd.__version__.split('.')[0]) >= 3 or pd.options.mode.copy_on_write, "缓存依赖写时复制"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'xhs_美食_20240101_100000.csv')
+        write_data(path, [10, None])
+        cache = DatasetCache(max_bytes=10 * 1024 * 1024)
+
+        first = cache.load(path)
+        first.loc[0, 'likes'] = 999
+        first['likes'] = first['likes'].fillna(0)
+        first.fillna({'title': ''}, inplace=True)
+        first['extra'] = 1
+
+        second = cache.load(path)
+        assert cache.stats()['hits'] == 1
+        assert second['likes'].iloc[0] == 10 and pd.isna(second['likes'].iloc[1])
+        assert 'extra' not in second.columns
+
+        second.loc[1, 'likes'] = 5
+        second.drop(columns=['title'], inplace=True)
+        third = cache.get(path)
+        assert pd.isna(third['likes'].iloc[1]) and 'title' in third.columns
+    print("   ✅ 原地修改不影响缓存")
+
+
+def test_rewritten_file_invalidates():
+    """测试文件改写后重新读取"""
+    print("\n🔄 测试文件改写...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'xhs_美食_20240101_100000.csv')
+        write_data(path, [10, 20])
+        cache = DatasetCache(max_bytes=10 * 1024 * 1024)
+        assert cache.load(path)['likes'].tolist() == [10, 20]
+        write_data(path, [30, 40])
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert cache.get(path) is None
+        assert cache.load(path)['likes'].tolist() == [30, 40]
+    print("   ✅ 文件改写后缓存失效")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 数据集缓存测试")
+    print("=" * 50)
+    test_mutation_does_not_corrupt_cache()
+    test_rewritten_file_invalidates()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取任务队列测试脚本
+验证队列满时拒绝提交（接口返回429）、取消排队/执行中的任务，以及服务重启后恢复未完成的任务
+（使用模拟爬虫和临时数据库，不启动浏览器）
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from crawler.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, CrawlJobQueue, QueueFullError
+from crawler.xhs_crawler import CrawlCancelled
+
+
+class FakeCrawler:
+    """模拟爬虫：逐条报告进度；给出 release 时一直等到放行（或被取消）才结束"""
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release
+        self.cancel_event = None
+        self.progress_callback = None
+        self.topics = []
+
+    def crawl_hot_notes(self, topic, limit, cookies=None, data_format=None):
+        self.topics.append(topic)
+        for i in range(limit):
+            self.progress_callback('note', {'count': i + 1, 'limit': limit})
+        while self.release is not None and not self.release.wait(0.01):
+            if self.cancel_event.is_set():
+                raise CrawlCancelled("爬取已取消")
+        return f"/tmp/xhs_{topic}_20240101_120000.csv"
+
+
+def wait_for_state(job_queue, job_id, state, timeout=5.0):
+    """等待任务进入指定状态"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get(job_id)
+        if job['state'] == state:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"任务 {job_id} 未进入 {state} 状态: {job_queue.get(job_id)}")
+
+
+def test_queue_full_and_cancel():
+    """测试队列上限、取消排队和执行中的任务"""
+    print("🕷️ 测试队列上限和取消...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        release = threading.Event()
+        job_queue = CrawlJobQueue(os.path.join(tmp_dir, 'jobs.sqlite3'), workers=1, max_pending=2,
+                                  crawler_factory=lambda: FakeCrawler(release))
+        job_queue.start()
+
+        first = job_queue.submit('美食', 3)
+        wait_for_state(job_queue, first['id'], RUNNING)
+        second = job_queue.submit('旅行', 3)
+        assert second['state'] == QUEUED and second['queue_position'] == 0
+        try:
+            job_queue.submit('穿搭', 3)
+            raise AssertionError("队列已满时应拒绝提交")
+        except QueueFullError:
+            pass
+        assert job_queue.stats()['queued'] == 1 and job_queue.stats()['running'] == 1
+
+        # 排队中的任务直接取消，释放名额
+        assert job_queue.cancel(second['id'])['state'] == CANCELLED
+        third = job_queue.submit('穿搭', 2)
+
+        # 执行中的任务设置取消标记，爬虫结束后状态变为已取消
+        assert job_queue.cancel(first['id'])['cancel_requested']
+        job = wait_for_state(job_queue, first['id'], CANCELLED)
+        assert job['progress']['notes'] == 3
+
+        wait_for_state(job_queue, third['id'], RUNNING)
+        release.set()
+        job = wait_for_state(job_queue, third['id'], SUCCEEDED)
+        assert job['result']['count'] == 2
+        assert job['result']['filename'] == 'xhs_穿搭_20240101_120000.csv'
+        assert job_queue.cancel('不存在的任务') is None
+
+        events = job_queue.wait_events(third['id'], 0, timeout=0)
+        assert [event['id'] for event in events] == [1, 2]
+        assert events[-1]['data'] == {'count': 2, 'limit': 2}
+        assert job_queue.wait_events(third['id'], 2, timeout=0) == []
+        assert job_queue.wait_events(second['id'], 0, timeout=0) is None, "未执行过的任务没有进度事件"
+    print("   ✅ 队列上限和取消正确")
+
+
+def test_http_backpressure():
+    """测试接口：队列满时返回429和Retry-After，任务查询和取消"""
+    print("\n🌐 测试任务接口...")
+    import web_app.app as web_app
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        release = threading.Event()
+        job_queue = CrawlJobQueue(os.path.join(tmp_dir, 'jobs.sqlite3'), workers=1, max_pending=1,
+                                  crawler_factory=lambda: FakeCrawler(release))
+        job_queue.start()
+        with mock.patch.object(web_app, 'job_queue', job_queue):
+            client = web_app.app.test_client()
+            response = client.post('/api/jobs/crawl', json={'topic': '美食', 'limit': 5})
+            assert response.status_code == 202
+            job_id = response.get_json()['job']['id']
+            assert response.get_json()['status_url'] == f"/api/jobs/{job_id}"
+
+            response = client.post('/api/jobs/crawl', json={'topic': '旅行', 'limit': 5})
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '30'
+            assert client.post('/api/jobs/crawl', json={'topic': ''}).status_code == 400
+
+            assert client.get(f'/api/jobs/{job_id}').status_code == 200
+            assert client.get('/api/jobs/不存在的任务').status_code == 404
+            assert client.post('/api/jobs/不存在的任务/cancel').status_code == 404
+            response = client.post(f'/api/jobs/{job_id}/cancel')
+            assert response.status_code == 200
+            wait_for_state(job_queue, job_id, CANCELLED)
+
+            # 任务结束后名额释放
+            response = client.post('/api/jobs/crawl', json={'topic': '旅行', 'limit': 5})
+            assert response.status_code == 202
+            release.set()
+            wait_for_state(job_queue, response.get_json()['job']['id'], SUCCEEDED)
+            assert client.get('/api/jobs').get_json()['stats']['states'] == {CANCELLED: 1, SUCCEEDED: 1}
+    print("   ✅ 429、查询和取消接口正确")
+
+
+def test_resume_after_restart():
+    """测试重启后未完成的任务（包括重启时正在执行的任务）按提交顺序重新执行"""
+    print("\n🔁 测试重启后恢复任务...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'jobs.sqlite3')
+        # 上次运行：一个任务执行到一半时服务退出，一个任务仍在排队，一个已取消
+        previous = CrawlJobQueue(db_path, workers=1, max_pending=5)
+        interrupted = previous.submit('美食', 2)
+        pending = previous.submit('旅行', 2)
+        cancelled = previous.submit('穿搭', 2)
+        previous.cancel(cancelled['id'])
+        previous._update(interrupted['id'], state=RUNNING, started_at=previous._now())
+
+        crawler = FakeCrawler()
+        restarted = CrawlJobQueue(db_path, workers=1, max_pending=5, crawler_factory=lambda: crawler)
+        assert restarted.start() == 2
+        assert restarted.start() == 0, "重复启动不应再次排队"
+        for job in (interrupted, pending):
+            assert wait_for_state(restarted, job['id'], SUCCEEDED)['result']['count'] == 2
+        assert crawler.topics == ['美食', '旅行']
+        assert restarted.get(cancelled['id'])['state'] == CANCELLED
+    print("   ✅ 未完成的任务已按顺序恢复执行")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 爬取任务队列测试")
+    print("=" * 50)
+    test_queue_full_and_cancel()
+    test_http_backpressure()
+    test_resume_after_restart()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词提取测试脚本
+验证背景语料的内存缓存有上限、历史数据文件增删后清理过期的背景语料（使用临时目录）
+"""
+
+import os
+import sys
+import tempfile
+import pandas as pd
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.keywords import KeywordExtractor
+
+
+def write_crawl(data_dir, index, titles):
+    path = os.path.join(data_dir, f"xhs_美食_2024010{index}_100000.csv")
+    pd.DataFrame({'title': titles}).to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+    return path
+
+
+def test_background_memo_bounded():
+    """测试每次新增爬取文件产生新的背景语料时，内存中只保留最近使用的几份"""
+    print("🧠 测试背景语料内存缓存...")
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(Config, 'KEYWORD_BACKGROUND_MEMO_SIZE', 2):
+        data_dir = os.path.join(tmp_dir, 'data')
+        os.makedirs(data_dir)
+        extractor = KeywordExtractor(cache_dir=os.path.join(tmp_dir, 'cache'), background_dir=data_dir)
+        signatures = []
+        for index in range(1, 6):
+            write_crawl(data_dir, index, ['火锅探店攻略', '周末火锅推荐', f"烧烤第{index}期"])
+            signatures.append(extractor._background()['signature'])
+            assert len(extractor._background_memo) <= 2
+        assert len(set(signatures)) == 5, "每个新文件都改变背景语料签名"
+        assert list(extractor._background_memo) == signatures[-2:], "按最近使用保留"
+
+        # 不同的 exclude 对应不同的合并结果，按最近使用淘汰
+        keys = [KeywordExtractor.file_key(path) for path in sorted(extractor._background_files())]
+        first = extractor._background(exclude=keys[0])['signature']
+        second = extractor._background(exclude=keys[1])['signature']
+        assert list(extractor._background_memo) == [first, second]
+        extractor._background(exclude=keys[0])
+        extractor._background(exclude=keys[2])
+        assert first in extractor._background_memo and second not in extractor._background_memo
+    print("   ✅ 背景语料内存缓存有上限")
+
+
+def test_evict_drops_stale_background():
+    """测试历史数据文件被删除后，包含它的背景语料和文件统计从内存中清理"""
+    print("\n🧹 测试清理过期背景语料...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.join(tmp_dir, 'data')
+        os.makedirs(data_dir)
+        extractor = KeywordExtractor(cache_dir=os.path.join(tmp_dir, 'cache'), background_dir=data_dir)
+        first = write_crawl(data_dir, 1, ['火锅探店攻略', '周末火锅推荐'])
+        write_crawl(data_dir, 2, ['甜品店推荐', '周末甜品攻略'])
+        background = extractor._background()
+        assert background['docs'] == 4 and len(extractor._file_memo) == 2
+
+        removed_key = KeywordExtractor.file_key(first)
+        os.remove(first)
+        live_keys = {KeywordExtractor.file_key(path) for path in extractor._background_files()}
+        extractor.evict(live_keys)
+        assert background['signature'] not in extractor._background_memo
+        assert removed_key not in extractor._file_memo
+        assert not any(name.startswith(f"background_{removed_key[:32]}") for name in os.listdir(extractor.cache_dir))
+        assert extractor._background()['docs'] == 2
+    print("   ✅ 过期背景语料已清理")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 关键词提取测试")
+    print("=" * 50)
+    test_background_memo_bounded()
+    test_evict_drops_stale_background()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大模型响应缓存测试脚本
+验证缓存键、TTL过期、按最近访问淘汰（条目数和总大小）以及跨实例共享的命中统计（使用临时数据库）
+"""
+
+import os
+import sys
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_analyzer.llm_cache import LLMResponseCache
+
+
+class FakeClock:
+    """可手动推进的时间"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def test_make_key():
+    """测试缓存键：模型、温度、最大token数或消息不同时键不同，与字典顺序无关"""
+    print("🔑 测试缓存键...")
+    messages = [{'role': 'system', 'content': '你是分析师'}, {'role': 'user', 'content': '分析美食笔记'}]
+    key = LLMResponseCache.make_key('deepseek-chat', 0.7, 4000, messages)
+    reordered = [{'content': m['content'], 'role': m['role']} for m in messages]
+    assert key == LLMResponseCache.make_key('deepseek-chat', 0.7, 4000, reordered)
+    variants = {
+        LLMResponseCache.make_key('deepseek-reasoner', 0.7, 4000, messages),
+        LLMResponseCache.make_key('deepseek-chat', 0.2, 4000, messages),
+        LLMResponseCache.make_key('deepseek-chat', 0.7, 2000, messages),
+        LLMResponseCache.make_key('deepseek-chat', 0.7, 4000, messages[1:]),
+    }
+    assert key not in variants and len(variants) == 4
+    print("   ✅ 缓存键正确")
+
+
+def test_ttl():
+    """测试超过TTL的条目读取时失效，写入时清理"""
+    print("\n⏳ 测试TTL过期...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clock = FakeClock()
+        with mock.patch('ai_analyzer.llm_cache.time.time', clock):
+            cache = LLMResponseCache(os.path.join(tmp_dir, 'llm.sqlite3'), ttl=60, max_entries=10, max_bytes=10 ** 6)
+            cache.put('a', '分析结果A', 'deepseek-chat', 0.7)
+            clock.advance(30)
+            assert cache.get('a') == '分析结果A'
+            cache.put('b', '分析结果B')
+            clock.advance(31)
+            assert cache.get('a') is None, "TTL按写入时间计算，读取不延长"
+            assert cache.get('b') == '分析结果B'
+            clock.advance(30)
+            cache.put('c', '分析结果C')
+            assert cache.stats()['entries'] == 1, "写入时清理过期条目"
+    print("   ✅ TTL过期正确")
+
+
+def test_lru_eviction():
+    """测试超出条目数或总大小时按最近访问时间淘汰"""
+    print("\n🧹 测试LRU淘汰...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clock = FakeClock()
+        with mock.patch('ai_analyzer.llm_cache.time.time', clock):
+            cache = LLMResponseCache(os.path.join(tmp_dir, 'llm.sqlite3'), ttl=0, max_entries=3, max_bytes=10 ** 6)
+            for key in ('a', 'b', 'c'):
+                cache.put(key, key * 10)
+                clock.advance(1)
+            assert cache.get('a') == 'a' * 10  # a 变为最近访问
+            clock.advance(1)
+            cache.put('d', 'd' * 10)
+            assert cache.get('b') is None, "最久未访问的条目应被淘汰"
+            for key in ('a', 'c', 'd'):
+                clock.advance(1)
+                assert cache.get(key) == key * 10
+
+            # 总大小限制（按UTF-8字节数计算），保留最近访问的条目
+            clock.advance(1)
+            cache.max_bytes = 30
+            cache.put('e', '中' * 5)  # 15字节
+            assert cache.stats()['size_bytes'] == 25
+            assert cache.get('e') == '中' * 5
+            assert cache.get('d') == 'd' * 10
+            assert cache.get('a') is None and cache.get('c') is None
+    print("   ✅ LRU淘汰正确")
+
+
+def test_shared_stats():
+    """测试命中统计保存在数据库中，多个实例（进程）累计"""
+    print("\n📈 测试命中统计...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'llm.sqlite3')
+        first = LLMResponseCache(db_path)
+        second = LLMResponseCache(db_path)
+        first.put('a', '结果')
+        assert first.get('a') == '结果'
+        assert second.get('a') == '结果'
+        assert second.get('missing') is None
+        stats = first.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+        assert abs(stats['hit_ratio'] - 2 / 3) < 1e-9
+
+        second.clear()
+        stats = first.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (0, 0, 0)
+    print("   ✅ 命中统计正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 大模型响应缓存测试")
+    print("=" * 50)
+    test_make_key()
+    test_ttl()
+    test_lru_eviction()
+    test_shared_stats()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
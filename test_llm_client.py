@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DeepSeek API客户端测试脚本
+验证熔断器状态转换（关闭 → 打开 → 半开 → 关闭）、Retry-After解析、重试和并发限制
+（使用本地模拟服务，不调用真实API）
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_analyzer.llm_client import CircuitBreaker, CircuitOpenError, DeepSeekClient, LLMAPIError
+
+
+class FakeClock:
+    """可手动推进的时间"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """按预设顺序返回响应：(状态码, 响应头, 响应体)；预设用完后返回200"""
+
+    script = []
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        ScriptedHandler.requests += 1
+        status, headers, body = self.script.pop(0) if self.script else (200, {}, None)
+        if body is None:
+            body = json.dumps({'choices': [{'message': {'content': '分析完成'}}]})
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers:
+            # 预设了更大的 Content-Length 时，响应体未写完就断开连接，模拟流式响应中途中断
+            self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ScriptedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_client(server, **overrides):
+    client = DeepSeekClient(api_base=f"http://127.0.0.1:{server.server_address[1]}", api_key='test')
+    client.backoff_base = 0.001
+    client.backoff_max = 0.01
+    for name, value in overrides.items():
+        setattr(client, name, value)
+    return client
+
+
+def test_circuit_breaker_states():
+    """测试熔断器：连续失败打开，冷却后半开只放行一次探测，探测失败重新打开，成功后关闭"""
+    print("🔌 测试熔断器状态...")
+    clock = FakeClock()
+    with mock.patch('ai_analyzer.llm_client.time.monotonic', clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == 'closed' and breaker.allow()
+
+        breaker.record_failure()
+        assert breaker.state == 'open'
+        assert not breaker.allow()
+        clock.advance(9.9)
+        assert not breaker.allow()
+
+        clock.advance(0.1)
+        assert breaker.state == 'half_open'
+        assert breaker.allow(), "冷却后放行一次探测请求"
+        assert not breaker.allow(), "探测进行中时不放行其他请求"
+
+        breaker.record_failure()
+        assert breaker.state == 'open', "探测失败后重新打开"
+        assert not breaker.allow()
+
+        clock.advance(10)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == 'closed' and breaker.failures == 0
+        assert breaker.allow() and breaker.allow()
+
+        # 成功会清零连续失败计数
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == 'closed'
+    print("   ✅ 熔断器状态转换正确")
+
+
+def test_retry_after_parsing():
+    """测试Retry-After：秒数、HTTP日期、超出上限截断，无法解析时退回指数退避"""
+    print("\n⏱️ 测试Retry-After解析...")
+    client = DeepSeekClient(api_base='http://127.0.0.1:9', api_key='test')
+    client.backoff_base = 1.0
+    client.backoff_max = 30.0
+
+    assert client._retry_delay(0, FakeResponse({'Retry-After': '3'})) == 3.0
+    assert client._retry_delay(0, FakeResponse({'Retry-After': '0.5'})) == 0.5
+    assert client._retry_delay(0, FakeResponse({'Retry-After': '3600'})) == 30.0
+
+    future = formatdate(time.time() + 10, usegmt=True)
+    assert 8.0 <= client._retry_delay(0, FakeResponse({'Retry-After': future})) <= 10.0
+    past = formatdate(time.time() - 60, usegmt=True)
+    assert client._retry_delay(0, FakeResponse({'Retry-After': past})) == 0
+
+    with mock.patch('ai_analyzer.llm_client.random.uniform', side_effect=lambda low, high: high):
+        assert client._retry_delay(2, FakeResponse({'Retry-After': '不是时间'})) == 4.0
+        assert client._retry_delay(2, FakeResponse({})) == 4.0
+        assert client._retry_delay(3, None) == 8.0
+        assert client._retry_delay(10, None) == 30.0, "指数退避不超过上限"
+    print("   ✅ Retry-After解析正确")
+
+
+def test_retries_and_circuit():
+    """测试客户端：429/5xx重试后成功，4xx不重试也不计入熔断，重试耗尽后熔断拒绝调用"""
+    print("\n🔁 测试重试和熔断...")
+    server = start_server()
+    try:
+        client = make_client(server, max_retries=2)
+        client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        ScriptedHandler.script = [(429, {'Retry-After': '0'}, '{}'), (503, {}, '{}')]
+        ScriptedHandler.requests = 0
+        result = client.chat([{'role': 'user', 'content': '你好'}], model='deepseek-chat')
+        assert result['choices'][0]['message']['content'] == '分析完成'
+        assert ScriptedHandler.requests == 3
+        assert client.metrics()['retries'] == 2 and client.breaker.state == 'closed'
+
+        ScriptedHandler.script = [(400, {}, '{"error": "bad request"}')] * 3
+        ScriptedHandler.requests = 0
+        try:
+            client.chat([{'role': 'user', 'content': '你好'}])
+            raise AssertionError("4xx应抛出LLMAPIError")
+        except LLMAPIError as e:
+            assert e.status_code == 400 and 'bad request' in e.text
+        assert ScriptedHandler.requests == 1, "4xx不重试"
+        assert client.breaker.failures == 0, "4xx不计入熔断"
+
+        for _ in range(2):
+            ScriptedHandler.script = [(500, {}, '{}')] * 3
+            try:
+                client.chat([{'role': 'user', 'content': '你好'}])
+                raise AssertionError("重试耗尽后应抛出LLMAPIError")
+            except LLMAPIError as e:
+                assert e.status_code == 500
+        assert client.breaker.state == 'open'
+
+        ScriptedHandler.requests = 0
+        try:
+            client.chat([{'role': 'user', 'content': '你好'}])
+            raise AssertionError("熔断打开时应拒绝调用")
+        except CircuitOpenError:
+            pass
+        assert ScriptedHandler.requests == 0
+        metrics = client.metrics()
+        assert metrics['rejected'] == 1 and metrics['circuit_state'] == 'open'
+        assert metrics['errors'] == 3 and metrics['calls'] == 4
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ 重试和熔断正确")
+
+
+def test_stream_holds_limiter():
+    """测试流式响应读取完毕或关闭前一直占用并发限制"""
+    print("\n🚦 测试流式请求的并发限制...")
+    server = start_server()
+    try:
+        client = make_client(server)
+        client.limiter = threading.BoundedSemaphore(1)
+        lines = '\n\n'.join(['data: {"choices": [{"delta": {"content": "分析"}}]}', 'data: [DONE]']) + '\n\n'
+        ScriptedHandler.script = [(200, {'Content-Type': 'text/event-stream'}, lines)] * 2
+
+        stream = client.stream_chat([{'role': 'user', 'content': '你好'}])
+        assert next(stream).startswith(b'data:')
+        assert not client.limiter.acquire(blocking=False), "读取流式响应期间应占用并发名额"
+        stream.close()
+        assert client.limiter.acquire(blocking=False), "关闭后应释放并发名额"
+        client.limiter.release()
+
+        received = [line for line in client.stream_chat([{'role': 'user', 'content': '你好'}]) if line]
+        assert received[-1] == b'data: [DONE]'
+        assert client.limiter.acquire(blocking=False), "读取完毕后应释放并发名额"
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ 并发名额在流式响应结束后才释放")
+
+
+def test_stream_cut_midway_trips_breaker():
+    """测试流式响应返回200后中途断开时计入熔断和错误统计，连续中断后熔断打开"""
+    print("\n✂️ 测试流式响应中途断开...")
+    server = start_server()
+    try:
+        client = make_client(server)
+        client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        lines = 'data: {"choices": [{"delta": {"content": "分析"}}]}\n\n'
+        cut = (200, {'Content-Type': 'text/event-stream', 'Content-Length': str(len(lines.encode('utf-8')) + 100)}, lines)
+        ScriptedHandler.script = [cut, cut]
+        for _ in range(2):
+            try:
+                list(client.stream_chat([{'role': 'user', 'content': '你好'}]))
+                raise AssertionError("流式响应中断时应抛出异常")
+            except requests.RequestException:
+                pass
+        metrics = client.metrics()
+        assert metrics['errors'] == 2 and metrics['calls'] == 2
+        assert client.breaker.state == 'open', "总是中途断开的后端应触发熔断"
+        try:
+            next(client.stream_chat([{'role': 'user', 'content': '你好'}]))
+            raise AssertionError("熔断打开时应拒绝调用")
+        except CircuitOpenError:
+            pass
+
+        # 完整读取或提前关闭的流式响应计为成功
+        client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        ScriptedHandler.script = [(200, {'Content-Type': 'text/event-stream'}, lines + 'data: [DONE]\n\n')] * 2
+        list(client.stream_chat([{'role': 'user', 'content': '你好'}]))
+        stream = client.stream_chat([{'role': 'user', 'content': '你好'}])
+        next(stream)
+        stream.close()
+        metrics = client.metrics()
+        assert metrics['errors'] == 2 and metrics['calls'] == 4
+        assert client.breaker.state == 'closed' and client.breaker.failures == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("   ✅ 中途断开计入熔断")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 DeepSeek API客户端测试")
+    print("=" * 50)
+    test_circuit_breaker_states()
+    test_retry_after_parsing()
+    test_retries_and_circuit()
+    test_stream_holds_limiter()
+    test_stream_cut_midway_trips_breaker()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多文件合并读取测试脚本
+验证按笔记ID去重保留最新快照、经过进程内数据集缓存读取以及共享读取线程池（使用临时目录）
+"""
+
+import os
+import sys
+import tempfile
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer import merged_loader
+from ai_analyzer.merged_loader import load_merged
+from crawler.dataset_cache import DatasetCache
+
+
+def write_crawl(data_dir, stamp, rows):
+    """rows 为 (笔记ID, 点赞) 列表"""
+    path = os.path.join(data_dir, f"xhs_美食_{stamp}.csv")
+    pd.DataFrame({
+        'title': [f"笔记{key}" for key, _ in rows],
+        'likes': [likes for _, likes in rows],
+        'link': [f"https://www.xiaohongshu.com/explore/{key}" for key, _ in rows],
+        'publish_time': '3天前'
+    }).to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+    return path
+
+
+def test_dedupe_latest_snapshot():
+    """测试同一笔记保留最晚爬取的一行，发布时间以各文件的爬取时间为基准"""
+    print("🧩 测试合并去重...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        older = write_crawl(data_dir, '20240101_100000', [('n1', '10'), ('n2', '20')])
+        newer = write_crawl(data_dir, '20240103_100000', [('n1', '15'), ('n3', '30')])
+        data = load_merged([newer, older], workers=2)
+        assert data.attrs['duplicates'] == 1 and data.attrs['sources'] == [newer, older]
+        likes = dict(zip(data['title'], data['likes']))
+        assert likes == {'笔记n1': 15, '笔记n2': 20, '笔记n3': 30}
+        assert data.loc[data['title'] == '笔记n2', 'publish_at'].iloc[0] == pd.Timestamp('2023-12-29 10:00:00')
+        assert '_note_key' not in data.columns and '_snapshot_at' not in data.columns
+        assert load_merged([newer, older], workers=1).equals(data), "串行与并行读取结果一致"
+    print("   ✅ 合并去重正确")
+
+
+def test_dataset_cache_and_shared_pool():
+    """测试经过数据集缓存读取（再次合并时命中，缓存数据不被修改），读取线程池在多次调用间共享"""
+    print("\n💾 测试数据集缓存和共享线程池...")
+    with tempfile.TemporaryDirectory() as data_dir:
+        paths = [
+            write_crawl(data_dir, '20240101_100000', [('n1', '10'), ('n2', '20')]),
+            write_crawl(data_dir, '20240102_100000', [('n1', '12')])
+        ]
+        cache = DatasetCache(max_bytes=10 * 1024 * 1024)
+        first = load_merged(paths, workers=2, dataset_cache=cache)
+        pool = merged_loader._pool
+        assert pool is not None
+        assert cache.stats()['misses'] == 2 and cache.stats()['entries'] == 2
+
+        second = load_merged(paths, workers=2, dataset_cache=cache)
+        assert merged_loader._pool is pool, "线程池在多次调用间复用"
+        assert cache.stats()['hits'] == 2
+        assert second.equals(first)
+        cached = cache.get(paths[0])
+        assert '_note_key' not in cached.columns and 'publish_at' not in cached.columns, "合并时不修改缓存的数据"
+    print("   ✅ 经过数据集缓存读取，线程池复用")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 多文件合并读取测试")
+    print("=" * 50)
+    test_dedupe_latest_snapshot()
+    test_dataset_cache_and_shared_pool()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布时间解析测试脚本
+验证相对时间、昨天/前天、不带年份的日期（跨年）和非法日期的解析
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_analyzer.publish_time import parse_publish_time
+
+CRAWL_TIME = '2024-01-05 10:00:00'
+
+
+def parse_one(value, crawl_time=CRAWL_TIME):
+    return parse_publish_time([value], [crawl_time])[0]
+
+
+def test_relative_times():
+    """测试 "N天前"、"刚刚" 等相对时间以爬取时间为基准"""
+    print("🕒 测试相对时间...")
+    base = pd.Timestamp(CRAWL_TIME)
+    assert parse_one('3天前') == base - pd.Timedelta(days=3)
+    assert parse_one('5分钟前') == base - pd.Timedelta(minutes=5)
+    assert parse_one('2小时前') == base - pd.Timedelta(hours=2)
+    assert parse_one('1周前') == base - pd.Timedelta(days=7)
+    assert parse_one('刚刚') == base
+    assert parse_one('编辑于 3天前 上海') == base - pd.Timedelta(days=3), "允许前缀和地区后缀"
+    print("   ✅ 相对时间正确")
+
+
+def test_day_words():
+    """测试 "昨天 12:30"、"今天"、"前天"（按基准日期减天数再加时分）"""
+    print("\n📅 测试昨天/今天/前天...")
+    assert parse_one('昨天 12:30') == pd.Timestamp('2024-01-04 12:30')
+    assert parse_one('今天 08:05') == pd.Timestamp('2024-01-05 08:05')
+    assert parse_one('前天') == pd.Timestamp('2024-01-03')
+    assert parse_one('昨天 23:59', '2024-01-01 00:10:00') == pd.Timestamp('2023-12-31 23:59'), "跨年"
+    print("   ✅ 昨天/今天/前天正确")
+
+
+def test_month_day():
+    """测试不带年份的日期：晚于爬取时间的属于上一年，非法日期为NaT"""
+    print("\n🗓️ 测试不带年份的日期...")
+    assert parse_one('12-31') == pd.Timestamp('2023-12-31'), "爬取时间之后的日期属于上一年"
+    assert parse_one('01-04') == pd.Timestamp('2024-01-04')
+    assert parse_one('01-06') == pd.Timestamp('2024-01-06'), "晚于爬取时间不超过一天的视为当年（时区误差）"
+    assert parse_one('12-31', '2024-12-31 20:00:00') == pd.Timestamp('2024-12-31')
+    assert parse_one('08-15 09:30') == pd.Timestamp('2023-08-15 09:30')
+    assert parse_one('3月8日') == pd.Timestamp('2023-03-08')
+    assert pd.isna(parse_one('02-30')), "非法日期应为NaT"
+    assert pd.isna(parse_one('13-01'))
+    assert parse_one('02-29', '2024-03-01 10:00:00') == pd.Timestamp('2024-02-29'), "闰年"
+    assert pd.isna(parse_one('02-29', '2023-03-01 10:00:00'))
+    print("   ✅ 不带年份的日期正确")
+
+
+def test_absolute_and_missing():
+    """测试带年份的日期、无法解析的值、缺失值以及缺失爬取时间时的基准"""
+    print("\n🧩 测试其他取值...")
+    assert parse_one('2023-12-01') == pd.Timestamp('2023-12-01')
+    assert parse_one('2023年5月6日') == pd.Timestamp('2023-05-06')
+    assert pd.isna(parse_one('2023/02/30'))
+    assert pd.isna(parse_one('未知'))
+
+    now = pd.Timestamp('2024-06-01 12:00:00')
+    result = parse_publish_time(['3天前', None, '未知', '3天前'], [None, CRAWL_TIME, CRAWL_TIME, CRAWL_TIME], now=now)
+    assert result[0] == now - pd.Timedelta(days=3), "没有爬取时间时以 now 为基准"
+    assert pd.isna(result[1]) and pd.isna(result[2])
+    assert result[3] == pd.Timestamp(CRAWL_TIME) - pd.Timedelta(days=3)
+    assert result.dtype == np.dtype('datetime64[ns]')
+
+    # 同一取值在不同爬取时间下各自计算
+    result = parse_publish_time(['12-31', '12-31'], ['2024-01-05 10:00:00', '2024-12-31 20:00:00'])
+    assert list(result) == [pd.Timestamp('2023-12-31'), pd.Timestamp('2024-12-31')]
+
+    # 已是时间类型时原样返回
+    timestamps = pd.Series(pd.to_datetime(['2024-01-01']))
+    assert parse_publish_time(timestamps).equals(timestamps)
+    assert len(parse_publish_time(pd.Series([None, None], dtype=object))) == 2
+    print("   ✅ 其他取值正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 发布时间解析测试")
+    print("=" * 50)
+    test_relative_times()
+    test_day_words()
+    test_month_day()
+    test_absolute_and_missing()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似统计草图测试脚本
+验证分位数草图（DDSketch）和HyperLogLog的误差范围、合并结果与精确值的对比以及持久化
+（使用临时目录，不影响 data/）
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.sketches import DatasetSketches, HyperLogLog, QuantileSketch, SketchStore
+from ai_analyzer.chunked_context import merge_file_sketches
+
+QUANTILES = [0.01, 0.2, 0.5, 0.8, 0.99, 1.0]
+
+
+def likes_values(size, seed):
+    """模拟点赞数：长尾分布，约三成为0"""
+    rng = np.random.default_rng(seed)
+    values = np.floor(rng.lognormal(mean=4, sigma=2, size=size))
+    values[rng.random(size) < 0.3] = 0
+    return values
+
+
+def exact_quantiles(values, quantiles):
+    """排名 q*(n-1) 处的真实值（与草图的取值方式一致）"""
+    ordered = np.sort(values)
+    return {q: float(ordered[int(np.floor(q * (len(ordered) - 1)))]) for q in quantiles}
+
+
+def assert_within_relative_error(sketch, values):
+    exact = exact_quantiles(values, QUANTILES)
+    for q, estimate in sketch.quantiles(QUANTILES).items():
+        assert abs(estimate - exact[q]) <= sketch.alpha * exact[q] * (1 + 1e-9), (q, estimate, exact[q])
+
+
+def test_quantile_error_bounds():
+    """测试分位数估计值与真实值的相对误差不超过 α，误差区间包含真实值"""
+    print("📐 测试分位数草图误差...")
+    for alpha in (0.01, 0.05):
+        for size, seed in ((1, 1), (10, 2), (1000, 3), (200000, 4)):
+            values = likes_values(size, seed)
+            sketch = QuantileSketch(alpha).update(values)
+            assert sketch.count == size
+            assert_within_relative_error(sketch, values)
+
+            exact = exact_quantiles(values, QUANTILES)
+            bounds = sketch.error_bounds(QUANTILES)
+            assert bounds['relative_error'] == alpha
+            for q in QUANTILES:
+                low, high = bounds['intervals'][str(q)]
+                assert low - 1e-4 <= exact[q] <= high + 1e-4, (alpha, size, q)
+    sketch = QuantileSketch(0.01)
+    assert np.isnan(sketch.quantiles([0.5])[0.5]), "空草图的分位数为NaN"
+    assert sketch.update(pd.Series([None, np.nan])).count == 0, "缺失值不计入"
+    assert len(QuantileSketch(0.01).update(likes_values(200000, 5)).buckets) < 2000, "桶数随取值范围的对数增长"
+    print("   ✅ 分位数误差在 α 以内")
+
+
+def test_quantile_merge():
+    """测试分块草图合并后与整体构建的草图完全一致，且与精确值误差不超过 α"""
+    print("\n🧩 测试分位数草图合并...")
+    values = likes_values(100000, 6)
+    whole = QuantileSketch(0.01).update(values)
+    merged = QuantileSketch(0.01)
+    for part in np.array_split(values, 7):
+        merged.merge(QuantileSketch(0.01).update(part))
+    assert merged.buckets == whole.buckets
+    assert (merged.count, merged.zero_count, merged.min, merged.max) == \
+        (whole.count, whole.zero_count, whole.min, whole.max)
+    assert merged.quantiles(QUANTILES) == whole.quantiles(QUANTILES)
+    assert_within_relative_error(merged, values)
+
+    restored = QuantileSketch.from_dict(merged.to_dict())
+    assert restored.quantiles(QUANTILES) == merged.quantiles(QUANTILES)
+    assert QuantileSketch.from_dict(QuantileSketch(0.01).to_dict()).count == 0
+
+    try:
+        merged.merge(QuantileSketch(0.05))
+        raise AssertionError("精度不一致时应拒绝合并")
+    except ValueError:
+        pass
+    print("   ✅ 合并结果与整体构建一致")
+
+
+def test_hll_error_bounds():
+    """测试HyperLogLog估计值与精确去重数的误差在标准误差的4倍以内"""
+    print("\n🔢 测试HyperLogLog误差...")
+    hll = HyperLogLog(14)
+    sigma = hll.relative_std_error
+    assert abs(sigma - 1.04 / 128) < 1e-12
+    for exact in (1, 100, 5000, 40000, 300000):
+        hll = HyperLogLog(14).update(pd.Series([f"作者{i}" for i in range(exact)]))
+        estimate = hll.estimate()
+        assert abs(estimate - exact) <= 4 * sigma * exact + 1, (exact, estimate)
+        low, high = hll.error_bounds()['interval_95']
+        assert low <= estimate <= high
+        print(f"   ✅ 真实 {exact}，估计 {estimate:.0f}")
+
+    # 重复取值和缺失值不影响估计
+    authors = pd.Series([f"作者{i % 1000}" for i in range(20000)] + [None] * 10)
+    assert abs(HyperLogLog(14).update(authors).estimate() - 1000) <= 4 * sigma * 1000
+    assert HyperLogLog(14).estimate() == 0
+
+
+def test_hll_merge():
+    """测试HyperLogLog合并后与并集的草图完全一致，估计值接近并集的精确去重数"""
+    print("\n🧩 测试HyperLogLog合并...")
+    first = [f"作者{i}" for i in range(0, 60000)]
+    second = [f"作者{i}" for i in range(40000, 120000)]
+    union = HyperLogLog(14).update(pd.Series(first + second))
+    merged = HyperLogLog(14).update(pd.Series(first)).merge(HyperLogLog(14).update(pd.Series(second)))
+    assert np.array_equal(merged.registers, union.registers)
+    exact = len(set(first) | set(second))
+    assert abs(merged.estimate() - exact) <= 4 * merged.relative_std_error * exact
+
+    restored = HyperLogLog.from_dict(merged.to_dict())
+    assert restored.estimate() == merged.estimate()
+
+    try:
+        merged.merge(HyperLogLog(12))
+        raise AssertionError("精度不一致时应拒绝合并")
+    except ValueError:
+        pass
+    print("   ✅ 合并结果与并集一致")
+
+
+def test_dataset_sketches_across_files():
+    """测试按文件持久化的草图跨文件合并后与全部数据的精确值对比"""
+    print("\n📂 测试跨文件合并...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SketchStore(cache_dir=os.path.join(tmp_dir, 'sketches'))
+        paths, frames = [], []
+        rng = np.random.default_rng(8)
+        for index in range(3):
+            frame = pd.DataFrame({
+                'title': '标题',
+                'author': [f"作者{n}" for n in rng.integers(index * 3000, index * 3000 + 6000, size=20000)],
+                'likes': likes_values(20000, 10 + index).astype(int).astype(str)
+            })
+            path = os.path.join(tmp_dir, f"xhs_美食_2024010{index + 1}_100000.csv")
+            frame.to_csv(path, index=False, encoding=Config.CSV_ENCODING)
+            paths.append(path)
+            frames.append(frame)
+
+        merged = merge_file_sketches(paths, store)
+        combined = pd.concat(frames, ignore_index=True)
+        likes = combined['likes'].astype(float).to_numpy()
+        assert merged.rows == len(combined)
+        assert_within_relative_error(merged.likes, likes)
+        exact_authors = combined['author'].nunique()
+        summary = merged.summary()
+        assert summary['total_notes'] == len(combined)
+        assert abs(summary['unique_authors'] - exact_authors) <= 4 * merged.authors.relative_std_error * exact_authors
+        assert set(summary['error_bounds']) == {'likes_quantiles', 'unique_authors'}
+
+        # 第二次直接读取缓存的草图，结果不变
+        assert len(os.listdir(store.cache_dir)) == 3
+        with mock.patch('ai_analyzer.chunked_context.iter_dataset', side_effect=AssertionError("应使用缓存")):
+            assert merge_file_sketches(paths, store).summary() == summary
+
+        # 精度配置变化后缓存的草图失效
+        with mock.patch.object(Config, 'SKETCH_RELATIVE_ACCURACY', 0.05):
+            assert store.load(paths[0]) is None
+        assert store.load(paths[0]).rows == 20000
+        assert DatasetSketches.from_dict(merged.to_dict()).summary() == summary
+    print("   ✅ 跨文件合并结果在误差范围内")
+
+
+def test_sketch_store_eviction():
+    """测试来源文件改写后旧草图被删除，长期未访问的草图按TTL过期，超出条目数时按最近访问淘汰"""
+    print("\n🧹 测试草图缓存淘汰...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SketchStore(cache_dir=os.path.join(tmp_dir, 'sketches'), ttl=3600, max_entries=2)
+        paths = []
+        for index in range(3):
+            path = os.path.join(tmp_dir, f"data{index}.csv")
+            pd.DataFrame({'likes': [index]}).to_csv(path, index=False)
+            paths.append(path)
+        sketches = DatasetSketches().update(1, likes=[1.0], authors=['甲'])
+
+        store.save(paths[0], sketches)
+        assert store.load(paths[0]).rows == 1
+        pd.DataFrame({'likes': [1, 2]}).to_csv(paths[0], index=False)
+        os.utime(paths[0], (time.time() + 10, time.time() + 10))
+        assert store.load(paths[0]) is None, "来源文件改写后草图不再匹配"
+        assert os.listdir(store.cache_dir) == [], "旧版本的草图被删除"
+        store.save(paths[0], sketches)
+        pd.DataFrame({'likes': [1, 2, 3]}).to_csv(paths[0], index=False)
+        os.utime(paths[0], (time.time() + 20, time.time() + 20))
+        store.save(paths[0], sketches)
+        assert len(os.listdir(store.cache_dir)) == 1, "保存新版本时替换旧版本"
+
+        # 超出条目数时淘汰最久未访问的草图（读取会刷新访问时间）
+        now = time.time()
+        store.save(paths[1], sketches)
+        os.utime(store._path(paths[0]), (now - 30, now - 30))
+        os.utime(store._path(paths[1]), (now - 20, now - 20))
+        assert store.load(paths[0]) is not None
+        store.save(paths[2], sketches)
+        assert store.load(paths[1]) is None
+        assert store.load(paths[0]) is not None and store.load(paths[2]) is not None
+
+        # 来源文件已删除的草图不再被访问，超过TTL后清理
+        os.remove(paths[2])
+        os.utime(store._path(paths[0]), (now - 7200, now - 7200))
+        assert store.evict() == 1
+        assert len(os.listdir(store.cache_dir)) == 1
+    print("   ✅ 草图缓存淘汰正确")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 近似统计草图测试")
+    print("=" * 50)
+    test_quantile_error_bounds()
+    test_quantile_merge()
+    test_hll_error_bounds()
+    test_hll_merge()
+    test_dataset_sketches_across_files()
+    test_sketch_store_eviction()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
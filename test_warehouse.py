@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+笔记数据仓库测试脚本
+验证按笔记ID去重的写入（upsert）、点赞快照、来源文件重复导入以及默认导入的文件范围
+（使用临时数据库和临时数据目录，不影响 data/）
+"""
+
+import os
+import sys
+import tempfile
+import pandas as pd
+from unittest import mock
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from ai_analyzer.analysis_context import AnalysisContext
+from crawler.storage import parse_likes
+from crawler.warehouse import NotesWarehouse, note_keys
+
+
+def crawl_frame(rows):
+    """一次爬取的数据：rows 为 (笔记ID, 标题, 作者, 点赞) 列表，笔记ID为None时没有链接"""
+    return pd.DataFrame({
+        'title': [title for _, title, _, _ in rows],
+        'author': [author for _, _, author, _ in rows],
+        'likes': [likes for _, _, _, likes in rows],
+        'link': [f"https://www.xiaohongshu.com/explore/{key}" if key else None for key, _, _, _ in rows]
+    })
+
+
+def test_note_keys():
+    """测试笔记ID：取自链接，没有链接时按标题和作者哈希"""
+    print("🔑 测试笔记ID...")
+    df = crawl_frame([('abc123', '火锅', '甲', '10'), (None, '烧烤', '乙', '5'), (None, '烧烤', '乙', '7')])
+    df.loc[3] = ['甜品', '丙', '1', 'https://www.xiaohongshu.com/discovery/item/def456']
+    keys = note_keys(df)
+    assert keys[0] == 'abc123'
+    assert keys[3] == 'def456'
+    assert keys[1] == keys[2] and keys[1].startswith('h') and len(keys[1]) == 24
+    assert note_keys(df.drop(columns=['link']))[0] != 'abc123'
+    print("   ✅ 笔记ID正确")
+
+
+def test_upsert_and_dedupe():
+    """测试多次爬取按笔记ID去重，最新状态取最近一次爬取，点赞快照逐次保留"""
+    print("\n🗃️ 测试去重写入...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = NotesWarehouse(os.path.join(tmp_dir, 'warehouse.sqlite3'))
+        first = crawl_frame([('n1', '火锅', '甲', '1.2万'), ('n2', '烧烤', '乙', '300'), ('n2', '烧烤', '乙', '350')])
+        store.ingest(first, '美食', crawled_at='2024-01-01 10:00:00')
+        second = crawl_frame([('n1', '火锅（更新）', '甲', '1.5万'), ('n3', '甜品', '甲', '3k')])
+        store.ingest(second, '美食', crawled_at='2024-01-02 10:00:00')
+        # 较早的历史批次晚导入时不覆盖最新状态
+        earlier = crawl_frame([('n1', '火锅', '甲', '9000')])
+        store.ingest(earlier, '火锅', crawled_at='2023-12-31 10:00:00')
+
+        summary = store.summary()
+        assert summary['crawls'] == 3
+        assert summary['notes'] == 3, "同一笔记只保存一行"
+        assert summary['authors'] == 2
+        assert summary['snapshots'] == 5, "同一批次内重复的笔记只保留一个快照"
+        assert summary['first_crawl'] == '2023-12-31 10:00:00' and summary['last_crawl'] == '2024-01-02 10:00:00'
+
+        top = store.top_notes()
+        assert [(note['note_id'], note['likes']) for note in top] == [('n1', 15000), ('n3', 3000), ('n2', 350)]
+        assert top[0]['title'] == '火锅（更新）', "较早的批次不应覆盖较新批次的标题"
+        assert [item['likes'] for item in store.note_history('n1')] == [9000, 12000, 15000]
+        assert store.top_notes(topic='火锅')[0]['likes'] == 9000
+        assert [note['note_id'] for note in store.top_notes(since='2024-01-02 00:00:00')] == ['n1', 'n3']
+        assert store.top_authors() == [{'author': '甲', 'notes': 2}, {'author': '乙', 'notes': 1}]
+        assert {item['topic']: item['crawls'] for item in store.topics()} == {'美食': 2, '火锅': 1}
+    print("   ✅ 笔记去重、最新状态和快照正确")
+
+
+def test_reimport_source_file():
+    """测试同一来源文件再次导入时替换之前的批次，未修改的文件跳过"""
+    print("\n📥 测试来源文件导入...")
+    with tempfile.TemporaryDirectory() as data_dir, mock.patch.object(Config, 'DATA_DIR', data_dir):
+        store = NotesWarehouse(os.path.join(data_dir, 'cache', 'warehouse.sqlite3'))
+        path = os.path.join(data_dir, 'xhs_美食_20240101_100000.csv')
+        crawl_frame([('n1', '火锅', '甲', '100'), ('n2', '烧烤', '乙', '200')]).to_csv(path, index=False)
+        # 非爬虫格式的文件和归档导出文件默认不导入
+        crawl_frame([('x1', '导出', '丙', '1')]).to_csv(os.path.join(data_dir, 'notes.csv'), index=False)
+        crawl_frame([('n1', '火锅', '甲', '100')]).to_csv(
+            os.path.join(data_dir, 'xhs_美食_archive_20240101-20240131.csv'), index=False)
+
+        result = store.import_files()
+        assert result['imported'] == [path] and not result['failed']
+        assert store.import_files()['skipped'] == [path]
+
+        crawl_frame([('n1', '火锅', '甲', '150')]).to_csv(path, index=False)
+        os.utime(path, (os.path.getmtime(path) + 10, os.path.getmtime(path) + 10))
+        assert store.import_files()['imported'] == [path]
+        summary = store.summary()
+        assert summary['crawls'] == 1 and summary['snapshots'] == 1
+        assert store.note_history('n1')[0]['likes'] == 150
+        assert store.note_history('n1')[0]['topic'] == '美食'
+        assert store.note_history('x1') == []
+
+        # 明确指定的文件照常导入，文件名不是爬虫格式时以文件名作为主题
+        result = store.import_files([os.path.join(data_dir, 'notes.csv')])
+        assert len(result['imported']) == 1
+        assert store.note_history('x1')[0]['topic'] == 'notes'
+    print("   ✅ 重复导入替换之前的批次，默认只导入爬取文件")
+
+
+def test_likes_consistent_with_analysis():
+    """测试数据仓库与分析报告对 "1.2万"、"3k" 等点赞数的解析一致"""
+    print("\n👍 测试点赞数解析...")
+    texts = ['1234', '1.2万', '3k', '2.5W', '10千', '赞', None, 56, '1.25万']
+    parsed = parse_likes(texts)
+    assert parsed[:5].tolist() == [1234, 12000, 3000, 25000, 10000]
+    assert parsed[5:7].isna().all() and parsed[7] == 56 and parsed[8] == 12500
+
+    df = crawl_frame([(f"n{i}", f"笔记{i}", '甲', text) for i, text in enumerate(texts)])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = NotesWarehouse(os.path.join(tmp_dir, 'warehouse.sqlite3'))
+        store.ingest(df, '美食', crawled_at='2024-01-01 10:00:00')
+        stored = {note['note_id']: note['likes'] for note in store.top_notes(limit=20)}
+    analyzed = AnalysisContext(df).likes
+    for i, value in enumerate(analyzed):
+        assert stored.get(f"n{i}") == (None if pd.isna(value) else round(value)), (texts[i], stored.get(f"n{i}"), value)
+    assert AnalysisContext(df).likes_summary['max_likes'] == 25000
+    print("   ✅ 点赞数解析一致")
+
+
+def main():
+    """主测试函数"""
+    print("🧪 笔记数据仓库测试")
+    print("=" * 50)
+    test_note_keys()
+    test_upsert_and_dedupe()
+    test_reimport_source_file()
+    test_likes_consistent_with_analysis()
+    print("\n🎉 所有测试通过！")
+
+
+if __name__ == '__main__':
+    main()
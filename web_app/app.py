@@ -1,9 +1,9 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
 import json
-import pandas as pd
+import glob
 from datetime import datetime, timedelta
 import traceback
 import threading
@@ -14,7 +14,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import Config
 from crawler.xhs_crawler import XHSCrawler
+from crawler.catalog import ANALYSIS_KIND, DATA_KIND, default_catalog
+from crawler.dataset_cache import DatasetCache
+from crawler.jobs import FINISHED_STATES, SUCCEEDED, CrawlJobQueue, QueueFullError
+from crawler.storage import FORMAT_EXTENSIONS, read_dataset
+from crawler.warehouse import NotesWarehouse
+from crawler.archive import CrawlArchive, find_data_files
 from ai_analyzer.deepseek_analyzer import DeepSeekAnalyzer
+from ai_analyzer.analysis_cache import AnalysisCache
 
 app = Flask(__name__)
 CORS(app)
@@ -35,6 +42,12 @@ COOKIES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__fi
 # 全局变量
 crawler = None
 analyzer = None
+analysis_cache = None
+dataset_cache = None
+job_queue = None
+warehouse = None
+catalog = None
+archive_thread = None
 cookie_update_thread = None
 cookie_last_check = None
 
@@ -135,8 +148,45 @@ def get_analyzer():
     global analyzer
     if analyzer is None:
         analyzer = DeepSeekAnalyzer()
+        analyzer.dataset_cache = get_dataset_cache()
     return analyzer
 
+def get_analysis_cache():
+    global analysis_cache
+    if analysis_cache is None:
+        analysis_cache = AnalysisCache()
+    return analysis_cache
+
+def get_dataset_cache():
+    """进程内的数据集缓存（DATASET_CACHE_ENABLED=False 时返回None）"""
+    global dataset_cache
+    if dataset_cache is None and config.DATASET_CACHE_ENABLED:
+        dataset_cache = DatasetCache()
+    return dataset_cache
+
+def get_job_queue():
+    """后台爬取任务队列（首次使用时启动工作线程）"""
+    global job_queue
+    if job_queue is None:
+        job_queue = CrawlJobQueue()
+        resumed = job_queue.start()
+        if resumed:
+            print(f"🕷️ 已恢复 {resumed} 个未完成的爬取任务")
+    return job_queue
+
+def start_job_workers():
+    """启动爬取任务工作线程，继续执行上次退出时未完成的任务"""
+    # 调试模式下的自动重载会启动两个进程，只在实际提供服务的子进程中执行任务
+    if config.FLASK_DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    get_job_queue()
+
+def get_warehouse():
+    global warehouse
+    if warehouse is None:
+        warehouse = NotesWarehouse()
+    return warehouse
+
 def check_cookie_validity():
     """检查cookie是否有效"""
     try:
@@ -187,55 +237,40 @@ def start_cookie_update_thread():
         cookie_update_thread.start()
         print("🔄 Cookie自动更新线程已启动")
 
-def get_data_files():
-    """获取数据文件列表"""
-    try:
-        data_dir = config.DATA_DIR
-        if not os.path.exists(data_dir):
-            return []
-        
-        files = []
-        for file in os.listdir(data_dir):
-            if file.endswith('.csv'):
-                file_path = os.path.join(data_dir, file)
-                files.append({
-                    'name': file,
-                    'path': file_path,
-                    'size': os.path.getsize(file_path),
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
-                })
-        
-        # 按修改时间排序，最新的在前
-        files.sort(key=lambda x: x['modified'], reverse=True)
-        return files
-    except Exception as e:
-        print(f"获取数据文件列表失败: {e}")
-        return []
+def archive_periodically():
+    """定期归档较早的数据文件（后台任务）"""
+    archive = CrawlArchive()
+    while True:
+        try:
+            result = archive.compact()
+            if result['archived'] or result['expired_partitions'] or result['expired_analyses']:
+                print(f"🗜️ 已归档 {len(result['archived'])} 个数据文件，过期删除 "
+                      f"{len(result['expired_partitions'])} 个分区、{len(result['expired_analyses'])} 个分析结果")
+            for key, error in result['failed'].items():
+                print(f"❌ 归档分区 {key} 失败: {error}")
+        except Exception as e:
+            print(f"❌ 数据归档出错: {e}")
+        time.sleep(config.ARCHIVE_INTERVAL)
 
-def get_analysis_files():
-    """获取分析文件列表"""
-    try:
-        data_dir = config.DATA_DIR
-        if not os.path.exists(data_dir):
-            return []
-        
-        files = []
-        for file in os.listdir(data_dir):
-            if file.endswith('.json'):
-                file_path = os.path.join(data_dir, file)
-                files.append({
-                    'name': file,
-                    'path': file_path,
-                    'size': os.path.getsize(file_path),
-                    'modified': datetime.fromtimestamp(os.path.getmtime(file_path)).strftime('%Y-%m-%d %H:%M:%S')
-                })
-        
-        # 按修改时间排序，最新的在前
-        files.sort(key=lambda x: x['modified'], reverse=True)
-        return files
-    except Exception as e:
-        print(f"获取分析文件列表失败: {e}")
-        return []
+def start_archive_thread():
+    """启动数据归档线程"""
+    global archive_thread
+    # 调试模式下的自动重载会启动两个进程，只在实际提供服务的子进程中归档
+    if config.FLASK_DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    if config.ARCHIVE_ENABLED and (archive_thread is None or not archive_thread.is_alive()):
+        archive_thread = threading.Thread(target=archive_periodically, daemon=True)
+        archive_thread.start()
+        print("🗜️ 数据归档线程已启动")
+
+def get_catalog():
+    """数据目录文件清单（首次使用时启动文件监视，没有安装watchdog时按目录修改时间刷新）"""
+    global catalog
+    if catalog is None:
+        catalog = default_catalog()
+        if catalog.start_watcher():
+            print("👀 数据目录文件监视已启动")
+    return catalog
 
 @app.route('/')
 def index():
@@ -312,38 +347,61 @@ def load_cookies_route():
         print(f"加载cookies时出错: {e}")
         return jsonify({'error': f'加载cookies时出错: {str(e)}'}), 500
 
+def parse_crawl_request(data):
+    """
+    校验爬取参数
+    :return: (参数字典; 错误信息)
+    """
+    if not data:
+        return None, '请求数据为空'
+    
+    topic = data.get('topic', '').strip()
+    limit = int(data.get('limit', 20))
+    cookies = (data.get('cookies') or '').strip()
+    data_format = data.get('format') or config.DATA_FORMAT
+    
+    if not topic:
+        return None, '请提供搜索主题'
+    
+    if data_format not in FORMAT_EXTENSIONS:
+        return None, f"数据格式必须是 {' / '.join(FORMAT_EXTENSIONS)} 之一"
+    
+    if limit <= 0 or limit > 100:
+        return None, '获取数量必须在1-100之间'
+    
+    return {'topic': topic, 'limit': limit, 'cookies': cookies, 'data_format': data_format}, None
+
+def crawl_records(filepath):
+    """
+    读取爬取的数据用于返回（列式格式中的时间戳按爬取时间格式转回文本）
+    读取结果留在数据集缓存中，随后分析这个文件时不再读取
+    """
+    cache = get_dataset_cache()
+    df = cache.load(filepath) if cache else read_dataset(filepath)
+    df = df.drop(columns=['publish_at'], errors='ignore')
+    for column in df.select_dtypes(include='datetime').columns:
+        df[column] = df[column].dt.strftime(config.CRAWL_TIME_FORMAT)
+    return df.to_dict('records')
+
 @app.route('/api/crawl', methods=['POST'])
 def crawl_data():
-    """爬取数据API"""
+    """爬取数据API（在请求中同步执行，耗时较长时使用 /api/jobs/crawl）"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': '请求数据为空'}), 400
-        
-        topic = data.get('topic', '').strip()
-        limit = int(data.get('limit', 20))
-        cookies = (data.get('cookies') or '').strip()
+        params, error = parse_crawl_request(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
         
-        # 参数验证
-        if not topic:
-            return jsonify({'error': '请提供搜索主题'}), 400
-        
-        if limit <= 0 or limit > 100:
-            return jsonify({'error': '获取数量必须在1-100之间'}), 400
-        
-        print(f"开始爬取: 主题={topic}, 数量={limit}")
+        print(f"开始爬取: 主题={params['topic']}, 数量={params['limit']}")
         
         # 获取爬虫实例
         crawler = get_crawler()
         
         # 执行爬取
-        filepath = crawler.crawl_hot_notes(topic, limit, cookies)
+        filepath = crawler.crawl_hot_notes(params['topic'], params['limit'], params['cookies'], params['data_format'])
         
         if filepath:
-            # 读取爬取的数据用于返回
             try:
-                df = pd.read_csv(filepath, encoding='utf-8-sig')
-                data_list = df.to_dict('records')
+                data_list = crawl_records(filepath)
                 
                 return jsonify({
                     'success': True,
@@ -370,6 +428,226 @@ def crawl_data():
         print(traceback.format_exc())
         return jsonify({'error': f'爬取数据时出错: {str(e)}'}), 500
 
+@app.route('/api/jobs/crawl', methods=['POST'])
+def submit_crawl_job():
+    """提交后台爬取任务，立即返回任务ID（队列已满时返回429）"""
+    try:
+        params, error = parse_crawl_request(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
+        
+        job = get_job_queue().submit(params['topic'], params['limit'], params['cookies'], params['data_format'])
+        print(f"已提交爬取任务 {job['id']}: 主题={params['topic']}, 数量={params['limit']}")
+        return jsonify({
+            'success': True,
+            'job': job,
+            'status_url': f"/api/jobs/{job['id']}"
+        }), 202
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    except ValueError as e:
+        return jsonify({'error': f'参数错误: {str(e)}'}), 400
+    except Exception as e:
+        print(f"提交爬取任务时出错: {e}")
+        return jsonify({'error': f'提交爬取任务时出错: {str(e)}'}), 500
+
+@app.route('/api/jobs')
+def list_jobs():
+    """最近的爬取任务（state 按状态筛选，limit 数量）"""
+    try:
+        job_queue = get_job_queue()
+        limit = min(int(request.args.get('limit', 20)), 200)
+        return jsonify({
+            'success': True,
+            'jobs': job_queue.list_jobs(request.args.get('state'), limit),
+            'stats': job_queue.stats()
+        })
+    except Exception as e:
+        print(f"获取爬取任务列表时出错: {e}")
+        return jsonify({'error': f'获取爬取任务列表时出错: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """爬取任务的状态、进度和结果（成功时附带爬取的数据）"""
+    try:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            return jsonify({'error': '任务不存在'}), 404
+        
+        response = {'success': True, 'job': job}
+        if job['state'] == SUCCEEDED and os.path.exists(job['result']['filepath']):
+            try:
+                response['data'] = crawl_records(job['result']['filepath'])
+            except Exception as e:
+                print(f"读取爬取数据失败: {e}")
+        return jsonify(response)
+    except Exception as e:
+        print(f"获取爬取任务时出错: {e}")
+        return jsonify({'error': f'获取爬取任务时出错: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消爬取任务（执行中的任务在爬虫下一次检查时结束）"""
+    try:
+        job = get_job_queue().cancel(job_id)
+        if job is None:
+            return jsonify({'error': '任务不存在'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        print(f"取消爬取任务时出错: {e}")
+        return jsonify({'error': f'取消爬取任务时出错: {str(e)}'}), 500
+
+@app.route('/api/jobs/<job_id>/events')
+def stream_job_events(job_id):
+    """
+    爬取任务的实时进度（Server-Sent Events）
+    推送任务状态变化（state）、爬虫的进度事件（driver_ready、page_loaded、scroll、notes_found、
+    note（附带提取到的笔记）、saved）和结束时的任务信息（done，成功时附带爬取的数据）
+    """
+    job_queue = get_job_queue()
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': '任务不存在'}), 404
+    # 断线重连时浏览器通过 Last-Event-ID 告知已收到的最后一个进度事件
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': '事件序号必须是整数'}), 400
+    
+    def generate():
+        received = after
+        last_state = None
+        last_sent = time.time()
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                yield sse_event('error', {'error': '任务不存在'})
+                return
+            
+            state = (job['state'], job.get('queue_position'), job['cancel_requested'])
+            if state != last_state:
+                yield sse_event('state', job)
+                last_state = state
+                last_sent = time.time()
+            
+            events = job_queue.wait_events(job_id, received, timeout=config.CRAWL_JOB_KEEPALIVE)
+            for event in events or []:
+                yield f"id: {event['id']}\n" + sse_event(event['event'], event['data'])
+                received = event['id']
+                last_sent = time.time()
+            
+            if job['state'] in FINISHED_STATES:
+                payload = {'job': job}
+                if job['state'] == SUCCEEDED and os.path.exists(job['result']['filepath']):
+                    try:
+                        payload['data'] = crawl_records(job['result']['filepath'])
+                    except Exception as e:
+                        print(f"读取爬取数据失败: {e}")
+                yield sse_event('done', payload)
+                return
+            
+            if events is None:
+                time.sleep(1)  # 排队中，还没有进度事件
+            # 长时间没有消息时发送注释行，避免代理断开连接
+            if time.time() - last_sent >= config.CRAWL_JOB_KEEPALIVE:
+                yield ': keepalive\n\n'
+                last_sent = time.time()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def resolve_analysis_source(filename, files=None, topic=None, start=None, end=None):
+    """
+    解析要分析的数据：单个文件 file，或多个文件 files（数据目录中的文件名，支持通配符）和 topic/start/end 范围
+    :return: (文件路径，多个文件时为路径列表; 错误信息; HTTP状态码)
+    """
+    if not files and not (topic or start or end):
+        if not filename:
+            return None, '请选择数据文件', 400
+        filepath = os.path.join(config.DATA_DIR, filename)
+        if not os.path.exists(filepath):
+            return None, '文件不存在', 404
+        return filepath, None, None
+    
+    data_dir = os.path.abspath(config.DATA_DIR)
+    paths = []
+    for name in ([filename] if filename else []) + list(files or []):
+        matches = sorted(glob.glob(os.path.join(config.DATA_DIR, name)))
+        matches = [path for path in matches if os.path.dirname(os.path.abspath(path)) == data_dir]
+        if not matches:
+            return None, f'文件不存在: {name}', 404
+        paths.extend(matches)
+    if topic or start or end:
+        found = find_data_files(topic, start, end)
+        if not found:
+            return None, '没有符合条件的数据文件', 404
+        paths.extend(found)
+    paths = list(dict.fromkeys(paths))
+    return (paths[0] if len(paths) == 1 else paths), None, None
+
+def load_analysis_data(analyzer, source):
+    """加载要分析的数据（多个文件合并去重，大文件分块读取只保留聚合结果）"""
+    if isinstance(source, list):
+        return analyzer.load_files(source)
+    return analyzer.load_data_chunked(source) if analyzer.should_chunk(source) else analyzer.load_data(source)
+
+def lookup_cached_analysis(analyzer, filepath, analysis_type, force=False):
+    """
+    查询分析缓存
+    :return: (缓存键, 命中时的响应数据或None)
+    """
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return None, None
+    
+    cache = get_analysis_cache()
+    cache_key = cache.make_key(
+        filepath, analysis_type, model_params=analyzer.model_params(),
+        background=analyzer.keyword_extractor.background_signature()
+    )
+    entry = None if force else cache.get(cache_key)
+    if not entry:
+        return cache_key, None
+    
+    analysis_filename = entry.get('analysis_file')
+    if not analysis_filename or not os.path.exists(os.path.join(config.DATA_DIR, analysis_filename)):
+        analysis_filename = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        analyzer.save_analysis(entry['result'], analysis_filename)
+        cache.put(cache_key, entry['result'], analysis_filename)
+    print(f"命中分析缓存: {analysis_filename}")
+    
+    return cache_key, {
+        'success': True,
+        'message': '分析完成（缓存）',
+        'data': entry['result'],
+        'analysis_file': analysis_filename,
+        'cache': 'hit'
+    }
+
+def store_analysis(analyzer, cache_key, result):
+    """保存分析结果并写入缓存，返回响应数据"""
+    analysis_filename = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    analyzer.save_analysis(result, analysis_filename)
+    
+    cache = get_analysis_cache()
+    if cache_key and cache.is_cacheable(result):
+        cache.put(cache_key, result, analysis_filename)
+    
+    return {
+        'success': True,
+        'message': '分析完成',
+        'data': result,
+        'analysis_file': analysis_filename,
+        'cache': 'miss' if cache_key else 'disabled'
+    }
+
+def sse_event(event, payload):
+    """格式化Server-Sent Events消息"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_data():
     """分析数据API"""
@@ -378,24 +656,33 @@ def analyze_data():
         if not data:
             return jsonify({'error': '请求数据为空'}), 400
         
-        filename = data.get('file', '').strip()
+        filename = (data.get('file') or '').strip()
         analysis_type = data.get('type', 'comprehensive')
+        force = bool(data.get('force', False))
         
-        if not filename:
-            return jsonify({'error': '请选择数据文件'}), 400
+        # 构建文件路径（多个文件或主题/日期范围时为路径列表）
+        filepath, error, status = resolve_analysis_source(
+            filename, data.get('files'), data.get('topic'), data.get('start'), data.get('end')
+        )
+        if error:
+            return jsonify({'error': error}), status
         
-        # 构建文件路径
-        filepath = os.path.join(config.DATA_DIR, filename)
-        if not os.path.exists(filepath):
-            return jsonify({'error': '文件不存在'}), 404
+        if analysis_type not in ('comprehensive', 'trends', 'ai'):
+            return jsonify({'error': '不支持的分析类型'}), 400
         
-        print(f"开始分析: 文件={filename}, 类型={analysis_type}")
+        label = f"{len(filepath)} 个文件" if isinstance(filepath, list) else filename
+        print(f"开始分析: 文件={label}, 类型={analysis_type}")
         
         # 获取分析器实例
         analyzer = get_analyzer()
         
+        # 查询分析缓存
+        cache_key, cached = lookup_cached_analysis(analyzer, filepath, analysis_type, force)
+        if cached:
+            return jsonify(cached)
+        
         # 加载数据
-        df = analyzer.load_data(filepath)
+        df = load_analysis_data(analyzer, filepath)
         if df.empty:
             return jsonify({'error': '数据加载失败或数据为空'}), 500
         
@@ -409,46 +696,247 @@ def analyze_data():
                 'trends': analyzer.analyze_trends(df),
                 'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-        elif analysis_type == 'ai':
+        else:
             # AI深度分析
             result = analyzer.analyze_with_ai(df)
-        else:
-            return jsonify({'error': '不支持的分析类型'}), 400
         
         # 保存分析结果
-        analysis_filename = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        analysis_filepath = analyzer.save_analysis(result, analysis_filename)
-        
-        return jsonify({
-            'success': True,
-            'message': '分析完成',
-            'data': result,
-            'analysis_file': analysis_filename
-        })
+        return jsonify(store_analysis(analyzer, cache_key, result))
         
     except Exception as e:
         print(f"分析数据时出错: {e}")
         print(traceback.format_exc())
         return jsonify({'error': f'分析数据时出错: {str(e)}'}), 500
 
+@app.route('/api/analyze/stream')
+def analyze_data_stream():
+    """流式分析数据API（Server-Sent Events）"""
+    filename = request.args.get('file', '').strip()
+    analysis_type = request.args.get('type', 'comprehensive')
+    force = request.args.get('force', '').lower() in ('1', 'true')
+    
+    filepath, error, status = resolve_analysis_source(
+        filename, request.args.getlist('files'), request.args.get('topic'),
+        request.args.get('start'), request.args.get('end')
+    )
+    if error:
+        return jsonify({'error': error}), status
+    
+    if analysis_type not in ('comprehensive', 'trends', 'ai'):
+        return jsonify({'error': '不支持的分析类型'}), 400
+    
+    label = f"{len(filepath)} 个文件" if isinstance(filepath, list) else filename
+    print(f"开始流式分析: 文件={label}, 类型={analysis_type}")
+    
+    def generate():
+        try:
+            analyzer = get_analyzer()
+            yield sse_event('start', {'file': label, 'type': analysis_type})
+            
+            cache_key, cached = lookup_cached_analysis(analyzer, filepath, analysis_type, force)
+            if cached:
+                yield sse_event('done', cached)
+                return
+            
+            df = load_analysis_data(analyzer, filepath)
+            if df.empty:
+                yield sse_event('error', {'error': '数据加载失败或数据为空'})
+                return
+            
+            if analysis_type == 'comprehensive':
+                # 本地统计与AI分析并行：先推送不含AI部分的报告，再逐段转发AI生成内容
+                for event in analyzer.iter_comprehensive_report(df, stream_ai=True):
+                    if event['event'] == 'token':
+                        yield sse_event('token', {'text': event['text']})
+                    elif event['event'] == 'partial':
+                        yield sse_event('partial', {'success': True, 'data': event['report']})
+                    else:
+                        result = event['report']
+            elif analysis_type == 'ai':
+                # 逐段转发AI生成内容
+                for event in analyzer.stream_analysis_with_ai(df):
+                    if event['event'] == 'token':
+                        yield sse_event('token', {'text': event['text']})
+                    else:
+                        result = event['result']
+            else:
+                result = {
+                    'trends': analyzer.analyze_trends(df),
+                    'analysis_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+            
+            yield sse_event('done', store_analysis(analyzer, cache_key, result))
+            
+        except Exception as e:
+            print(f"流式分析时出错: {e}")
+            print(traceback.format_exc())
+            yield sse_event('error', {'error': f'分析数据时出错: {str(e)}'})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/files')
 def list_files():
-    """获取文件列表"""
+    """
+    获取文件列表（按修改时间从新到旧分页）
+    可选参数：topic、format、q（文件名包含）、limit（每页条数）、
+    data_cursor / analysis_cursor（上一页返回的 next_data_cursor / next_analysis_cursor）
+    """
     try:
-        data_files = get_data_files()
-        analysis_files = get_analysis_files()
+        files = get_catalog()
+        files.refresh()
+        topic = request.args.get('topic') or None
+        data_format = request.args.get('format') or None
+        query = request.args.get('q') or None
+        limit = max(1, min(request.args.get('limit', config.CATALOG_PAGE_SIZE, type=int), 1000))
+        
+        data_files, next_data_cursor = files.list_files(
+            DATA_KIND, topic, data_format, query, request.args.get('data_cursor'), limit
+        )
+        analysis_files, next_analysis_cursor = files.list_files(
+            ANALYSIS_KIND, query=query, cursor=request.args.get('analysis_cursor'), limit=limit
+        )
         
         return jsonify({
             'success': True,
             'data_files': [f['name'] for f in data_files],
             'analysis_files': [f['name'] for f in analysis_files],
             'data_files_detail': data_files,
-            'analysis_files_detail': analysis_files
+            'analysis_files_detail': analysis_files,
+            'data_total': files.count(DATA_KIND, topic, data_format, query),
+            'analysis_total': files.count(ANALYSIS_KIND, query=query),
+            'next_data_cursor': next_data_cursor,
+            'next_analysis_cursor': next_analysis_cursor,
+            'topics': files.topics()
         })
     except Exception as e:
         print(f"获取文件列表时出错: {e}")
         return jsonify({'error': f'获取文件列表时出错: {str(e)}'}), 500
 
+@app.route('/api/cache-stats')
+def cache_stats():
+    """获取缓存命中统计"""
+    try:
+        analyzer = get_analyzer()
+        return jsonify({
+            'success': True,
+            'analysis_cache': get_analysis_cache().stats(),
+            'dataset_cache': get_dataset_cache().stats() if get_dataset_cache() else {'enabled': False},
+            'llm_cache': analyzer.llm_cache.stats() if analyzer.llm_cache else {'enabled': False}
+        })
+    except Exception as e:
+        print(f"获取缓存统计时出错: {e}")
+        return jsonify({'error': f'获取缓存统计时出错: {str(e)}'}), 500
+
+@app.route('/api/llm-metrics')
+def llm_metrics():
+    """获取DeepSeek客户端调用延迟和熔断状态"""
+    try:
+        return jsonify({
+            'success': True,
+            'metrics': get_analyzer().llm_client.metrics()
+        })
+    except Exception as e:
+        print(f"获取LLM调用统计时出错: {e}")
+        return jsonify({'error': f'获取LLM调用统计时出错: {str(e)}'}), 500
+
+@app.route('/api/llm-usage')
+def llm_usage():
+    """获取token用量、提示词缓存命中和估算费用报告（可选参数 days）"""
+    try:
+        analyzer = get_analyzer()
+        if not analyzer.usage_log:
+            return jsonify({'success': True, 'usage': {'enabled': False}})
+        days = request.args.get('days', type=float)
+        return jsonify({
+            'success': True,
+            'usage': analyzer.usage_log.report(days)
+        })
+    except Exception as e:
+        print(f"获取token用量报告时出错: {e}")
+        return jsonify({'error': f'获取token用量报告时出错: {str(e)}'}), 500
+
+@app.route('/api/warehouse')
+def warehouse_overview():
+    """笔记数据仓库概况：各主题爬取情况、作者和点赞最高的笔记（可选参数 topic、since、limit）"""
+    try:
+        store = get_warehouse()
+        topic = request.args.get('topic') or None
+        since = request.args.get('since') or None
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        return jsonify({
+            'success': True,
+            'summary': store.summary(),
+            'topics': store.topics(),
+            'top_authors': store.top_authors(limit),
+            'top_notes': store.top_notes(topic, since, limit)
+        })
+    except Exception as e:
+        print(f"查询笔记数据仓库时出错: {e}")
+        return jsonify({'error': f'查询笔记数据仓库时出错: {str(e)}'}), 500
+
+@app.route('/api/warehouse/notes/<note_id>')
+def warehouse_note_history(note_id):
+    """单条笔记在各次爬取中的点赞变化"""
+    try:
+        history = get_warehouse().note_history(note_id)
+        if not history:
+            return jsonify({'error': '笔记不存在'}), 404
+        return jsonify({'success': True, 'note_id': note_id, 'history': history})
+    except Exception as e:
+        print(f"查询笔记历史时出错: {e}")
+        return jsonify({'error': f'查询笔记历史时出错: {str(e)}'}), 500
+
+@app.route('/api/archive')
+def archive_partitions():
+    """归档分区列表（可选参数 topic、start、end 按主题和日期范围筛选）"""
+    try:
+        archive = CrawlArchive()
+        partitions = archive.partitions(request.args.get('topic') or None,
+                                        request.args.get('start') or None,
+                                        request.args.get('end') or None)
+        return jsonify({
+            'success': True,
+            'compacted_at': archive.load_manifest().get('compacted_at'),
+            'partitions': partitions,
+            'rows': sum(entry['rows'] for entry in partitions),
+            'bytes': sum(entry['bytes'] for entry in partitions)
+        })
+    except Exception as e:
+        print(f"获取归档分区时出错: {e}")
+        return jsonify({'error': f'获取归档分区时出错: {str(e)}'}), 500
+
+@app.route('/api/archive/compact', methods=['POST'])
+def compact_archive():
+    """立即归档一次"""
+    try:
+        result = CrawlArchive().compact()
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        print(f"数据归档时出错: {e}")
+        return jsonify({'error': f'数据归档时出错: {str(e)}'}), 500
+
+@app.route('/api/archive/export', methods=['POST'])
+def export_archive():
+    """把归档数据按主题和日期范围导出为数据文件，导出后可在文件列表中选择分析"""
+    try:
+        data = request.get_json() or {}
+        data_format = data.get('format') or None
+        if data_format and data_format not in FORMAT_EXTENSIONS:
+            return jsonify({'error': f'不支持的数据格式: {data_format}'}), 400
+        try:
+            path = CrawlArchive().export(data.get('topic') or None, data.get('start') or None,
+                                         data.get('end') or None, data_format=data_format)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        return jsonify({'success': True, 'filename': os.path.basename(path)})
+    except Exception as e:
+        print(f"导出归档数据时出错: {e}")
+        return jsonify({'error': f'导出归档数据时出错: {str(e)}'}), 500
+
 @app.route('/api/analysis/<filename>')
 def get_analysis(filename):
     """获取分析结果"""
@@ -557,6 +1045,9 @@ if __name__ == '__main__':
     
     # 启动cookie自动更新线程
     start_cookie_update_thread()
+    start_archive_thread()
+    # 恢复上次退出时排队中/执行中的爬取任务
+    start_job_workers()
     
     app.run(
         host=config.FLASK_HOST,